@@ -1,56 +1,103 @@
 import os
-import boto3
+import time
 import bcrypt
+import hashlib
 import logging
+import secrets
 from datetime import datetime
-from botocore.exceptions import BotoCoreError, ClientError
-from exceptions import AuthenticationError, DatabaseError, ConfigurationError
+from concurrent.futures import ThreadPoolExecutor
+from exceptions import AuthenticationError, DatabaseError
+from stores import user_store
 from utils.logging_helpers import create_log_extra
 from utils.error_handlers import handle_database_error
-from utils.config_validator import is_production
 
 logger = logging.getLogger()
 
-def get_dynamodb_resource():
-    region = os.environ.get('AWS_DEFAULT_REGION', 'us-east-1')
-    return boto3.resource('dynamodb', region_name=region)
 
-dynamodb = get_dynamodb_resource()
+MIN_BCRYPT_ROUNDS = 4
+MAX_BCRYPT_ROUNDS = 31
 
-def get_users_table_name():
-    table_name = os.environ.get('USERS_TABLE')
-    if not table_name:
-        if is_production():
-            raise ConfigurationError('USERS_TABLE environment variable is required in production')
-        return 'users-dev'
-    return table_name
 
-users_table_name = get_users_table_name()
-users_table = dynamodb.Table(users_table_name)
+def get_bcrypt_rounds():
+    """Work factor for new password hashes; stored hashes with another cost are upgraded on login."""
+    rounds_str = os.environ.get('BCRYPT_ROUNDS', '12')
+    try:
+        rounds = int(rounds_str)
+        if not MIN_BCRYPT_ROUNDS <= rounds <= MAX_BCRYPT_ROUNDS:
+            raise ValueError(rounds_str)
+        return rounds
+    except (ValueError, TypeError):
+        logger.warning(f'Invalid BCRYPT_ROUNDS value: {rounds_str}, using default 12')
+        return 12
+
+
+def get_bcrypt_max_workers():
+    workers_str = os.environ.get('BCRYPT_MAX_WORKERS', '4')
+    try:
+        return max(1, int(workers_str))
+    except (ValueError, TypeError):
+        logger.warning(f'Invalid BCRYPT_MAX_WORKERS value: {workers_str}, using default 4')
+        return 4
+
 
+# bcrypt releases the GIL, so a few threads hash in parallel without starving request threads.
+bcrypt_pool = ThreadPoolExecutor(max_workers=get_bcrypt_max_workers(), thread_name_prefix='bcrypt')
 
-def hash_password(password):
-    salt = bcrypt.gensalt()
-    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+
+def hash_password(password, rounds=None):
+    salt = bcrypt.gensalt(rounds or get_bcrypt_rounds())
+    return bcrypt_pool.submit(bcrypt.hashpw, password.encode('utf-8'), salt).result().decode('utf-8')
 
 
 def verify_password(password, password_hash):
-    return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+    return bcrypt_pool.submit(bcrypt.checkpw, password.encode('utf-8'), password_hash.encode('utf-8')).result()
+
+
+def get_hash_rounds(password_hash):
+    """Cost stored in a $2b$<cost>$... hash, or None when it cannot be read."""
+    try:
+        return int(password_hash.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+def needs_rehash(password_hash):
+    rounds = get_hash_rounds(password_hash)
+    return rounds is not None and rounds != get_bcrypt_rounds()
+
+
+def rehash_password(user, password, request_id=None):
+    """Store the password again at the configured cost; a failure is logged and the old hash kept."""
+    old_rounds = get_hash_rounds(user['password_hash'])
+    try:
+        user_store.put_user({**user, 'password_hash': hash_password(password)})
+    except DatabaseError as e:
+        logger.warning('Failed to upgrade password hash', extra=create_log_extra(
+            request_id,
+            username=user.get('username'),
+            error_type=type(e).__name__
+        ))
+        return False
+    
+    logger.info('Password hash upgraded', extra=create_log_extra(
+        request_id,
+        username=user.get('username'),
+        old_rounds=old_rounds,
+        new_rounds=get_bcrypt_rounds()
+    ))
+    return True
 
 
 def verify_credentials(username, password, request_id=None):
     logger.info('Verifying credentials', extra=create_log_extra(request_id, username=username))
     
     try:
-        response = users_table.get_item(
-            Key={'user_id': username}
-        )
+        user = user_store.get_user(username)
         
-        if 'Item' not in response:
+        if user is None:
             logger.warning('User not found', extra=create_log_extra(request_id, username=username))
             raise AuthenticationError('Invalid credentials')
         
-        user = response['Item']
         stored_password_hash = user.get('password_hash')
         
         if not stored_password_hash:
@@ -61,6 +108,9 @@ def verify_credentials(username, password, request_id=None):
             logger.warning('Invalid password', extra=create_log_extra(request_id, username=username))
             raise AuthenticationError('Invalid credentials')
         
+        if needs_rehash(stored_password_hash):
+            rehash_password(user, password, request_id)
+        
         logger.info('Credentials verified successfully', extra=create_log_extra(
             request_id,
             username=username,
@@ -68,10 +118,10 @@ def verify_credentials(username, password, request_id=None):
         ))
         
         return user
-        
+    
     except AuthenticationError:
         raise
-    except (BotoCoreError, ClientError) as e:
+    except DatabaseError as e:
         handle_database_error(e, request_id, 'verifying credentials')
     except Exception as e:
         handle_database_error(e, request_id, 'verifying credentials')
@@ -83,19 +133,72 @@ def create_user(username, password, request_id=None):
     try:
         password_hash = hash_password(password)
         
-        users_table.put_item(
-            Item={
-                'user_id': username,
-                'username': username,
-                'password_hash': password_hash,
-                'created_at': str(datetime.utcnow().isoformat())
-            }
-        )
+        user_store.put_user({
+            'user_id': username,
+            'username': username,
+            'password_hash': password_hash,
+            'created_at': str(datetime.utcnow().isoformat())
+        })
         
         logger.info('User created successfully', extra=create_log_extra(request_id, username=username))
-        
-    except (BotoCoreError, ClientError) as e:
+    
+    except DatabaseError as e:
         handle_database_error(e, request_id, 'creating user')
     except Exception as e:
         handle_database_error(e, request_id, 'creating user')
 
+
+def get_refresh_token_ttl_days():
+    days_str = os.environ.get('REFRESH_TOKEN_TTL_DAYS', '30')
+    try:
+        return max(1, int(days_str))
+    except (ValueError, TypeError):
+        logger.warning(f'Invalid REFRESH_TOKEN_TTL_DAYS value: {days_str}, using default 30')
+        return 30
+
+
+def _refresh_token_digest(refresh_token):
+    return hashlib.sha256(refresh_token.encode('utf-8')).hexdigest()
+
+
+def issue_refresh_token(user, request_id=None, now=None):
+    """Create an opaque refresh token for the user; only its SHA-256 digest is stored."""
+    now = int(now or time.time())
+    refresh_token = secrets.token_urlsafe(32)
+    
+    try:
+        user_store.put_refresh_token(_refresh_token_digest(refresh_token), {
+            'user_id': user.get('user_id'),
+            'username': user.get('username'),
+            'issued_at': now,
+            'expires_at': now + get_refresh_token_ttl_days() * 86400
+        })
+    except DatabaseError as e:
+        handle_database_error(e, request_id, 'issuing refresh token')
+    
+    logger.info('Refresh token issued', extra=create_log_extra(request_id, username=user.get('username')))
+    return refresh_token
+
+
+def redeem_refresh_token(refresh_token, request_id=None, now=None):
+    """Consume a refresh token and return its user_id and username, without touching bcrypt.
+    
+    Tokens are single use: redeeming one removes it, so the caller issues a replacement.
+    """
+    if not refresh_token or not isinstance(refresh_token, str):
+        raise AuthenticationError('Invalid refresh token')
+    
+    try:
+        record = user_store.consume_refresh_token(_refresh_token_digest(refresh_token))
+    except DatabaseError as e:
+        handle_database_error(e, request_id, 'redeeming refresh token')
+    
+    if record is None:
+        logger.warning('Unknown or already used refresh token', extra=create_log_extra(request_id))
+        raise AuthenticationError('Invalid refresh token')
+    
+    if record['expires_at'] <= int(now or time.time()):
+        logger.warning('Expired refresh token', extra=create_log_extra(request_id, username=record.get('username')))
+        raise AuthenticationError('Refresh token has expired')
+    
+    return {'user_id': record['user_id'], 'username': record['username']}
@@ -0,0 +1,192 @@
+import io
+import os
+import sys
+import mmap
+import time
+import logging
+import argparse
+from itertools import chain
+from multiprocessing import Pool
+from bulk_converter import FORMATS, READERS, WRITERS, convert_rows
+from database import get_rate_snapshot
+from exceptions import DatabaseError, ExternalAPIError
+from rate_engine import ANCHOR_CURRENCY
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+DEFAULT_CHUNK_BYTES = 4 * 1024 * 1024
+
+# Per-process state set once by _init_worker and reused for every chunk.
+worker_state = {}
+
+
+def split_ranges(data, chunk_bytes, start=0, first_line=1, csv_quotes=False):
+    """Split data[start:] into (start, end, first_line) byte ranges that each end on a line boundary.
+    
+    With csv_quotes, a newline inside a quoted CSV field is not a boundary: a range is
+    extended line by line until it holds an even number of quotes ("" escapes count twice).
+    """
+    ranges = []
+    size = len(data)
+    
+    while start < size:
+        end = data.find(b'\n', min(start + chunk_bytes, size) - 1)
+        end = size if end == -1 else end + 1
+        if csv_quotes:
+            quotes = data[start:end].count(b'"')
+            while quotes % 2 and end < size:
+                line_end = data.find(b'\n', end)
+                line_end = size if line_end == -1 else line_end + 1
+                quotes += data[end:line_end].count(b'"')
+                end = line_end
+        ranges.append((start, end, first_line))
+        first_line += data[start:end].count(b'\n')
+        start = end
+    
+    return ranges
+
+
+def read_header(data):
+    """Return the CSV header line and the offset where the data rows start."""
+    end = data.find(b'\n')
+    end = len(data) if end == -1 else end + 1
+    return data[:end].decode('utf-8-sig'), end
+
+
+def _init_worker(path, snapshot, input_format, output_format, header):
+    # Row errors end up in the output and run() reports their total; per-chunk logs would only add noise.
+    logging.getLogger().setLevel(logging.ERROR)
+    
+    with open(path, 'rb') as source:
+        data = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+    
+    worker_state.update(
+        data=data,
+        snapshot=snapshot,
+        input_format=input_format,
+        output_format=output_format,
+        header=header
+    )
+
+
+def _count_rows(results, counts):
+    for result in results:
+        counts['rows'] += 1
+        if 'error' in result:
+            counts['errors'] += 1
+        yield result
+
+
+def convert_range(task):
+    """Convert one byte range of the mapped input and return (text, rows, errors)."""
+    start, end, first_line = task
+    text = worker_state['data'][start:end].decode('utf-8-sig')
+    lines = io.StringIO(text, newline='\n')
+    
+    if worker_state['input_format'] == 'csv':
+        # Each range gets the header back; it takes line first_line - 1 in the numbering.
+        rows = READERS['csv'](chain([worker_state['header']], lines), first_line - 2)
+    else:
+        rows = READERS['ndjson'](lines, first_line - 1)
+    
+    counts = {'rows': 0, 'errors': 0}
+    results = _count_rows(convert_rows(rows, worker_state['snapshot']), counts)
+    output = ''.join(WRITERS[worker_state['output_format']](results, header=False))
+    return output, counts['rows'], counts['errors']
+
+
+def detect_format(path):
+    return 'csv' if path.lower().endswith('.csv') else 'ndjson'
+
+
+def run(input_path, output, input_format=None, output_format=None, workers=None, chunk_bytes=DEFAULT_CHUNK_BYTES, ordered=True, snapshot=None):
+    """Convert input_path into the output file object with a process pool and return the run's stats.
+    
+    The snapshot is read once here and handed to every worker, so all rows use the same
+    rates. With ordered=True chunks are written in input order; otherwise as they finish.
+    """
+    input_format = input_format or detect_format(input_path)
+    output_format = output_format or input_format
+    if input_format not in READERS or output_format not in WRITERS:
+        raise ValueError(f'Unsupported format. Use one of: {", ".join(FORMATS)}.')
+    
+    snapshot = snapshot or get_rate_snapshot(ANCHOR_CURRENCY)
+    started = time.perf_counter()
+    stats = {'rows': 0, 'errors': 0, 'chunks': 0}
+    
+    output.write(''.join(WRITERS[output_format]([])))
+    
+    if os.path.getsize(input_path):
+        with open(input_path, 'rb') as source:
+            data = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        with data:
+            if input_format == 'csv':
+                header, start = read_header(data)
+                ranges = split_ranges(data, chunk_bytes, start, 2, csv_quotes=True)
+            else:
+                header = ''
+                ranges = split_ranges(data, chunk_bytes)
+        
+        initargs = (input_path, snapshot, input_format, output_format, header)
+        with Pool(workers, initializer=_init_worker, initargs=initargs) as pool:
+            chunks = pool.imap if ordered else pool.imap_unordered
+            for text, rows, errors in chunks(convert_range, ranges):
+                output.write(text)
+                stats['rows'] += rows
+                stats['errors'] += errors
+                stats['chunks'] += 1
+    
+    stats['seconds'] = time.perf_counter() - started
+    stats['rows_per_second'] = stats['rows'] / stats['seconds'] if stats['seconds'] else 0.0
+    stats['snapshot_version'] = snapshot.version
+    return stats
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Convert a large NDJSON or CSV file locally, without API Gateway.')
+    parser.add_argument(
+        'input',
+        help='input file; .csv is read as CSV, anything else as NDJSON. CSV chunks never '
+             'end inside a quoted field, so quoted newlines stay within one row'
+    )
+    parser.add_argument('-o', '--output', help='output file (default: stdout)')
+    parser.add_argument('--format', choices=FORMATS, help='input format (default: from the file extension)')
+    parser.add_argument('--output-format', choices=FORMATS, help='output format (default: same as the input)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='worker processes (default: CPU count)')
+    parser.add_argument('--chunk-bytes', type=int, default=DEFAULT_CHUNK_BYTES, help='bytes per chunk handed to a worker')
+    parser.add_argument('--unordered', action='store_true', help='write chunks as they finish instead of in input order')
+    args = parser.parse_args(argv)
+    if args.workers < 1 or args.chunk_bytes < 1:
+        parser.error('--workers and --chunk-bytes must be at least 1')
+    return args
+
+
+def main(argv=None):
+    logging.basicConfig(format='%(message)s')
+    args = parse_args(argv)
+    output = open(args.output, 'w', newline='') if args.output else sys.stdout
+    
+    try:
+        stats = run(
+            args.input, output, args.format, args.output_format,
+            args.workers, args.chunk_bytes, ordered=not args.unordered
+        )
+    except (DatabaseError, ExternalAPIError, ValueError, OSError) as e:
+        logger.error(f'Could not convert {args.input}: {e}')
+        return 1
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    
+    logger.info(
+        f'Converted {stats["rows"]} rows ({stats["errors"]} errors) in {stats["chunks"]} chunks '
+        f'in {stats["seconds"]:.2f}s: {stats["rows_per_second"]:,.0f} rows/s '
+        f'using snapshot {stats["snapshot_version"]}'
+    )
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,177 @@
+import io
+import os
+import csv
+import json
+import logging
+from itertools import islice
+from converters import calculate_conversions
+from database import get_rate_snapshot
+from exceptions import ValidationError
+from rate_engine import ANCHOR_CURRENCY
+from validators import validate_conversion
+from utils.logging_helpers import create_log_extra
+
+logger = logging.getLogger()
+
+FORMATS = ('ndjson', 'csv')
+CSV_FIELDS = ('line', 'amount', 'from', 'to', 'rate', 'converted_amount', 'error')
+
+
+def get_bulk_chunk_size():
+    """Rows validated and converted together before their output is written."""
+    size_str = os.environ.get('BULK_CHUNK_SIZE', '1000')
+    try:
+        return max(1, int(size_str))
+    except (ValueError, TypeError):
+        logger.warning(f'Invalid BULK_CHUNK_SIZE value: {size_str}, using default 1000')
+        return 1000
+
+
+def read_ndjson(lines, line_offset=0):
+    """Yield (line, record, error) for every non-blank NDJSON line; line_offset shifts the numbering."""
+    for line_number, line in enumerate(lines, line_offset + 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            yield line_number, None, 'Invalid JSON'
+            continue
+        if not isinstance(record, dict):
+            yield line_number, None, 'Each line must be a JSON object with amount, from and to.'
+            continue
+        yield line_number, record, None
+
+
+def _parse_csv_amount(value):
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return value
+
+
+def read_csv(lines, line_offset=0):
+    """Yield (line, record, error) for every CSV row under an amount,from,to header; line_offset shifts the numbering."""
+    reader = csv.DictReader(lines)
+    for record in reader:
+        if not any(record.values()):
+            continue
+        record['amount'] = _parse_csv_amount(record.get('amount'))
+        yield reader.line_num + line_offset, record, None
+
+
+def _record_fields(record):
+    from_currency = record.get('from') or ''
+    to_currency = record.get('to') or ''
+    if not isinstance(from_currency, str) or not isinstance(to_currency, str):
+        raise ValidationError('Currencies must be strings.')
+    return record.get('amount'), from_currency.strip().upper(), to_currency.strip().upper()
+
+
+def convert_rows(rows, snapshot, request_id=None, chunk_size=None):
+    """Validate and convert (line, record, error) rows chunk by chunk, yielding one result per row.
+    
+    Only one chunk is held at a time, and each distinct pair is derived from the snapshot once.
+    Rejected rows carry their error in the output and are logged once, as a count, at the end.
+    """
+    chunk_size = chunk_size or get_bulk_chunk_size()
+    pair_rates = {}
+    rows = iter(rows)
+    counts = {'rows': 0, 'rejected': 0}
+    
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        
+        results = []
+        pending = []
+        for line_number, record, error in chunk:
+            result = {'line': line_number}
+            results.append(result)
+            counts['rows'] += 1
+            if error is not None:
+                result['error'] = error
+                counts['rejected'] += 1
+                continue
+            
+            try:
+                amount, from_currency, to_currency = _record_fields(record)
+                amount_float = validate_conversion(amount, from_currency, to_currency, request_id, quiet=True)
+                pair = (from_currency, to_currency)
+                if pair not in pair_rates:
+                    pair_rates[pair] = snapshot.rate(from_currency, to_currency)
+            except (ValidationError, ValueError) as row_error:
+                result['error'] = str(row_error)
+                counts['rejected'] += 1
+                continue
+            
+            result.update({'amount': amount_float, 'from': from_currency, 'to': to_currency, 'rate': pair_rates[pair]})
+            pending.append(result)
+        
+        converted_amounts = calculate_conversions(
+            [result['amount'] for result in pending],
+            [result['rate'] for result in pending]
+        )
+        for result, converted_amount in zip(pending, converted_amounts):
+            result['converted_amount'] = converted_amount
+        
+        yield from results
+    
+    if counts['rejected']:
+        logger.warning('Bulk rows rejected', extra=create_log_extra(
+            request_id,
+            rows=counts['rows'],
+            rejected_rows=counts['rejected']
+        ))
+
+
+def write_ndjson(results, header=True):
+    """NDJSON has no header; the flag only keeps the writers interchangeable."""
+    for result in results:
+        yield json.dumps(result) + '\n'
+
+
+def write_csv(results, header=True):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDS, lineterminator='\n')
+    if header:
+        writer.writeheader()
+    
+    for result in results:
+        writer.writerow(result)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+READERS = {'ndjson': read_ndjson, 'csv': read_csv}
+WRITERS = {'ndjson': write_ndjson, 'csv': write_csv}
+
+
+def convert_stream(lines, input_format='ndjson', output_format=None, request_id=None, deadline=None, chunk_size=None, snapshot=None):
+    """Convert an iterable of NDJSON or CSV lines into output lines, lazily.
+    
+    The anchor snapshot is read once, up front, so every row uses the same rates and
+    lookup failures surface before any output is produced. Rows that fail validation
+    get an error column and do not stop the stream.
+    """
+    if input_format not in READERS:
+        raise ValueError(f'Unsupported input format {input_format}. Use one of: {", ".join(FORMATS)}.')
+    output_format = output_format or input_format
+    if output_format not in WRITERS:
+        raise ValueError(f'Unsupported output format {output_format}. Use one of: {", ".join(FORMATS)}.')
+    
+    snapshot = snapshot or get_rate_snapshot(ANCHOR_CURRENCY, request_id, deadline)
+    logger.info('Bulk conversion started', extra=create_log_extra(
+        request_id,
+        input_format=input_format,
+        output_format=output_format,
+        snapshot_version=snapshot.version
+    ))
+    
+    rows = READERS[input_format](lines)
+    return WRITERS[output_format](convert_rows(rows, snapshot, request_id, chunk_size))
@@ -0,0 +1,68 @@
+import time
+import bcrypt
+import logging
+import argparse
+from auth import MIN_BCRYPT_ROUNDS, MAX_BCRYPT_ROUNDS
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+SAMPLE_PASSWORD = b'calibration-password'
+
+# Costs below 10 are too cheap to recommend, however fast the target.
+DEFAULT_MIN_ROUNDS = 10
+DEFAULT_MAX_ROUNDS = 16
+
+
+def measure_rounds(rounds, samples=3, clock=time.perf_counter):
+    """Median seconds one bcrypt hash takes at the given cost on this machine."""
+    timings = []
+    for _ in range(samples):
+        started = clock()
+        bcrypt.hashpw(SAMPLE_PASSWORD, bcrypt.gensalt(rounds))
+        timings.append(clock() - started)
+    return sorted(timings)[len(timings) // 2]
+
+
+def calibrate(target_seconds, min_rounds=DEFAULT_MIN_ROUNDS, max_rounds=DEFAULT_MAX_ROUNDS, samples=3, measure=measure_rounds):
+    """Return (rounds, timings): the highest cost whose hash fits in target_seconds, never below min_rounds.
+    
+    Each extra round doubles the work, so measuring stops at the first cost over the target.
+    """
+    timings = {}
+    best = min_rounds
+    
+    for rounds in range(min_rounds, max_rounds + 1):
+        timings[rounds] = measure(rounds, samples)
+        if timings[rounds] > target_seconds:
+            break
+        best = rounds
+    
+    return best, timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Pick the highest BCRYPT_ROUNDS that fits a target login latency.')
+    parser.add_argument('--target-ms', type=float, default=250, help='target time for one hash in milliseconds (default: 250)')
+    parser.add_argument('--min-rounds', type=int, default=DEFAULT_MIN_ROUNDS, help=f'lowest cost to accept (default: {DEFAULT_MIN_ROUNDS})')
+    parser.add_argument('--max-rounds', type=int, default=DEFAULT_MAX_ROUNDS, help=f'highest cost to try (default: {DEFAULT_MAX_ROUNDS})')
+    parser.add_argument('--samples', type=int, default=3, help='hashes timed per cost (default: 3)')
+    args = parser.parse_args(argv)
+    
+    if not MIN_BCRYPT_ROUNDS <= args.min_rounds <= args.max_rounds <= MAX_BCRYPT_ROUNDS:
+        parser.error(f'rounds must satisfy {MIN_BCRYPT_ROUNDS} <= --min-rounds <= --max-rounds <= {MAX_BCRYPT_ROUNDS}')
+    
+    logging.basicConfig(format='%(message)s')
+    rounds, timings = calibrate(args.target_ms / 1000, args.min_rounds, args.max_rounds, max(1, args.samples))
+    
+    for cost, seconds in timings.items():
+        logger.info(f'rounds={cost}: {seconds * 1000:.1f} ms')
+    if timings[rounds] > args.target_ms / 1000:
+        logger.warning(f'Even rounds={rounds} exceeds the {args.target_ms:.0f} ms target on this machine')
+    
+    print(f'BCRYPT_ROUNDS={rounds}')
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -2,3 +2,6 @@ def calculate_conversion(amount, rate):
     return round(amount * rate, 2)
 
 
+def calculate_conversions(amounts, rates):
+    """calculate_conversion over parallel sequences of amounts and rates, in a single pass."""
+    return list(map(calculate_conversion, amounts, rates))
@@ -1,14 +1,21 @@
 import os
 import time
-import boto3
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import logging
-from decimal import Decimal
-from botocore.exceptions import BotoCoreError, ClientError
-from external_api import get_latest_rates
-from exceptions import DatabaseError, ExternalAPIError, ConfigurationError
+from external_api import get_latest_rates, rates_circuit, UnsupportedCurrencyError
+from rate_engine import RateSnapshot, ANCHOR_CURRENCY
+from rate_history import append_snapshot
+from stores import rate_store
+from constants import VALID_CURRENCIES
+from exceptions import DatabaseError, ExternalAPIError
 from utils.logging_helpers import create_log_extra
 from utils.error_handlers import handle_database_error
-from utils.config_validator import is_production
+from utils.ttl_cache import TTLCache
+from utils.single_flight import SingleFlight
+from utils.circuit_breaker import CircuitOpenError
+from utils.deadline import Deadline, DeadlineExceededError
 
 logger = logging.getLogger()
 
@@ -16,23 +23,6 @@ logger = logging.getLogger()
 class ExternalAPIUnavailableError(ExternalAPIError):
     pass
 
-def get_dynamodb_resource():
-    region = os.environ.get('AWS_DEFAULT_REGION', 'us-east-1')
-    return boto3.resource('dynamodb', region_name=region)
-
-dynamodb = get_dynamodb_resource()
-
-def get_currency_table_name():
-    table_name = os.environ.get('CURRENCY_TABLE')
-    if not table_name:
-        if is_production():
-            raise ConfigurationError('CURRENCY_TABLE environment variable is required in production')
-        return 'currency-rates-dev'
-    return table_name
-
-table_name = get_currency_table_name()
-table = dynamodb.Table(table_name)
-
 
 def get_cache_ttl_hours():
     """Get cache TTL in hours from environment variable, defaulting to 1 hour."""
@@ -44,122 +34,655 @@ def get_cache_ttl_hours():
         return 1
 
 
-def save_rate_to_cache(from_currency, to_currency, rate, request_id=None):
-    """Save conversion rate to cache with TTL."""
-    cache_ttl_hours = get_cache_ttl_hours()
-    ttl_timestamp = int(time.time()) + (cache_ttl_hours * 3600)
+def get_rate_cache_max_size():
+    """Get the maximum number of snapshots kept in the in-memory rate cache."""
+    size_str = os.environ.get('RATE_CACHE_MAX_SIZE', '256')
+    try:
+        size = int(size_str)
+        if size < 1:
+            raise ValueError(size_str)
+        return size
+    except (ValueError, TypeError):
+        logger.warning(f'Invalid RATE_CACHE_MAX_SIZE value: {size_str}, using default 256')
+        return 256
+
+
+# Lives for the lifetime of the container, so warm invocations skip the store.
+rate_cache = TTLCache(
+    max_size=get_rate_cache_max_size(),
+    default_ttl_seconds=get_cache_ttl_hours() * 3600
+)
+
+
+def get_refresh_lease_seconds():
+    """Get how long a container may hold the refresh lease for a base currency."""
+    seconds_str = os.environ.get('RATE_REFRESH_LEASE_SECONDS', '10')
+    try:
+        return int(seconds_str)
+    except (ValueError, TypeError):
+        logger.warning(f'Invalid RATE_REFRESH_LEASE_SECONDS value: {seconds_str}, using default 10 seconds')
+        return 10
+
+
+def get_refresh_wait_seconds():
+    """Get how long a container waits for another container's refresh before fetching itself."""
+    seconds_str = os.environ.get('RATE_REFRESH_WAIT_SECONDS', '2')
+    try:
+        return float(seconds_str)
+    except (ValueError, TypeError):
+        logger.warning(f'Invalid RATE_REFRESH_WAIT_SECONDS value: {seconds_str}, using default 2 seconds')
+        return 2.0
+
+
+def get_stale_grace_seconds():
+    """Get how long past its ttl a snapshot may still be served while it is refreshed in the background."""
+    seconds_str = os.environ.get('RATE_STALE_GRACE_SECONDS', '900')
+    try:
+        return int(seconds_str)
+    except (ValueError, TypeError):
+        logger.warning(f'Invalid RATE_STALE_GRACE_SECONDS value: {seconds_str}, using default 900 seconds')
+        return 900
+
+
+def get_prefetch_currencies():
+    """Get the base currencies kept warm by the scheduled prefetcher, the anchor by default."""
+    currencies_str = os.environ.get('PREFETCH_CURRENCIES')
+    if not currencies_str:
+        return [ANCHOR_CURRENCY]
     
+    currencies = []
+    for currency in currencies_str.split(','):
+        currency = currency.strip().upper()
+        if currency not in VALID_CURRENCIES:
+            logger.warning(f'Ignoring PREFETCH_CURRENCIES entry not in CURRENCIES: {currency}')
+            continue
+        if currency not in currencies:
+            currencies.append(currency)
+    return currencies or [ANCHOR_CURRENCY]
+
+
+def get_prefetch_max_workers():
+    workers_str = os.environ.get('PREFETCH_MAX_WORKERS', '4')
     try:
-        table.put_item(
-            Item={
-                'from_currency': from_currency,
-                'to_currency': to_currency,
-                'rate': Decimal(str(rate)),
-                'ttl': ttl_timestamp
-            }
-        )
-        logger.info('Rate saved to cache', extra=create_log_extra(
+        return max(1, int(workers_str))
+    except (ValueError, TypeError):
+        logger.warning(f'Invalid PREFETCH_MAX_WORKERS value: {workers_str}, using default 4')
+        return 4
+
+
+def get_negative_cache_ttl_seconds():
+    """Get how long unsupported currencies and missing pairs are remembered."""
+    seconds_str = os.environ.get('NEGATIVE_CACHE_TTL_SECONDS', '300')
+    try:
+        return int(seconds_str)
+    except (ValueError, TypeError):
+        logger.warning(f'Invalid NEGATIVE_CACHE_TTL_SECONDS value: {seconds_str}, using default 300 seconds')
+        return 300
+
+
+def is_negative_cache_persisted():
+    return os.environ.get('NEGATIVE_CACHE_PERSIST', 'false').strip().lower() in ('true', '1', 'yes')
+
+
+REFRESH_POLL_INTERVAL_SECONDS = 0.2
+
+# Failed lookups are remembered for a shorter time than rates, so bad requests fail fast.
+negative_cache = TTLCache(
+    max_size=get_rate_cache_max_size(),
+    default_ttl_seconds=get_negative_cache_ttl_seconds()
+)
+
+# Threads of this container missing on the same base share one refresh.
+refresh_flights = SingleFlight()
+
+# Newest snapshot seen per base, served marked stale when the provider cannot be reached.
+last_known_good = {}
+
+
+def load_snapshot(base_currency, request_id=None):
+    """Read the stored snapshot for a base currency, or None when there is none."""
+    logger.debug('Querying store for rate snapshot', extra=create_log_extra(
+        request_id,
+        from_currency=base_currency,
+        store=type(rate_store).__name__
+    ))
+    
+    try:
+        return rate_store.load_snapshot(base_currency)
+    except DatabaseError as e:
+        handle_database_error(e, request_id, f'while fetching rate snapshot for {base_currency}')
+    except Exception as e:
+        handle_database_error(e, request_id, f'while fetching rate snapshot for {base_currency}')
+
+
+def build_snapshot(base_currency, rates, fetched_at=None):
+    """Build a snapshot from provider rates, expiring CACHE_TTL_HOURS after fetched_at."""
+    fetched_at = fetched_at or int(time.time())
+    ttl_timestamp = fetched_at + (get_cache_ttl_hours() * 3600)
+    return RateSnapshot.from_provider_rates(
+        base_currency,
+        rates,
+        fetched_at,
+        ttl_timestamp,
+        validators=getattr(rates, 'validators', None)
+    )
+
+
+def extend_snapshot_ttl(snapshot, validators=None, request_id=None):
+    """Keep a snapshot the provider reported unchanged for another CACHE_TTL_HOURS.
+    
+    Only the ttl and validators are written; the rates and version stay as they are.
+    """
+    extended = snapshot.with_expiry(int(time.time()) + get_cache_ttl_hours() * 3600, validators)
+    
+    try:
+        rate_store.save_snapshot_expiry(extended)
+        logger.info('Rate snapshot unchanged, ttl extended', extra=create_log_extra(
             request_id,
-            from_currency=from_currency,
-            to_currency=to_currency,
-            rate=rate,
-            ttl_hours=cache_ttl_hours,
-            expires_at=ttl_timestamp
+            from_currency=snapshot.base_currency,
+            snapshot_version=extended.version,
+            expires_at=extended.expires_at
         ))
-    except (BotoCoreError, ClientError) as e:
-        logger.warning('Failed to save rate to cache', extra=create_log_extra(
+    except DatabaseError as e:
+        logger.warning('Failed to extend rate snapshot ttl', extra=create_log_extra(
             request_id,
-            from_currency=from_currency,
-            to_currency=to_currency,
+            from_currency=snapshot.base_currency,
             error_type=type(e).__name__
         ))
-        raise DatabaseError(f'Failed to save rate to cache: {str(e)}')
+        raise DatabaseError(f'Failed to save rates to cache: {str(e)}')
     except Exception as e:
-        logger.warning('Failed to save rate to cache', extra=create_log_extra(
+        logger.warning('Failed to extend rate snapshot ttl', extra=create_log_extra(
             request_id,
-            from_currency=from_currency,
-            to_currency=to_currency,
+            from_currency=snapshot.base_currency,
             error_type=type(e).__name__
         ))
-        raise DatabaseError(f'Failed to save rate to cache: {str(e)}')
+        raise DatabaseError(f'Failed to save rates to cache: {str(e)}')
+    
+    cache_snapshot_in_memory(extended)
+    return extended
 
 
-def get_conversion_rate(from_currency, to_currency, request_id=None):
-    logger.debug('Querying DynamoDB for conversion rate', extra=create_log_extra(
-        request_id,
-        from_currency=from_currency,
-        to_currency=to_currency,
-        table_name=table_name
-    ))
+def store_provider_rates(base_currency, rates, previous=None, request_id=None):
+    """Persist a provider response: a new snapshot, or a ttl extension when nothing changed."""
+    if getattr(rates, 'not_modified', False) and previous is not None:
+        return extend_snapshot_ttl(previous, rates.validators, request_id)
+    return save_rates_to_cache(base_currency, rates, request_id)
+
+
+def save_rates_to_cache(base_currency, rates, request_id=None):
+    """Save the supported rates for a base currency as one snapshot item with a single TTL."""
+    snapshot = build_snapshot(base_currency, rates)
     
     try:
-        response = table.get_item(
-            Key={
-                'from_currency': from_currency,
-                'to_currency': to_currency
-            }
-        )
-    except (BotoCoreError, ClientError) as e:
-        handle_database_error(e, request_id, f'while fetching rate for {from_currency} to {to_currency}')
+        rate_store.save_snapshot(snapshot)
+        logger.info('Rate snapshot saved to cache', extra=create_log_extra(
+            request_id,
+            from_currency=base_currency,
+            rates_count=len(snapshot.rates),
+            ttl_hours=get_cache_ttl_hours(),
+            expires_at=snapshot.expires_at
+        ))
+    except DatabaseError as e:
+        logger.warning('Failed to save rate snapshot to cache', extra=create_log_extra(
+            request_id,
+            from_currency=base_currency,
+            error_type=type(e).__name__
+        ))
+        raise DatabaseError(f'Failed to save rates to cache: {str(e)}')
     except Exception as e:
-        handle_database_error(e, request_id, f'while fetching rate for {from_currency} to {to_currency}')
+        logger.warning('Failed to save rate snapshot to cache', extra=create_log_extra(
+            request_id,
+            from_currency=base_currency,
+            error_type=type(e).__name__
+        ))
+        raise DatabaseError(f'Failed to save rates to cache: {str(e)}')
     
-    if 'Item' in response:
-        rate = float(response['Item']['rate'])
-        logger.info('Rate found in cache', extra=create_log_extra(
+    cache_snapshot_in_memory(snapshot)
+    append_snapshot(snapshot, request_id)
+    return snapshot
+
+
+def save_snapshots_to_cache(snapshots, request_id=None):
+    """Write several snapshots in one batch."""
+    try:
+        rate_store.save_snapshots(snapshots)
+        logger.info('Rate snapshots saved to cache', extra=create_log_extra(
             request_id,
-            from_currency=from_currency,
-            to_currency=to_currency,
-            rate=rate,
-            source='cache'
+            base_currencies=[snapshot.base_currency for snapshot in snapshots]
+        ))
+    except DatabaseError as e:
+        logger.warning('Failed to save rate snapshots to cache', extra=create_log_extra(
+            request_id,
+            error_type=type(e).__name__
+        ))
+        raise DatabaseError(f'Failed to save rates to cache: {str(e)}')
+    except Exception as e:
+        logger.warning('Failed to save rate snapshots to cache', extra=create_log_extra(
+            request_id,
+            error_type=type(e).__name__
+        ))
+        raise DatabaseError(f'Failed to save rates to cache: {str(e)}')
+    
+    for snapshot in snapshots:
+        cache_snapshot_in_memory(snapshot)
+        append_snapshot(snapshot, request_id)
+
+
+def prefetch_snapshots(base_currencies, request_id=None):
+    """Fetch the given bases from the external API in parallel and store them in one batch write.
+    
+    Bases the provider reports unchanged only get their ttl extended.
+    Returns the stored snapshots and a dict of failed bases to error messages.
+    """
+    snapshots = []
+    unchanged = []
+    failures = {}
+    fetched_at = int(time.time())
+    
+    if not base_currencies:
+        return snapshots, failures
+    
+    with ThreadPoolExecutor(max_workers=min(len(base_currencies), get_prefetch_max_workers())) as executor:
+        futures = {}
+        for base_currency in base_currencies:
+            previous = last_known_good.get(base_currency)
+            validators = previous.validators if previous is not None else None
+            future = executor.submit(rates_circuit.call, get_latest_rates, base_currency, request_id, None, validators)
+            futures[future] = (base_currency, previous)
+        
+        for future in as_completed(futures):
+            base_currency, previous = futures[future]
+            try:
+                rates = future.result()
+                if getattr(rates, 'not_modified', False) and previous is not None:
+                    unchanged.append((previous, rates.validators))
+                else:
+                    snapshots.append(build_snapshot(base_currency, rates, fetched_at))
+            except (ConnectionError, CircuitOpenError, ValueError) as e:
+                logger.error('Failed to prefetch rates', extra=create_log_extra(
+                    request_id,
+                    from_currency=base_currency,
+                    error_type=type(e).__name__,
+                    error=str(e)
+                ))
+                failures[base_currency] = str(e)
+    
+    if snapshots:
+        save_snapshots_to_cache(snapshots, request_id)
+    for previous, validators in unchanged:
+        snapshots.append(extend_snapshot_ttl(previous, validators, request_id))
+    
+    return snapshots, failures
+
+
+def remember_unsupported_currency(base_currency, reason, request_id=None):
+    """Remember that the provider does not quote a base, in memory and optionally in the store."""
+    expires_at = int(time.time()) + get_negative_cache_ttl_seconds()
+    negative_cache.set(base_currency, reason, expires_at=expires_at)
+    
+    if not is_negative_cache_persisted():
+        return
+    
+    try:
+        rate_store.save_unsupported(base_currency, reason, expires_at)
+    except DatabaseError as e:
+        logger.warning('Failed to persist unsupported currency', extra=create_log_extra(
+            request_id,
+            from_currency=base_currency,
+            error_type=type(e).__name__
+        ))
+
+
+def load_unsupported_currency(base_currency, request_id=None):
+    """Return why a base is known to be unsupported, or None."""
+    reason = negative_cache.get(base_currency)
+    if reason is not None or not is_negative_cache_persisted():
+        return reason
+    
+    try:
+        entry = rate_store.load_unsupported(base_currency)
+    except DatabaseError as e:
+        logger.warning('Failed to read unsupported currency', extra=create_log_extra(
+            request_id,
+            from_currency=base_currency,
+            error_type=type(e).__name__
+        ))
+        return None
+    
+    if entry is None or entry[1] <= time.time():
+        return None
+    
+    reason, expires_at = entry
+    negative_cache.set(base_currency, reason, expires_at=expires_at)
+    return reason
+
+
+def acquire_refresh_lease(base_currency, request_id=None):
+    """Try to become the only container refreshing a base currency.
+    
+    Returns the lease owner token, or None when another container holds a live lease.
+    """
+    owner = uuid.uuid4().hex
+    now = int(time.time())
+    
+    try:
+        acquired = rate_store.acquire_lease(base_currency, owner, now + get_refresh_lease_seconds(), now)
+    except DatabaseError as e:
+        logger.warning('Failed to acquire refresh lease, refreshing without it', extra=create_log_extra(
+            request_id,
+            from_currency=base_currency,
+            error_type=type(e).__name__
         ))
-        return rate
+        return owner
     
-    logger.info('Rate not found in cache, fetching from external API', extra=create_log_extra(
+    if not acquired:
+        logger.info('Refresh lease held by another container', extra=create_log_extra(
+            request_id,
+            from_currency=base_currency
+        ))
+        return None
+    return owner
+
+
+def release_refresh_lease(base_currency, owner, request_id=None):
+    try:
+        rate_store.release_lease(base_currency, owner)
+    except DatabaseError as e:
+        logger.debug('Refresh lease not released, it will expire on its own', extra=create_log_extra(
+            request_id,
+            from_currency=base_currency,
+            error_type=type(e).__name__
+        ))
+
+
+def wait_for_refreshed_snapshot(base_currency, request_id=None, deadline=None):
+    """Poll the store while another container refreshes; returns None if it does not finish in time."""
+    deadline = deadline or Deadline()
+    wait_until = time.monotonic() + min(get_refresh_wait_seconds(), deadline.remaining())
+    
+    while time.monotonic() < wait_until:
+        time.sleep(REFRESH_POLL_INTERVAL_SECONDS)
+        snapshot = load_snapshot(base_currency, request_id)
+        if snapshot is not None and not snapshot.is_expired(time.time()):
+            logger.info('Rates refreshed by another container', extra=create_log_extra(
+                request_id,
+                from_currency=base_currency,
+                snapshot_version=snapshot.version
+            ))
+            return snapshot
+    
+    logger.warning('Timed out waiting for refresh lease holder', extra=create_log_extra(
         request_id,
-        from_currency=from_currency,
-        to_currency=to_currency
+        from_currency=base_currency
     ))
+    return None
+
+
+def _refresh_rates_with_lease(base_currency, request_id=None, deadline=None):
+    owner = acquire_refresh_lease(base_currency, request_id)
+    
+    if owner is None:
+        snapshot = wait_for_refreshed_snapshot(base_currency, request_id, deadline)
+        if snapshot is not None:
+            cache_snapshot_in_memory(snapshot)
+            return snapshot
+    
+    previous = last_known_good.get(base_currency)
+    validators = previous.validators if previous is not None else None
     
     try:
-        rates = get_latest_rates(from_currency, request_id)
-        
-        if to_currency not in rates:
-            logger.warning('Target currency not found in API response', extra=create_log_extra(
+        rates = rates_circuit.call(get_latest_rates, base_currency, request_id, deadline, validators)
+        return store_provider_rates(base_currency, rates, previous, request_id)
+    finally:
+        if owner is not None:
+            release_refresh_lease(base_currency, owner, request_id)
+
+
+def refresh_rates(base_currency, request_id=None, deadline=None):
+    """Fetch and persist the snapshot for a base, coalescing concurrent refreshes.
+    
+    Threads in this container share one in-flight refresh per base, and a short-lived
+    lease in the rate store lets a single container refresh while the others wait.
+    """
+    return refresh_flights.do(
+        base_currency,
+        lambda: _refresh_rates_with_lease(base_currency, request_id, deadline),
+        deadline
+    )
+
+
+def cache_snapshot_in_memory(snapshot):
+    """Keep the snapshot in memory until the end of its grace window, so stale hits stay local."""
+    known = last_known_good.get(snapshot.base_currency)
+    if known is None or known.fetched_at <= snapshot.fetched_at:
+        last_known_good[snapshot.base_currency] = snapshot
+    
+    if snapshot.expires_at is None:
+        return
+    serve_until = snapshot.expires_at + get_stale_grace_seconds()
+    if serve_until > time.time():
+        rate_cache.set(snapshot.base_currency, snapshot, expires_at=serve_until)
+
+
+def _background_refresh(base_currency, request_id=None):
+    # Bounded by the lease, so requests that join this refresh are never held past it.
+    try:
+        refresh_rates(base_currency, request_id, Deadline(get_refresh_lease_seconds()))
+    except Exception as e:
+        logger.warning('Background rate refresh failed', extra=create_log_extra(
+            request_id,
+            from_currency=base_currency,
+            error_type=type(e).__name__,
+            error=str(e)
+        ))
+
+
+def schedule_background_refresh(base_currency, request_id=None):
+    """Refresh a stale snapshot off the request path.
+    
+    On Lambda the thread is frozen with the container once the response is returned
+    and resumes on its next invocation; the lease keeps that from racing other containers.
+    """
+    if refresh_flights.in_flight(base_currency):
+        return
+    thread = threading.Thread(
+        target=_background_refresh,
+        args=(base_currency, request_id),
+        daemon=True
+    )
+    thread.start()
+
+
+def serve_last_known_good(base_currency, error, request_id=None):
+    """Return the newest snapshot seen for a base, marked stale, or fail fast when there is none."""
+    snapshot = last_known_good.get(base_currency)
+    if snapshot is None:
+        raise ExternalAPIUnavailableError(f'External API unavailable: {error}')
+    
+    logger.warning('External API unavailable, serving last known good rate snapshot', extra=create_log_extra(
+        request_id,
+        from_currency=base_currency,
+        snapshot_version=snapshot.version,
+        circuit_state=rates_circuit.state,
+        error=error
+    ))
+    return snapshot.as_stale()
+
+
+def get_rate_snapshot(base_currency=None, request_id=None, deadline=None):
+    """Return the current snapshot for a base currency, the anchor by default.
+    
+    Looks in the container's memory first, then the rate store, and only then the external API.
+    A refresh that would outlive the deadline falls back to the last known good snapshot.
+    """
+    base_currency = base_currency or ANCHOR_CURRENCY
+    
+    unsupported_reason = negative_cache.get(base_currency)
+    if unsupported_reason is not None:
+        logger.info('Unsupported currency found in negative cache', extra=create_log_extra(
+            request_id,
+            from_currency=base_currency,
+            source='memory'
+        ))
+        raise UnsupportedCurrencyError(unsupported_reason)
+    
+    now = time.time()
+    source = 'memory'
+    snapshot = rate_cache.get(base_currency)
+    if snapshot is None:
+        source = 'cache'
+        snapshot = load_snapshot(base_currency, request_id)
+        if snapshot is not None:
+            cache_snapshot_in_memory(snapshot)
+    
+    if snapshot is not None:
+        if not snapshot.is_expired(now):
+            logger.info(f'Rate snapshot found in {source} cache', extra=create_log_extra(
                 request_id,
-                from_currency=from_currency,
-                to_currency=to_currency,
-                available_currencies=list(rates.keys())[:10] if isinstance(rates, dict) else None
+                from_currency=base_currency,
+                snapshot_version=snapshot.version,
+                source=source,
+                cache_hits=rate_cache.hits,
+                cache_misses=rate_cache.misses
             ))
-            raise ValueError(f'Conversion rate not found for {from_currency} to {to_currency}')
+            return snapshot
         
-        rate = float(rates[to_currency])
+        seconds_stale = snapshot.seconds_past_expiry(now)
+        if seconds_stale is not None and seconds_stale < get_stale_grace_seconds():
+            logger.info('Serving stale rate snapshot while refreshing in background', extra=create_log_extra(
+                request_id,
+                from_currency=base_currency,
+                snapshot_version=snapshot.version,
+                source=source,
+                seconds_stale=int(seconds_stale)
+            ))
+            schedule_background_refresh(base_currency, request_id)
+            return snapshot
         
-        save_rate_to_cache(from_currency, to_currency, rate, request_id)
+        logger.info('Rate snapshot past its grace window, refreshing synchronously', extra=create_log_extra(
+            request_id,
+            from_currency=base_currency,
+            snapshot_version=snapshot.version,
+            seconds_stale=int(seconds_stale) if seconds_stale is not None else None
+        ))
+    else:
+        logger.info('Rate snapshot not found in cache, fetching from external API', extra=create_log_extra(
+            request_id,
+            from_currency=base_currency
+        ))
+    
+    if rates_circuit.is_open():
+        return serve_last_known_good(base_currency, f'circuit {rates_circuit.name} is open', request_id)
+    
+    unsupported_reason = load_unsupported_currency(base_currency, request_id)
+    if unsupported_reason is not None:
+        logger.info('Unsupported currency found in negative cache', extra=create_log_extra(
+            request_id,
+            from_currency=base_currency,
+            source='cache'
+        ))
+        raise UnsupportedCurrencyError(unsupported_reason)
+    
+    try:
+        deadline = deadline or Deadline()
+        deadline.check(f'refreshing rates for {base_currency}')
+        snapshot = refresh_rates(base_currency, request_id, deadline)
         
-        logger.info('Rate fetched from external API and cached', extra=create_log_extra(
+        logger.info('Rate snapshot fetched from external API and cached', extra=create_log_extra(
             request_id,
-            from_currency=from_currency,
-            to_currency=to_currency,
-            rate=rate,
+            from_currency=base_currency,
+            snapshot_version=snapshot.version,
             source='external_api'
         ))
         
-        return rate
-        
-    except ValueError:
+        return snapshot
+    
+    except UnsupportedCurrencyError as unsupported_error:
+        remember_unsupported_currency(base_currency, str(unsupported_error), request_id)
         raise
-    except ConnectionError as conn_error:
-        logger.error('Failed to fetch rate from external API', extra=create_log_extra(
+    except (ValueError, DatabaseError):
+        raise
+    except (ConnectionError, CircuitOpenError, DeadlineExceededError) as conn_error:
+        logger.error('Failed to fetch rates from external API', extra=create_log_extra(
             request_id,
-            from_currency=from_currency,
-            to_currency=to_currency,
+            from_currency=base_currency,
             error=str(conn_error)
         ), exc_info=True)
-        raise ExternalAPIUnavailableError(f'External API unavailable: {str(conn_error)}')
-    except (BotoCoreError, ClientError) as e:
-        handle_database_error(e, request_id, f'while fetching rate for {from_currency} to {to_currency}')
+        return serve_last_known_good(base_currency, str(conn_error), request_id)
     except Exception as e:
-        handle_database_error(e, request_id, f'while fetching rate for {from_currency} to {to_currency}')
+        handle_database_error(e, request_id, f'while fetching rate snapshot for {base_currency}')
+
+
+def get_conversion_quote(from_currency, to_currency, request_id=None, deadline=None):
+    """Derive the pair from the anchor snapshot as rate(to) / rate(from).
+    
+    Returns the rate together with the snapshot it was derived from.
+    """
+    missing_reason = negative_cache.get((from_currency, to_currency))
+    if missing_reason is not None:
+        logger.info('Missing conversion rate found in negative cache', extra=create_log_extra(
+            request_id,
+            from_currency=from_currency,
+            to_currency=to_currency
+        ))
+        raise ValueError(missing_reason)
+    
+    snapshot = get_rate_snapshot(ANCHOR_CURRENCY, request_id, deadline)
+    
+    try:
+        rate = snapshot.rate(from_currency, to_currency)
+    except ValueError as missing_error:
+        negative_cache.set((from_currency, to_currency), str(missing_error))
+        logger.warning('Currency not found in rate snapshot', extra=create_log_extra(
+            request_id,
+            from_currency=from_currency,
+            to_currency=to_currency,
+            anchor_currency=snapshot.base_currency,
+            available_currencies=sorted(snapshot.rates)
+        ))
+        raise
+    
+    logger.info('Conversion rate derived from snapshot', extra=create_log_extra(
+        request_id,
+        from_currency=from_currency,
+        to_currency=to_currency,
+        rate=rate,
+        anchor_currency=snapshot.base_currency,
+        snapshot_version=snapshot.version
+    ))
+    return rate, snapshot
+
+
+def get_conversion_quotes(pairs, request_id=None, deadline=None):
+    """Derive many pairs from a single read of the anchor snapshot, each distinct pair once.
+    
+    Returns ({pair: rate}, {pair: error message}, snapshot) for the (from, to) pairs given.
+    """
+    snapshot = get_rate_snapshot(ANCHOR_CURRENCY, request_id, deadline)
+    rates = {}
+    missing = {}
+    
+    for pair in dict.fromkeys(pairs):
+        reason = negative_cache.get(pair)
+        if reason is None:
+            try:
+                rates[pair] = snapshot.rate(*pair)
+                continue
+            except ValueError as missing_error:
+                reason = str(missing_error)
+                negative_cache.set(pair, reason)
+        missing[pair] = reason
+    
+    logger.info('Conversion rates derived from snapshot', extra=create_log_extra(
+        request_id,
+        pairs_count=len(rates) + len(missing),
+        missing_pairs=[f'{from_currency}/{to_currency}' for from_currency, to_currency in missing],
+        anchor_currency=snapshot.base_currency,
+        snapshot_version=snapshot.version
+    ))
+    return rates, missing, snapshot
 
 
+def get_conversion_rate(from_currency, to_currency, request_id=None, deadline=None):
+    rate, _ = get_conversion_quote(from_currency, to_currency, request_id, deadline)
+    return rate
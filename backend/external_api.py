@@ -1,9 +1,20 @@
 import os
+import json
+import math
+import time
 import requests
 import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from requests.adapters import HTTPAdapter
 from exceptions import ConfigurationError
+from constants import VALID_CURRENCIES
+from rate_providers import create_providers, ExchangeRateApiProvider
 from utils.logging_helpers import create_log_extra
 from utils.config_validator import is_production
+from utils.circuit_breaker import CircuitBreaker
+from utils.latency_tracker import LatencyTracker
+from utils.deadline import Deadline
+from utils.retry import retry_with_backoff
 
 logger = logging.getLogger()
 
@@ -23,80 +34,386 @@ def get_request_timeout():
         return 5
     return int(timeout_str)
 
+def _get_number_setting(name, default, cast=float):
+    value_str = os.environ.get(name)
+    if not value_str:
+        return default
+    try:
+        return cast(value_str)
+    except (ValueError, TypeError):
+        logger.warning(f'Invalid {name} value: {value_str}, using default {default}')
+        return default
+
+
+def create_circuit_breaker():
+    """Build the breaker guarding the provider; only connection failures, malformed bodies and slow calls trip it."""
+    return CircuitBreaker(
+        'external_rates_api',
+        failure_rate_threshold=_get_number_setting('CIRCUIT_FAILURE_RATE_THRESHOLD', 0.5),
+        slow_call_seconds=_get_number_setting('CIRCUIT_SLOW_CALL_SECONDS', 2.0),
+        minimum_calls=_get_number_setting('CIRCUIT_MINIMUM_CALLS', 5, int),
+        window_size=_get_number_setting('CIRCUIT_WINDOW_SIZE', 20, int),
+        open_seconds=_get_number_setting('CIRCUIT_OPEN_SECONDS', 30.0),
+        half_open_max_calls=_get_number_setting('CIRCUIT_HALF_OPEN_CALLS', 1, int),
+        failure_exceptions=(ConnectionError,)
+    )
+
+
+def get_connect_timeout(request_timeout):
+    """Connect timeout in seconds; kept short so an unreachable provider fails fast."""
+    return _get_number_setting('EXTERNAL_API_CONNECT_TIMEOUT', min(3.05, request_timeout))
+
+
+def get_read_timeout(request_timeout):
+    return _get_number_setting('EXTERNAL_API_READ_TIMEOUT', float(request_timeout))
+
+
+def is_gzip_enabled():
+    return os.environ.get('EXTERNAL_API_GZIP', 'true').strip().lower() in ('true', '1', 'yes')
+
+
+def create_http_session():
+    """Build the keep-alive session shared by every warm invocation of the container."""
+    pool_size = _get_number_setting('EXTERNAL_API_POOL_SIZE', 10, int)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+    
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({
+        'Accept': 'application/json',
+        'Connection': 'keep-alive',
+        'Accept-Encoding': 'gzip, deflate' if is_gzip_enabled() else 'identity'
+    })
+    return session
+
+
+def get_rate_providers(primary_url):
+    """Providers from RATE_PROVIDERS ('kind[=url],...', first is primary); defaults to EXCHANGE_RATE_API_URL."""
+    providers = create_providers(os.environ.get('RATE_PROVIDERS'), primary_url)
+    if not providers:
+        return [ExchangeRateApiProvider(primary_url)]
+    return providers
+
+
 API_BASE_URL = get_api_base_url()
 REQUEST_TIMEOUT = get_request_timeout()
+CONNECT_TIMEOUT = get_connect_timeout(REQUEST_TIMEOUT)
+READ_TIMEOUT = get_read_timeout(REQUEST_TIMEOUT)
+RATE_PROVIDERS = get_rate_providers(API_BASE_URL)
+HEDGE_PERCENTILE = _get_number_setting('HEDGE_PERCENTILE', 95.0)
+HEDGE_DELAY_SECONDS = _get_number_setting('HEDGE_DELAY_SECONDS', 0.5)
+HEDGE_MIN_DELAY_SECONDS = _get_number_setting('HEDGE_MIN_DELAY_SECONDS', 0.05)
+HEDGE_MIN_SAMPLES = _get_number_setting('HEDGE_MIN_SAMPLES', 20, int)
+RETRY_MAX_ATTEMPTS = _get_number_setting('EXTERNAL_API_MAX_ATTEMPTS', 3, int)
+RETRY_BASE_DELAY_SECONDS = _get_number_setting('EXTERNAL_API_RETRY_BASE_DELAY', 0.1)
+RETRY_MAX_DELAY_SECONDS = _get_number_setting('EXTERNAL_API_RETRY_MAX_DELAY', 1.0)
+MIN_ATTEMPT_SECONDS = _get_number_setting('EXTERNAL_API_MIN_ATTEMPT_SECONDS', 0.5)
+rates_circuit = create_circuit_breaker()
+http_session = create_http_session()
+primary_latency = LatencyTracker(_get_number_setting('HEDGE_WINDOW_SIZE', 100, int))
+hedge_executor = ThreadPoolExecutor(max_workers=2 * len(RATE_PROVIDERS), thread_name_prefix='rates-hedge')
+
+
+class InvalidRatesPayloadError(ConnectionError):
+    """A provider body that cannot be read as rates; handled like an outage, not a bad request."""
+
+
+class UnsupportedCurrencyError(ValueError):
+    pass
+
+
+class ProviderRates(dict):
+    """Rates from one provider response, with the validators for the next conditional request.
+    
+    not_modified is set when the provider confirmed the caller's copy is current; the
+    dict is then empty.
+    """
+    
+    def __init__(self, rates=None, validators=None, not_modified=False):
+        super().__init__(rates or {})
+        self.validators = validators
+        self.not_modified = not_modified
+
+
+def decode_rates_payload(content):
+    """Decode a provider body keeping numbers as text, so only the rates we keep become floats."""
+    return json.loads(content, parse_float=str, parse_int=str)
+
+
+def select_supported_rates(rates):
+    return {currency: float(rate) for currency, rate in rates.items() if currency in VALID_CURRENCIES}
+
 
+def _connections_opened(url):
+    """Connections opened so far by the adapter serving url, or None if unavailable."""
+    try:
+        pools = http_session.get_adapter(url).poolmanager.pools
+        return sum(pools[key].num_connections for key in pools.keys())
+    except (AttributeError, KeyError, requests.exceptions.InvalidSchema):
+        return None
+
+
+def _is_same_publication(validators, new_validators):
+    """True when the body carries the same provider publication marker we stored last time."""
+    if not validators or validators.get('provider') != new_validators.get('provider'):
+        return False
+    body_version = new_validators.get('body_version')
+    return body_version is not None and body_version == validators.get('body_version')
 
-def get_latest_rates(base_currency, request_id=None):
+
+def fetch_provider_rates(provider, base_currency, request_id=None, deadline=None, validators=None):
+    """Fetch one provider's rates for a base, conditionally when validators from it are given."""
+    url = provider.build_url(base_currency)
+    deadline = deadline or Deadline()
+    request_options = {
+        'timeout': (
+            deadline.bound(CONNECT_TIMEOUT, f'fetching rates from {provider.name}'),
+            deadline.bound(READ_TIMEOUT, f'fetching rates from {provider.name}')
+        )
+    }
+    conditional_headers = provider.conditional_headers(validators)
+    if conditional_headers:
+        request_options['headers'] = conditional_headers
+    
     logger.info('Fetching rates from external API', extra=create_log_extra(
         request_id,
         base_currency=base_currency,
-        api_url=f'{API_BASE_URL}/{base_currency}'
+        provider=provider.name,
+        api_url=url
     ))
     
     try:
-        response = requests.get(
-            f'{API_BASE_URL}/{base_currency}',
-            timeout=REQUEST_TIMEOUT
-        )
+        connections_before = _connections_opened(url)
+        response = http_session.get(url, **request_options)
+        connections_after = _connections_opened(url)
+        
+        logger.info('External API response received', extra=create_log_extra(
+            request_id,
+            base_currency=base_currency,
+            provider=provider.name,
+            status_code=response.status_code,
+            elapsed_ms=round(response.elapsed.total_seconds() * 1000, 1) if response.elapsed else None,
+            connection_reused=connections_before == connections_after if connections_before is not None else None,
+            connections_opened=connections_after,
+            content_encoding=response.headers.get('Content-Encoding')
+        ))
+        
+        if response.status_code == 304:
+            logger.info('Rates not modified since last fetch', extra=create_log_extra(
+                request_id,
+                base_currency=base_currency,
+                provider=provider.name
+            ))
+            return ProviderRates(
+                validators={**(validators or {}), **provider.validators_from(response.headers)},
+                not_modified=True
+            )
+        
         response.raise_for_status()
         
-        data = response.json()
+        try:
+            data = decode_rates_payload(response.content)
+        except ValueError:
+            logger.warning('Malformed response body from external API', extra=create_log_extra(
+                request_id,
+                base_currency=base_currency,
+                provider=provider.name
+            ))
+            raise InvalidRatesPayloadError(f'Invalid response format from external API for {base_currency}')
+        
+        if provider.is_unsupported(response.status_code, data):
+            raise UnsupportedCurrencyError(f'Currency {base_currency} not supported by external API')
+        
+        new_validators = provider.validators_from(response.headers, data)
+        if _is_same_publication(validators, new_validators):
+            logger.info('Rates unchanged since last fetch', extra=create_log_extra(
+                request_id,
+                base_currency=base_currency,
+                provider=provider.name,
+                body_version=new_validators['body_version']
+            ))
+            return ProviderRates(validators={**validators, **new_validators}, not_modified=True)
         
-        if 'rates' not in data:
+        try:
+            rates = select_supported_rates(provider.parse_rates(data, base_currency))
+        except ValueError:
             logger.warning('Invalid response format from external API', extra=create_log_extra(
                 request_id,
                 base_currency=base_currency,
+                provider=provider.name,
                 response_keys=list(data.keys()) if isinstance(data, dict) else None
             ))
-            raise ValueError(f'Invalid response format from external API for {base_currency}')
-        
-        rates = data['rates']
+            raise InvalidRatesPayloadError(f'Invalid response format from external API for {base_currency}')
         
         logger.info('Successfully fetched rates from external API', extra=create_log_extra(
             request_id,
             base_currency=base_currency,
-            rates_count=len(rates) if isinstance(rates, dict) else 0
+            provider=provider.name,
+            rates_count=len(rates)
         ))
         
-        return rates
-        
+        return ProviderRates(rates, new_validators)
+    
     except requests.exceptions.Timeout:
         logger.error('Timeout while fetching rates from external API', extra=create_log_extra(
             request_id,
             base_currency=base_currency,
-            timeout_seconds=REQUEST_TIMEOUT
+            provider=provider.name,
+            connect_timeout_seconds=request_options['timeout'][0],
+            read_timeout_seconds=request_options['timeout'][1]
         ), exc_info=True)
         raise ConnectionError(f'Timeout while fetching rates for {base_currency}')
-        
+    
     except requests.exceptions.HTTPError as http_error:
-        status_code = http_error.response.status_code if http_error.response else None
+        status_code = http_error.response.status_code if http_error.response is not None else None
         logger.error('HTTP error while fetching rates from external API', extra=create_log_extra(
             request_id,
             base_currency=base_currency,
+            provider=provider.name,
             status_code=status_code
         ), exc_info=True)
         
-        if status_code == 404:
-            raise ValueError(f'Currency {base_currency} not supported by external API')
+        if provider.is_unsupported(status_code):
+            raise UnsupportedCurrencyError(f'Currency {base_currency} not supported by external API')
         else:
             raise ConnectionError(f'HTTP error {status_code} while fetching rates for {base_currency}')
-            
+    
     except requests.exceptions.RequestException as req_error:
         logger.error('Request error while fetching rates from external API', extra=create_log_extra(
             request_id,
             base_currency=base_currency,
+            provider=provider.name,
             error_type=type(req_error).__name__
         ), exc_info=True)
         raise ConnectionError(f'Failed to fetch rates for {base_currency}: {str(req_error)}')
-        
-    except ValueError:
+    
+    except (ValueError, InvalidRatesPayloadError):
         raise
     except Exception as e:
         logger.error('Unexpected error while fetching rates from external API', extra=create_log_extra(
             request_id,
             base_currency=base_currency,
+            provider=provider.name,
             error_type=type(e).__name__
         ), exc_info=True)
         raise ConnectionError(f'Unexpected error while fetching rates for {base_currency}')
 
+
+
+def get_hedge_delay():
+    """Seconds to wait on the primary before hedging: its HEDGE_PERCENTILE latency once warmed up."""
+    if len(primary_latency) < HEDGE_MIN_SAMPLES:
+        return HEDGE_DELAY_SECONDS
+    return min(max(primary_latency.percentile(HEDGE_PERCENTILE), HEDGE_MIN_DELAY_SECONDS), READ_TIMEOUT)
+
+
+def _fetch_primary_rates(provider, base_currency, request_id=None, deadline=None, validators=None):
+    started_at = time.monotonic()
+    rates = fetch_provider_rates(provider, base_currency, request_id, deadline, validators)
+    primary_latency.record(time.monotonic() - started_at)
+    return rates
+
+
+def _raise_all_providers_failed(base_currency, errors, request_id=None):
+    logger.error('All rate providers failed', extra=create_log_extra(
+        request_id,
+        base_currency=base_currency,
+        errors=[str(error) for error in errors]
+    ))
+    if errors and all(isinstance(error, UnsupportedCurrencyError) for error in errors):
+        raise errors[0]
+    raise ConnectionError(f'Failed to fetch rates for {base_currency} from all providers')
+
+
+def _fetch_hedged_rates(base_currency, request_id=None, deadline=None, validators=None):
+    """Ask the primary; if it has not answered within the hedge delay, or fails, ask the next
+    provider too. The first valid response wins; slower requests are left to finish unused."""
+    deadline = deadline or Deadline()
+    waiting = list(RATE_PROVIDERS[1:])
+    pending = {
+        hedge_executor.submit(
+            _fetch_primary_rates, RATE_PROVIDERS[0], base_currency, request_id, deadline, validators
+        ): RATE_PROVIDERS[0]
+    }
+    errors = []
+    hedge_delay = get_hedge_delay()
+    hedge_at = time.monotonic() + hedge_delay
+    
+    while pending:
+        timeout = min(max(0.0, hedge_at - time.monotonic()) if waiting else math.inf, deadline.remaining())
+        done, _ = wait(pending, timeout=None if timeout == math.inf else timeout, return_when=FIRST_COMPLETED)
+        if not done:
+            deadline.check(f'rates for {base_currency} arrived')
+        
+        for future in done:
+            provider = pending.pop(future)
+            try:
+                rates = future.result()
+            except (ValueError, ConnectionError) as e:
+                errors.append(e)
+                continue
+            
+            if provider is not RATE_PROVIDERS[0]:
+                logger.info('Hedged rates request won', extra=create_log_extra(
+                    request_id,
+                    base_currency=base_currency,
+                    provider=provider.name,
+                    hedge_delay_ms=round(hedge_delay * 1000, 1)
+                ))
+            return rates
+        
+        if waiting and (not done or not pending):
+            provider = waiting.pop(0)
+            logger.info('Hedging rates request', extra=create_log_extra(
+                request_id,
+                base_currency=base_currency,
+                provider=provider.name,
+                reason='slow' if not done else 'failed',
+                hedge_delay_ms=round(hedge_delay * 1000, 1)
+            ))
+            pending[hedge_executor.submit(
+                fetch_provider_rates, provider, base_currency, request_id, deadline, validators
+            )] = provider
+            hedge_at = time.monotonic() + hedge_delay
+    
+    _raise_all_providers_failed(base_currency, errors, request_id)
+
+
+def get_latest_rates(base_currency, request_id=None, deadline=None, validators=None):
+    """Fetch the base's rates, retrying connection failures with jittered backoff.
+    
+    Returns ProviderRates holding only VALID_CURRENCIES. With validators from an earlier
+    response the request is conditional, and a provider that has nothing new answers
+    with not_modified set instead of a body.
+    
+    Every attempt's timeouts are cut to the deadline, and no retry is started unless the
+    deadline leaves room for the backoff sleep plus MIN_ATTEMPT_SECONDS.
+    """
+    deadline = deadline or Deadline()
+    
+    def attempt():
+        if len(RATE_PROVIDERS) == 1:
+            return fetch_provider_rates(RATE_PROVIDERS[0], base_currency, request_id, deadline, validators)
+        return _fetch_hedged_rates(base_currency, request_id, deadline, validators)
+    
+    def log_retry(attempt_number, delay, error):
+        logger.warning('Retrying rates request after failure', extra=create_log_extra(
+            request_id,
+            base_currency=base_currency,
+            attempt=attempt_number,
+            backoff_ms=round(delay * 1000, 1),
+            remaining_ms=round(deadline.remaining() * 1000) if deadline.is_bounded else None,
+            error=str(error)
+        ))
+    
+    return retry_with_backoff(
+        attempt,
+        deadline,
+        max_attempts=RETRY_MAX_ATTEMPTS,
+        base_delay=RETRY_BASE_DELAY_SECONDS,
+        max_delay=RETRY_MAX_DELAY_SECONDS,
+        retry_on=(ConnectionError,),
+        min_attempt_seconds=MIN_ATTEMPT_SECONDS,
+        on_retry=log_retry
+    )
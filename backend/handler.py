@@ -1,22 +1,60 @@
+import io
+import csv
+import time
+import base64
 import logging
+import binascii
 from datetime import datetime
-from request_parser import parse_request_body, extract_request_data, RequestParsingError
-from validators import validate_conversion_request, ValidationError
-from database import get_conversion_rate, ExternalAPIUnavailableError, DatabaseError
-from converters import calculate_conversion
-from responses import create_response
-from auth import verify_credentials
-from jwt_config import generate_token, UnauthorizedError
+from request_parser import (
+    parse_request_body,
+    extract_request_data,
+    extract_batch_items,
+    extract_history_query,
+    RequestParsingError
+)
+from validators import (
+    validate_conversion_request,
+    validate_conversion,
+    validate_batch_size,
+    validate_fan_out_request,
+    validate_history_request,
+    ValidationError
+)
+from database import (
+    get_conversion_quote,
+    get_conversion_quotes,
+    get_prefetch_currencies,
+    prefetch_snapshots,
+    ExternalAPIUnavailableError,
+    DatabaseError
+)
+from converters import calculate_conversion, calculate_conversions
+from rate_history import (
+    get_pair_rate_at,
+    get_pair_history,
+    get_history_page_size,
+    get_history_max_page_size,
+    to_iso
+)
+from responses import create_response, create_text_response
+from bulk_converter import convert_stream, FORMATS as BULK_FORMATS
+from auth import verify_credentials, issue_refresh_token, redeem_refresh_token
+from jwt_config import generate_token, get_jwks, UnauthorizedError
 from middleware import require_auth
+from quotas import QuotaExceededError
+from login_guard import login_guard, LoginLockedError
+from constants import VALID_CURRENCIES
 from exceptions import ConfigurationError, AuthenticationError
 from utils.request_helpers import extract_request_context, handle_cors_preflight
 from utils.error_handlers import (
     handle_unexpected_error,
     handle_configuration_error,
-    handle_unauthorized_error
+    handle_unauthorized_error,
+    handle_quota_exceeded_error
 )
 from utils.logging_helpers import create_log_extra
 from utils.user_helpers import get_user_info
+from utils.deadline import Deadline, DeadlineExceededError
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
@@ -35,10 +73,23 @@ def get_service_name():
     return name
 
 
+def get_deadline_reserve_seconds():
+    """Time kept back from the Lambda budget to log and build the error response."""
+    import os
+    
+    reserve_str = os.environ.get('DEADLINE_RESERVE_MS', '500')
+    try:
+        return int(reserve_str) / 1000
+    except (ValueError, TypeError):
+        logger.warning(f'Invalid DEADLINE_RESERVE_MS value: {reserve_str}, using default 500')
+        return 0.5
+
+
 def login(event, context):
     ctx = extract_request_context(event, context)
     request_id = ctx['request_id']
     request_origin = ctx['origin']
+    source_ip = ctx['source_ip']
     
     cors_response = handle_cors_preflight(event, request_id, 'login')
     if cors_response:
@@ -54,27 +105,43 @@ def login(event, context):
             return create_response(400, {'error': 'Username and password are required'}, request_origin)
         
         try:
+            # Locked-out usernames and IPs are turned away before any password hashing.
+            login_guard.check(username, source_ip, request_id)
             user = verify_credentials(username, password, request_id)
+        except LoginLockedError as locked_error:
+            return handle_quota_exceeded_error(locked_error, request_id, request_origin)
         except AuthenticationError as auth_error:
+            login_guard.record_failure(username, source_ip, request_id)
             logger.warning('Authentication failed', extra=create_log_extra(request_id, username=username, error=str(auth_error)))
             return create_response(401, {'error': str(auth_error)}, request_origin)
         except DatabaseError as db_error:
             logger.error('Database error during login', extra=create_log_extra(request_id, username=username, error=str(db_error)), exc_info=True)
             return create_response(500, {'error': 'Database error occurred'}, request_origin)
         
+        login_guard.record_success(username, request_id)
+        
         try:
             token = generate_token(user.get('user_id'), user.get('username'))
         except (ValueError, TypeError) as config_error:
             return handle_configuration_error(config_error, request_id, request_origin)
         
+        try:
+            refresh_token = issue_refresh_token(user, request_id)
+        except DatabaseError:
+            # The access token is still good; without a refresh token the client logs in again when it expires.
+            refresh_token = None
+        
         user_info = get_user_info(user)
         logger.info('Login successful', extra=create_log_extra(request_id, username=username, user_id=user_info['user_id']))
         
-        return create_response(200, {
+        response_body = {
             'token': token,
             'user': user_info
-        }, request_origin)
-        
+        }
+        if refresh_token:
+            response_body['refresh_token'] = refresh_token
+        return create_response(200, response_body, request_origin)
+    
     except RequestParsingError as parse_error:
         logger.warning('Request parsing error in login', extra=create_log_extra(request_id, error=str(parse_error)))
         return create_response(400, {'error': str(parse_error)}, request_origin)
@@ -89,6 +156,76 @@ def login(event, context):
         return handle_unexpected_error(e, request_id, 'during login', request_origin)
 
 
+def refresh(event, context):
+    ctx = extract_request_context(event, context)
+    request_id = ctx['request_id']
+    request_origin = ctx['origin']
+    
+    cors_response = handle_cors_preflight(event, request_id, 'refresh')
+    if cors_response:
+        return cors_response
+    
+    try:
+        body = parse_request_body(event)
+        refresh_token = body.get('refresh_token')
+        
+        if not refresh_token:
+            logger.warning('Missing refresh token in refresh request', extra=create_log_extra(request_id))
+            return create_response(400, {'error': 'refresh_token is required'}, request_origin)
+        
+        try:
+            user = redeem_refresh_token(refresh_token, request_id)
+            new_refresh_token = issue_refresh_token(user, request_id)
+        except AuthenticationError as auth_error:
+            return create_response(401, {'error': str(auth_error)}, request_origin)
+        except DatabaseError as db_error:
+            logger.error('Database error during token refresh', extra=create_log_extra(request_id, error=str(db_error)), exc_info=True)
+            return create_response(500, {'error': 'Database error occurred'}, request_origin)
+        
+        try:
+            token = generate_token(user.get('user_id'), user.get('username'))
+        except (ValueError, TypeError) as config_error:
+            return handle_configuration_error(config_error, request_id, request_origin)
+        
+        user_info = get_user_info(user)
+        logger.info('Token refreshed', extra=create_log_extra(request_id, **user_info))
+        
+        return create_response(200, {
+            'token': token,
+            'refresh_token': new_refresh_token,
+            'user': user_info
+        }, request_origin)
+    
+    except RequestParsingError as parse_error:
+        logger.warning('Request parsing error in refresh', extra=create_log_extra(request_id, error=str(parse_error)))
+        return create_response(400, {'error': str(parse_error)}, request_origin)
+    except (KeyError, AttributeError, TypeError) as e:
+        logger.error('Error accessing request data in refresh', extra=create_log_extra(
+            request_id,
+            error_type=type(e).__name__,
+            error=str(e)
+        ), exc_info=True)
+        return handle_unexpected_error(e, request_id, 'during token refresh', request_origin)
+    except Exception as e:
+        return handle_unexpected_error(e, request_id, 'during token refresh', request_origin)
+
+
+def jwks(event, context):
+    """Public keys other services use to verify our tokens; empty while tokens are HMAC-signed."""
+    ctx = extract_request_context(event, context)
+    request_id = ctx['request_id']
+    request_origin = ctx['origin']
+    
+    cors_response = handle_cors_preflight(event, request_id, 'jwks')
+    if cors_response:
+        return cors_response
+    
+    try:
+        return create_response(200, get_jwks(), request_origin)
+    except Exception as e:
+        return handle_unexpected_error(e, request_id, 'while serving JWKS', request_origin)
+
+
 def health(event, context):
     ctx = extract_request_context(event, context)
     request_id = ctx['request_id']
@@ -113,7 +250,9 @@ def health(event, context):
             'timestamp': datetime.utcnow().isoformat(),
             'service': get_service_name()
         }, request_origin)
-        
+    
+    except QuotaExceededError as quota_error:
+        return handle_quota_exceeded_error(quota_error, request_id, request_origin)
     except UnauthorizedError as auth_error:
         return handle_unauthorized_error(auth_error, request_id, request_origin)
     except (ValueError, TypeError, KeyError) as config_error:
@@ -138,12 +277,16 @@ def convert(event, context):
     if cors_response:
         return cors_response
     
+    deadline = Deadline.from_context(context, get_deadline_reserve_seconds())
+    
     try:
         user_payload = require_auth(event, context)
         user_info = get_user_info(user_payload)
         
         logger.info('Conversion request received', extra=create_log_extra(request_id, **user_info))
-        
+    
+    except QuotaExceededError as quota_error:
+        return handle_quota_exceeded_error(quota_error, request_id, request_origin)
     except UnauthorizedError as auth_error:
         return handle_unauthorized_error(auth_error, request_id, request_origin)
     except (ValueError, TypeError, KeyError) as config_error:
@@ -171,8 +314,9 @@ def convert(event, context):
             return create_response(400, {'error': str(validation_error)}, request_origin)
         
         try:
-            rate = get_conversion_rate(from_currency, to_currency, request_id)
+            rate, snapshot = get_conversion_quote(from_currency, to_currency, request_id, deadline)
             converted_amount = calculate_conversion(amount_float, rate)
+            stale = snapshot.is_stale(time.time())
             
             logger.info('Conversion successful', extra=create_log_extra(
                 request_id,
@@ -181,7 +325,8 @@ def convert(event, context):
                 from_currency=from_currency,
                 to_currency=to_currency,
                 rate=rate,
-                converted_amount=converted_amount
+                converted_amount=converted_amount,
+                stale=stale
             ))
             
             return create_response(200, {
@@ -189,14 +334,16 @@ def convert(event, context):
                 'from': from_currency,
                 'to': to_currency,
                 'rate': rate,
-                'converted_amount': converted_amount
+                'converted_amount': converted_amount,
+                'stale': stale
             }, request_origin)
-            
-        except ExternalAPIUnavailableError as api_error:
+        
+        except (ExternalAPIUnavailableError, DeadlineExceededError) as api_error:
             logger.error('External API unavailable', extra=create_log_extra(
                 request_id,
                 from_currency=from_currency,
                 to_currency=to_currency,
+                remaining_ms=round(deadline.remaining() * 1000) if deadline.is_bounded else None,
                 error=str(api_error)
             ))
             return create_response(503, {'error': 'External currency API is currently unavailable'}, request_origin)
@@ -229,3 +376,439 @@ def convert(event, context):
         return handle_unexpected_error(e, request_id, 'during conversion', request_origin)
     except Exception as e:
         return handle_unexpected_error(e, request_id, 'during conversion', request_origin)
+
+
+def convert_all(event, context):
+    """Convert one amount into every other supported currency, all from the same snapshot version."""
+    ctx = extract_request_context(event, context)
+    request_id = ctx['request_id']
+    request_origin = ctx['origin']
+    
+    cors_response = handle_cors_preflight(event, request_id, 'convert_all')
+    if cors_response:
+        return cors_response
+    
+    deadline = Deadline.from_context(context, get_deadline_reserve_seconds())
+    
+    try:
+        user_payload = require_auth(event, context)
+        user_info = get_user_info(user_payload)
+    except QuotaExceededError as quota_error:
+        return handle_quota_exceeded_error(quota_error, request_id, request_origin)
+    except UnauthorizedError as auth_error:
+        return handle_unauthorized_error(auth_error, request_id, request_origin)
+    except (ValueError, TypeError, KeyError) as config_error:
+        return handle_configuration_error(config_error, request_id, request_origin)
+    except Exception as e:
+        return handle_unexpected_error(e, request_id, 'during authentication', request_origin)
+    
+    try:
+        body = parse_request_body(event)
+        amount, from_currency, _ = extract_request_data(body)
+        
+        try:
+            amount_float = validate_fan_out_request(amount, from_currency, request_id)
+        except ValidationError as validation_error:
+            logger.warning('Validation error in fan-out conversion request', extra=create_log_extra(request_id, error=str(validation_error)))
+            return create_response(400, {'error': str(validation_error)}, request_origin)
+        
+        targets = sorted(VALID_CURRENCIES - {from_currency})
+        
+        try:
+            rates, missing, snapshot = get_conversion_quotes(
+                [(from_currency, to_currency) for to_currency in targets], request_id, deadline
+            )
+        except (ExternalAPIUnavailableError, DeadlineExceededError) as api_error:
+            logger.error('External API unavailable', extra=create_log_extra(
+                request_id,
+                from_currency=from_currency,
+                remaining_ms=round(deadline.remaining() * 1000) if deadline.is_bounded else None,
+                error=str(api_error)
+            ))
+            return create_response(503, {'error': 'External currency API is currently unavailable'}, request_origin)
+        except ValueError as e:
+            return create_response(404, {'error': str(e)}, request_origin)
+        
+        available = [to_currency for to_currency in targets if (from_currency, to_currency) in rates]
+        available_rates = [rates[(from_currency, to_currency)] for to_currency in available]
+        converted_amounts = calculate_conversions([amount_float] * len(available), available_rates)
+        stale = snapshot.is_stale(time.time())
+        
+        logger.info('Fan-out conversion successful', extra=create_log_extra(
+            request_id,
+            **user_info,
+            amount=amount_float,
+            from_currency=from_currency,
+            currencies_count=len(available),
+            snapshot_version=snapshot.version,
+            stale=stale
+        ))
+        
+        return create_response(200, {
+            'amount': amount_float,
+            'from': from_currency,
+            'conversions': [
+                {'to': to_currency, 'rate': rate, 'converted_amount': converted_amount}
+                for to_currency, rate, converted_amount in zip(available, available_rates, converted_amounts)
+            ],
+            'unavailable': [to_currency for to_currency in targets if (from_currency, to_currency) in missing],
+            'snapshot_version': snapshot.version,
+            'stale': stale
+        }, request_origin)
+    
+    except RequestParsingError as parse_error:
+        logger.warning('Request parsing error in fan-out conversion', extra=create_log_extra(request_id, error=str(parse_error)))
+        return create_response(400, {'error': str(parse_error)}, request_origin)
+    except DatabaseError as db_error:
+        logger.error('Database error during fan-out conversion', extra=create_log_extra(
+            request_id,
+            from_currency=from_currency,
+            error=str(db_error)
+        ), exc_info=True)
+        return create_response(500, {'error': 'Database error occurred'}, request_origin)
+    except Exception as e:
+        return handle_unexpected_error(e, request_id, 'during fan-out conversion', request_origin)
+
+
+def _validate_batch_item(item, request_id):
+    """Return (amount, (from, to)) for a valid batch item, or the error result for it."""
+    if not isinstance(item, dict):
+        return None, {'status': 400, 'error': 'Each item must be an object with amount, from and to.'}
+    
+    try:
+        amount, from_currency, to_currency = extract_request_data(item)
+        amount_float = validate_conversion(amount, from_currency, to_currency, request_id)
+    except AttributeError:
+        return None, {'status': 400, 'error': 'Currencies must be strings.'}
+    except ValidationError as validation_error:
+        return None, {'status': 400, 'error': str(validation_error)}
+    
+    return amount_float, (from_currency, to_currency)
+
+
+def convert_batch(event, context):
+    """Convert many {amount, from, to} items with one authentication and one snapshot read.
+    
+    Results keep the order of the request items; each carries its own status.
+    """
+    ctx = extract_request_context(event, context)
+    request_id = ctx['request_id']
+    request_origin = ctx['origin']
+    
+    cors_response = handle_cors_preflight(event, request_id, 'convert_batch')
+    if cors_response:
+        return cors_response
+    
+    deadline = Deadline.from_context(context, get_deadline_reserve_seconds())
+    
+    try:
+        user_payload = require_auth(event, context)
+        user_info = get_user_info(user_payload)
+    except QuotaExceededError as quota_error:
+        return handle_quota_exceeded_error(quota_error, request_id, request_origin)
+    except UnauthorizedError as auth_error:
+        return handle_unauthorized_error(auth_error, request_id, request_origin)
+    except (ValueError, TypeError, KeyError) as config_error:
+        return handle_configuration_error(config_error, request_id, request_origin)
+    except Exception as e:
+        return handle_unexpected_error(e, request_id, 'during authentication', request_origin)
+    
+    try:
+        items = extract_batch_items(parse_request_body(event))
+        
+        try:
+            validate_batch_size(len(items), request_id)
+        except ValidationError as validation_error:
+            logger.warning('Validation error in batch conversion request', extra=create_log_extra(request_id, error=str(validation_error)))
+            return create_response(400, {'error': str(validation_error)}, request_origin)
+        
+        logger.info('Batch conversion request received', extra=create_log_extra(
+            request_id,
+            **user_info,
+            items_count=len(items)
+        ))
+        
+        results = [None] * len(items)
+        pending = []
+        for index, item in enumerate(items):
+            amount, pair = _validate_batch_item(item, request_id)
+            if amount is None:
+                results[index] = pair
+            else:
+                pending.append((index, amount, pair))
+        
+        stale = False
+        if pending:
+            try:
+                rates, missing, snapshot = get_conversion_quotes(
+                    [pair for _, _, pair in pending], request_id, deadline
+                )
+            except (ExternalAPIUnavailableError, DeadlineExceededError) as api_error:
+                logger.error('External API unavailable', extra=create_log_extra(
+                    request_id,
+                    items_count=len(items),
+                    remaining_ms=round(deadline.remaining() * 1000) if deadline.is_bounded else None,
+                    error=str(api_error)
+                ))
+                return create_response(503, {'error': 'External currency API is currently unavailable'}, request_origin)
+            except ValueError as e:
+                return create_response(404, {'error': str(e)}, request_origin)
+            
+            stale = snapshot.is_stale(time.time())
+            found = [(index, amount, pair) for index, amount, pair in pending if pair in rates]
+            converted_amounts = calculate_conversions(
+                [amount for _, amount, _ in found],
+                [rates[pair] for _, _, pair in found]
+            )
+            
+            for (index, amount, (from_currency, to_currency)), converted_amount in zip(found, converted_amounts):
+                results[index] = {
+                    'status': 200,
+                    'amount': amount,
+                    'from': from_currency,
+                    'to': to_currency,
+                    'rate': rates[(from_currency, to_currency)],
+                    'converted_amount': converted_amount
+                }
+            for index, _, pair in pending:
+                if pair in missing:
+                    results[index] = {'status': 404, 'error': missing[pair]}
+        
+        succeeded = sum(1 for result in results if result['status'] == 200)
+        
+        logger.info('Batch conversion completed', extra=create_log_extra(
+            request_id,
+            **user_info,
+            items_count=len(items),
+            pairs_count=len({pair for _, _, pair in pending}),
+            succeeded=succeeded,
+            failed=len(items) - succeeded,
+            stale=stale
+        ))
+        
+        return create_response(200, {
+            'results': results,
+            'succeeded': succeeded,
+            'failed': len(items) - succeeded,
+            'stale': stale
+        }, request_origin)
+    
+    except RequestParsingError as parse_error:
+        logger.warning('Request parsing error in batch conversion', extra=create_log_extra(request_id, error=str(parse_error)))
+        return create_response(400, {'error': str(parse_error)}, request_origin)
+    except DatabaseError as db_error:
+        logger.error('Database error during batch conversion', extra=create_log_extra(
+            request_id,
+            error=str(db_error)
+        ), exc_info=True)
+        return create_response(500, {'error': 'Database error occurred'}, request_origin)
+    except Exception as e:
+        return handle_unexpected_error(e, request_id, 'during batch conversion', request_origin)
+
+
+BULK_CONTENT_TYPES = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+
+def get_bulk_format(event):
+    """Input format from ?format=, else from the Content-Type header; NDJSON by default."""
+    params = event.get('queryStringParameters') or {}
+    if params.get('format'):
+        return params['format'].strip().lower()
+    
+    headers = {name.lower(): value for name, value in (event.get('headers') or {}).items()}
+    content_type = (headers.get('content-type') or '').lower()
+    return 'csv' if 'csv' in content_type else 'ndjson'
+
+
+def convert_bulk(event, context):
+    """Convert an NDJSON or CSV body row by row with the streaming bulk converter.
+    
+    API Gateway buffers Lambda responses, so the output is collected here; jobs that need
+    constant memory on large files call bulk_converter.convert_stream directly.
+    """
+    ctx = extract_request_context(event, context)
+    request_id = ctx['request_id']
+    request_origin = ctx['origin']
+    
+    cors_response = handle_cors_preflight(event, request_id, 'convert_bulk')
+    if cors_response:
+        return cors_response
+    
+    deadline = Deadline.from_context(context, get_deadline_reserve_seconds())
+    
+    try:
+        user_payload = require_auth(event, context)
+        user_info = get_user_info(user_payload)
+    except QuotaExceededError as quota_error:
+        return handle_quota_exceeded_error(quota_error, request_id, request_origin)
+    except UnauthorizedError as auth_error:
+        return handle_unauthorized_error(auth_error, request_id, request_origin)
+    except (ValueError, TypeError, KeyError) as config_error:
+        return handle_configuration_error(config_error, request_id, request_origin)
+    except Exception as e:
+        return handle_unexpected_error(e, request_id, 'during authentication', request_origin)
+    
+    try:
+        input_format = get_bulk_format(event)
+        output_format = ((event.get('queryStringParameters') or {}).get('output') or input_format).strip().lower()
+        if input_format not in BULK_FORMATS or output_format not in BULK_FORMATS:
+            return create_response(400, {'error': f'Invalid format. Must be one of: {", ".join(BULK_FORMATS)}.'}, request_origin)
+        
+        body = event.get('body') or ''
+        if event.get('isBase64Encoded'):
+            body = base64.b64decode(body).decode('utf-8')
+        
+        logger.info('Bulk conversion request received', extra=create_log_extra(
+            request_id,
+            **user_info,
+            input_format=input_format,
+            output_format=output_format
+        ))
+        
+        try:
+            output = convert_stream(io.StringIO(body), input_format, output_format, request_id, deadline)
+            text = ''.join(output)
+        except (ExternalAPIUnavailableError, DeadlineExceededError) as api_error:
+            logger.error('External API unavailable', extra=create_log_extra(
+                request_id,
+                remaining_ms=round(deadline.remaining() * 1000) if deadline.is_bounded else None,
+                error=str(api_error)
+            ))
+            return create_response(503, {'error': 'External currency API is currently unavailable'}, request_origin)
+        except csv.Error as csv_error:
+            return create_response(400, {'error': f'Invalid CSV: {csv_error}'}, request_origin)
+        except ValueError as e:
+            return create_response(404, {'error': str(e)}, request_origin)
+        
+        return create_text_response(200, text, BULK_CONTENT_TYPES[output_format], request_origin)
+    
+    except (binascii.Error, UnicodeDecodeError):
+        return create_response(400, {'error': 'Request body must be UTF-8 text'}, request_origin)
+    except DatabaseError as db_error:
+        logger.error('Database error during bulk conversion', extra=create_log_extra(
+            request_id,
+            error=str(db_error)
+        ), exc_info=True)
+        return create_response(500, {'error': 'Database error occurred'}, request_origin)
+    except Exception as e:
+        return handle_unexpected_error(e, request_id, 'during bulk conversion', request_origin)
+
+
+def rates_history(event, context):
+    ctx = extract_request_context(event, context)
+    request_id = ctx['request_id']
+    request_origin = ctx['origin']
+    
+    cors_response = handle_cors_preflight(event, request_id, 'rates_history')
+    if cors_response:
+        return cors_response
+    
+    try:
+        user_payload = require_auth(event, context)
+        user_info = get_user_info(user_payload)
+    except QuotaExceededError as quota_error:
+        return handle_quota_exceeded_error(quota_error, request_id, request_origin)
+    except UnauthorizedError as auth_error:
+        return handle_unauthorized_error(auth_error, request_id, request_origin)
+    except (ValueError, TypeError, KeyError) as config_error:
+        return handle_configuration_error(config_error, request_id, request_origin)
+    except Exception as e:
+        return handle_unexpected_error(e, request_id, 'during authentication', request_origin)
+    
+    try:
+        query = extract_history_query(event)
+        from_currency = query['from']
+        to_currency = query['to']
+        
+        try:
+            validate_history_request(
+                from_currency, to_currency, query['at'], query['start'], query['end'], request_id
+            )
+        except ValidationError as validation_error:
+            logger.warning('Validation error in rate history request', extra=create_log_extra(request_id, error=str(validation_error)))
+            return create_response(400, {'error': str(validation_error)}, request_origin)
+        
+        logger.info('Rate history request received', extra=create_log_extra(
+            request_id,
+            **user_info,
+            from_currency=from_currency,
+            to_currency=to_currency,
+            at=query['at'],
+            start=query['start'],
+            end=query['end']
+        ))
+        
+        if query['at'] is not None:
+            point = get_pair_rate_at(from_currency, to_currency, query['at'], request_id)
+            if point is None or point['rate'] is None:
+                return create_response(404, {'error': 'No rate recorded at or before the requested time'}, request_origin)
+            
+            return create_response(200, {
+                'from': from_currency,
+                'to': to_currency,
+                'at': to_iso(query['at']),
+                **point
+            }, request_origin)
+        
+        end = query['end'] if query['end'] is not None else int(time.time())
+        limit = min(query['limit'] or get_history_page_size(), get_history_max_page_size())
+        
+        try:
+            points, next_token = get_pair_history(
+                from_currency, to_currency, query['start'], end, limit, query['next_token'], request_id
+            )
+        except ValueError as token_error:
+            return create_response(400, {'error': str(token_error)}, request_origin)
+        
+        return create_response(200, {
+            'from': from_currency,
+            'to': to_currency,
+            'start': to_iso(query['start']),
+            'end': to_iso(end),
+            'points': points,
+            'next_token': next_token
+        }, request_origin)
+    
+    except RequestParsingError as parse_error:
+        logger.warning('Request parsing error in rate history', extra=create_log_extra(request_id, error=str(parse_error)))
+        return create_response(400, {'error': str(parse_error)}, request_origin)
+    except DatabaseError as db_error:
+        logger.error('Database error during rate history lookup', extra=create_log_extra(
+            request_id,
+            error=str(db_error)
+        ), exc_info=True)
+        return create_response(500, {'error': 'Database error occurred'}, request_origin)
+    except Exception as e:
+        return handle_unexpected_error(e, request_id, 'during rate history lookup', request_origin)
+
+
+def prefetch_rates(event, context):
+    """Scheduled refresh that keeps the rate snapshots warm ahead of their expiry."""
+    request_id = context.aws_request_id if context else None
+    base_currencies = get_prefetch_currencies()
+    
+    logger.info('Rate prefetch started', extra=create_log_extra(request_id, base_currencies=base_currencies))
+    
+    try:
+        snapshots, failures = prefetch_snapshots(base_currencies, request_id)
+    except DatabaseError as db_error:
+        logger.error('Database error during rate prefetch', extra=create_log_extra(
+            request_id,
+            error=str(db_error)
+        ), exc_info=True)
+        raise
+    
+    if failures and not snapshots:
+        raise ExternalAPIUnavailableError(f'Rate prefetch failed for every base: {", ".join(sorted(failures))}')
+    
+    refreshed = sorted(snapshot.base_currency for snapshot in snapshots)
+    logger.info('Rate prefetch finished', extra=create_log_extra(
+        request_id,
+        refreshed=refreshed,
+        failed=sorted(failures)
+    ))
+    
+    return {
+        'refreshed': refreshed,
+        'failed': failures
+    }
@@ -3,13 +3,12 @@ import jwt
 import logging
 from datetime import datetime, timedelta
 from exceptions import ConfigurationError, AuthenticationError
+from jwt_keyring import load_keyring, SYMMETRIC_ALGORITHMS
 from utils.logging_helpers import create_log_extra
 from utils.config_validator import get_jwt_secret_key, is_production
 
 logger = logging.getLogger()
 
-JWT_SECRET_KEY = get_jwt_secret_key()
-
 def get_jwt_algorithm():
     algorithm = os.environ.get('JWT_ALGORITHM')
     if not algorithm:
@@ -32,11 +31,34 @@ def get_jwt_expiration_hours():
 JWT_ALGORITHM = get_jwt_algorithm()
 JWT_EXPIRATION_HOURS = get_jwt_expiration_hours()
 
+# Only HMAC algorithms need the shared secret; asymmetric ones sign with JWT_PRIVATE_KEY.
+JWT_SECRET_KEY = get_jwt_secret_key() if JWT_ALGORITHM in SYMMETRIC_ALGORITHMS else os.environ.get('JWT_SECRET_KEY')
+
+# Parsed once per container, so verifying a token is a kid lookup plus one signature check.
+keyring = load_keyring(JWT_ALGORITHM, JWT_SECRET_KEY)
+
 
 class UnauthorizedError(AuthenticationError):
     pass
 
 
+def get_jwks():
+    return keyring.jwks()
+
+
+def get_token_key_id(token):
+    """The kid in a token's header, read without verifying the token; None when it has none or is malformed."""
+    try:
+        return jwt.get_unverified_header(token).get('kid')
+    except jwt.DecodeError:
+        return None
+
+
+def is_key_active(kid):
+    """Whether tokens carrying this kid are still accepted: the key is known and not retired."""
+    return keyring.key_for(kid) is not None
+
+
 def generate_token(user_id, username):
     if not user_id or not username:
         raise ValueError('user_id and username are required')
@@ -51,7 +73,8 @@ def generate_token(user_id, username):
             'iat': datetime.utcnow()
         }
         
-        token = jwt.encode(payload, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
+        headers = {'kid': keyring.signing_kid} if keyring.signing_kid else None
+        token = jwt.encode(payload, keyring.signing_key, algorithm=keyring.algorithm, headers=headers)
         
         if isinstance(token, bytes):
             token = token.decode('utf-8')
@@ -79,7 +102,12 @@ def validate_token(token):
         raise UnauthorizedError('Token must be a non-empty string')
     
     try:
-        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+        kid = get_token_key_id(token)
+        key = keyring.key_for(kid)
+        if key is None:
+            raise jwt.InvalidTokenError(f'Unknown or retired key id {kid}')
+        
+        payload = jwt.decode(token, key, algorithms=[keyring.algorithm])
         
         if 'user_id' not in payload or 'username' not in payload:
             logger.warning('JWT token missing required fields', extra=create_log_extra(None, payload_keys=list(payload.keys())))
@@ -92,7 +120,7 @@ def validate_token(token):
         ))
         
         return payload
-        
+    
     except jwt.ExpiredSignatureError:
         logger.warning('JWT token expired')
         raise UnauthorizedError('Token has expired')
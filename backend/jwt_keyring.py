@@ -0,0 +1,155 @@
+import os
+import json
+import time
+import hashlib
+import logging
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa, ed25519
+from jwt.algorithms import RSAAlgorithm, OKPAlgorithm
+from exceptions import ConfigurationError
+from utils.logging_helpers import create_log_extra
+
+logger = logging.getLogger()
+
+SYMMETRIC_ALGORITHMS = ('HS256', 'HS384', 'HS512')
+
+# Private key type, public key type and JWK serializer for each asymmetric algorithm.
+ASYMMETRIC_ALGORITHMS = {
+    'RS256': (rsa.RSAPrivateKey, rsa.RSAPublicKey, RSAAlgorithm),
+    'RS384': (rsa.RSAPrivateKey, rsa.RSAPublicKey, RSAAlgorithm),
+    'RS512': (rsa.RSAPrivateKey, rsa.RSAPublicKey, RSAAlgorithm),
+    'EdDSA': (ed25519.Ed25519PrivateKey, ed25519.Ed25519PublicKey, OKPAlgorithm),
+}
+
+SUPPORTED_ALGORITHMS = SYMMETRIC_ALGORITHMS + tuple(ASYMMETRIC_ALGORITHMS)
+
+
+def _public_der(public_key):
+    return public_key.public_bytes(
+        serialization.Encoding.DER,
+        serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+
+
+def derive_key_id(public_key):
+    """Default kid: a short SHA-256 thumbprint of the public key."""
+    return hashlib.sha256(_public_der(public_key)).hexdigest()[:16]
+
+
+def _read_pem(value):
+    # Env vars often carry PEMs on one line with escaped newlines.
+    return value.replace('\\n', '\n').encode('utf-8')
+
+
+class Keyring:
+    """Keys parsed once at startup, indexed by kid.
+    
+    The signing key signs new tokens; every key, including ones published ahead of a rotation
+    or kept after it, verifies tokens carrying its kid until its retire_at.
+    """
+
+    def __init__(self, algorithm, signing_kid, signing_key, verification_keys):
+        self.algorithm = algorithm
+        self.signing_kid = signing_kid
+        self.signing_key = signing_key
+        self._keys = dict(verification_keys)
+
+    @property
+    def kids(self):
+        return sorted(kid for kid in self._keys if kid is not None)
+
+    def key_for(self, kid, now=None):
+        """Verification key for a token's kid, or None when it is unknown or retired.
+        
+        Tokens without a kid, issued before kids were added, use the signing key's entry.
+        """
+        entry = self._keys.get(kid if kid is not None else self.signing_kid)
+        if entry is None:
+            return None
+        key, retire_at = entry
+        if retire_at is not None and retire_at <= (now or time.time()):
+            return None
+        return key
+
+    def jwks(self, now=None):
+        """JWKS document with the public keys still in use; symmetric keys are never published."""
+        if self.algorithm not in ASYMMETRIC_ALGORITHMS:
+            return {'keys': []}
+        
+        serializer = ASYMMETRIC_ALGORITHMS[self.algorithm][2]
+        keys = []
+        for kid in self.kids:
+            key = self.key_for(kid, now)
+            if key is None:
+                continue
+            jwk = serializer.to_jwk(key, as_dict=True)
+            jwk.update({'kid': kid, 'alg': self.algorithm, 'use': 'sig'})
+            keys.append(jwk)
+        return {'keys': keys}
+
+
+def _load_verification_keys(algorithm):
+    """Parse JWT_VERIFICATION_KEYS: a JSON list of {"kid", "public_key", "retire_at"} entries."""
+    keys_json = os.environ.get('JWT_VERIFICATION_KEYS')
+    if not keys_json:
+        return {}
+    
+    try:
+        entries = json.loads(keys_json)
+        keys = {}
+        for entry in entries:
+            public_key = serialization.load_pem_public_key(_read_pem(entry['public_key']))
+            retire_at = entry.get('retire_at')
+            keys[entry['kid']] = (public_key, int(retire_at) if retire_at is not None else None)
+    except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+        raise ConfigurationError(f'JWT_VERIFICATION_KEYS is invalid: {str(e)}')
+    
+    public_type = ASYMMETRIC_ALGORITHMS[algorithm][1]
+    for kid, (public_key, _) in keys.items():
+        if not isinstance(public_key, public_type):
+            raise ConfigurationError(f'JWT verification key {kid} does not match {algorithm}')
+    return keys
+
+
+def load_keyring(algorithm, secret_key=None):
+    """Build the keyring for JWT_ALGORITHM.
+    
+    HMAC algorithms keep the single JWT_SECRET_KEY, and its tokens carry a kid only when
+    JWT_KEY_ID is set. Asymmetric algorithms sign with JWT_PRIVATE_KEY and also accept the
+    public keys in JWT_VERIFICATION_KEYS.
+    """
+    if algorithm not in SUPPORTED_ALGORITHMS:
+        raise ConfigurationError(
+            f'Unsupported JWT_ALGORITHM {algorithm}. Must be one of: {", ".join(SUPPORTED_ALGORITHMS)}'
+        )
+    
+    signing_kid = os.environ.get('JWT_KEY_ID') or None
+    
+    if algorithm in SYMMETRIC_ALGORITHMS:
+        return Keyring(algorithm, signing_kid, secret_key, {signing_kid: (secret_key, None)})
+    
+    private_pem = os.environ.get('JWT_PRIVATE_KEY')
+    if not private_pem:
+        raise ConfigurationError(f'JWT_PRIVATE_KEY environment variable is required for {algorithm}')
+    
+    try:
+        private_key = serialization.load_pem_private_key(_read_pem(private_pem), password=None)
+    except (TypeError, ValueError) as e:
+        raise ConfigurationError(f'JWT_PRIVATE_KEY is invalid: {str(e)}')
+    
+    if not isinstance(private_key, ASYMMETRIC_ALGORITHMS[algorithm][0]):
+        raise ConfigurationError(f'JWT_PRIVATE_KEY does not match {algorithm}')
+    
+    public_key = private_key.public_key()
+    signing_kid = signing_kid or derive_key_id(public_key)
+    
+    keys = _load_verification_keys(algorithm)
+    keys[signing_kid] = (public_key, None)
+    
+    logger.info('JWT keyring loaded', extra=create_log_extra(
+        None,
+        algorithm=algorithm,
+        signing_kid=signing_kid,
+        kids=sorted(keys)
+    ))
+    return Keyring(algorithm, signing_kid, private_key, keys)
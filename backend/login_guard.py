@@ -0,0 +1,151 @@
+import os
+import math
+import time
+import logging
+from exceptions import DatabaseError
+from quotas import QuotaExceededError
+from stores import user_store
+from utils.ttl_cache import TTLCache
+from utils.logging_helpers import create_log_extra
+
+logger = logging.getLogger()
+
+LOCK_CACHE_MAX_SIZE = 10000
+
+
+class LoginLockedError(QuotaExceededError):
+    pass
+
+
+def _get_positive_int_env(name, default):
+    value_str = os.environ.get(name, str(default))
+    try:
+        value = int(value_str)
+        if value < 1:
+            raise ValueError(value_str)
+        return value
+    except (ValueError, TypeError):
+        logger.warning(f'Invalid {name} value: {value_str}, using default {default}')
+        return default
+
+
+def get_login_max_failures():
+    """Failed logins for one username before it is locked out."""
+    return _get_positive_int_env('LOGIN_MAX_FAILURES', 5)
+
+
+def get_login_max_failures_per_ip():
+    """Failed logins from one source IP, across usernames, before it is locked out."""
+    return _get_positive_int_env('LOGIN_MAX_FAILURES_PER_IP', 20)
+
+
+def get_login_lockout_seconds():
+    """First lockout; each further failure after a lockout doubles it."""
+    return _get_positive_int_env('LOGIN_LOCKOUT_SECONDS', 30)
+
+
+def get_login_failure_window_seconds():
+    """Failures are forgotten this long after the last one; it also caps the lockout."""
+    return _get_positive_int_env('LOGIN_FAILURE_WINDOW_SECONDS', 3600)
+
+
+class LoginGuard:
+    """Exponential lockout of usernames and source IPs after repeated failed logins.
+    
+    Failure counts live in the store, shared by every container and removed by their TTL.
+    Locks this container has seen are also kept in memory, so a locked-out attempt is
+    rejected without a store call and long before the password would be hashed.
+    """
+
+    def __init__(self, store, max_failures, max_failures_per_ip, lockout_seconds, window_seconds, clock=time.time):
+        self.store = store
+        self.max_failures = max_failures
+        self.max_failures_per_ip = max_failures_per_ip
+        self.lockout_seconds = lockout_seconds
+        self.window_seconds = window_seconds
+        self._clock = clock
+        self._locks = TTLCache(max_size=LOCK_CACHE_MAX_SIZE, default_ttl_seconds=0, clock=clock)
+        self.rejected = 0
+
+    def _keys(self, username, source_ip):
+        keys = [(f'user#{username}', self.max_failures)]
+        if source_ip:
+            keys.append((f'ip#{source_ip}', self.max_failures_per_ip))
+        return keys
+
+    def locked_until(self, failures, last_failure_at, threshold):
+        """When a key with this many failures unlocks, or None if it is not locked."""
+        if failures < threshold:
+            return None
+        lockout = min(self.lockout_seconds * 2 ** min(failures - threshold, 32), self.window_seconds)
+        return last_failure_at + lockout
+
+    def _reject(self, key, locked_until, now, request_id):
+        self.rejected += 1
+        retry_after = max(1, math.ceil(locked_until - now))
+        logger.warning('Login attempt rejected by lockout', extra=create_log_extra(
+            request_id,
+            key=key,
+            retry_after=retry_after
+        ))
+        raise LoginLockedError(f'Too many failed login attempts. Retry in {retry_after} seconds.', retry_after)
+
+    def check(self, username, source_ip=None, request_id=None):
+        """Raise LoginLockedError if the username or source IP is locked out."""
+        now = self._clock()
+        keys = self._keys(username, source_ip)
+        
+        for key, _ in keys:
+            locked_until = self._locks.get(key)
+            if locked_until is not None:
+                self._reject(key, locked_until, now, request_id)
+        
+        for key, threshold in keys:
+            try:
+                record = self.store.get_login_failures(key, int(now))
+            except DatabaseError as e:
+                # Failing open keeps logins working; the password check still applies.
+                logger.warning('Failed to read failed logins', extra=create_log_extra(request_id, key=key, error=str(e)))
+                continue
+            if record is None:
+                continue
+            locked_until = self.locked_until(record['failures'], record['last_failure_at'], threshold)
+            if locked_until is not None and locked_until > now:
+                self._locks.set(key, locked_until, expires_at=locked_until)
+                self._reject(key, locked_until, now, request_id)
+
+    def record_failure(self, username, source_ip=None, request_id=None):
+        now = int(self._clock())
+        for key, threshold in self._keys(username, source_ip):
+            try:
+                record = self.store.add_login_failure(key, now, now + self.window_seconds)
+            except DatabaseError as e:
+                logger.warning('Failed to record failed login', extra=create_log_extra(request_id, key=key, error=str(e)))
+                continue
+            locked_until = self.locked_until(record['failures'], record['last_failure_at'], threshold)
+            if locked_until is not None:
+                self._locks.set(key, locked_until, expires_at=locked_until)
+                logger.warning('Login locked out', extra=create_log_extra(
+                    request_id,
+                    key=key,
+                    failures=record['failures'],
+                    locked_seconds=locked_until - now
+                ))
+
+    def record_success(self, username, request_id=None):
+        """Forget the username's failures; the source IP's count is left to expire."""
+        key = f'user#{username}'
+        self._locks.invalidate(key)
+        try:
+            self.store.clear_login_failures(key)
+        except DatabaseError as e:
+            logger.warning('Failed to clear failed logins', extra=create_log_extra(request_id, key=key, error=str(e)))
+
+
+login_guard = LoginGuard(
+    user_store,
+    get_login_max_failures(),
+    get_login_max_failures_per_ip(),
+    get_login_lockout_seconds(),
+    get_login_failure_window_seconds()
+)
@@ -1,11 +1,58 @@
+import os
+import hashlib
 import logging
-from jwt_config import get_token_from_header, validate_token, UnauthorizedError
+from jwt_config import get_token_from_header, validate_token, get_token_key_id, is_key_active, UnauthorizedError
 from exceptions import ConfigurationError
+from quotas import enforce_quota
 from utils.logging_helpers import create_log_extra
+from utils.ttl_cache import TTLCache
 
 logger = logging.getLogger()
 
 
+def get_token_cache_max_size():
+    """Get the maximum number of verified tokens kept in memory."""
+    size_str = os.environ.get('TOKEN_CACHE_MAX_SIZE', '1024')
+    try:
+        size = int(size_str)
+        if size < 1:
+            raise ValueError(size_str)
+        return size
+    except (ValueError, TypeError):
+        logger.warning(f'Invalid TOKEN_CACHE_MAX_SIZE value: {size_str}, using default 1024')
+        return 1024
+
+
+# Payloads of verified tokens by token digest; each entry expires at its token's exp.
+token_cache = TTLCache(max_size=get_token_cache_max_size(), default_ttl_seconds=0)
+
+
+def verify_token(token):
+    """Return (payload, cached): a cache hit skips signature verification until the token's exp.
+    
+    Hits are only served while the token's kid is still active, so retiring a key also
+    rejects the tokens it signed that are already cached.
+    """
+    digest = hashlib.sha256(token.encode()).hexdigest()
+    
+    entry = token_cache.get(digest)
+    if entry is not None:
+        kid, payload = entry
+        if is_key_active(kid):
+            return dict(payload), True
+        token_cache.invalidate(digest)
+    
+    payload = validate_token(token)
+    expires_at = payload.get('exp')
+    if isinstance(expires_at, (int, float)):
+        token_cache.set(digest, (get_token_key_id(token), dict(payload)), expires_at=expires_at)
+    return payload, False
+
+
+def get_token_cache_stats():
+    return token_cache.stats()
+
+
 def require_auth(event, context):
     request_id = context.aws_request_id if context else None
     
@@ -29,18 +76,19 @@ def require_auth(event, context):
         raise UnauthorizedError('Authorization token required')
     
     try:
-        payload = validate_token(token)
+        payload, cached = verify_token(token)
         
-        logger.info('Authentication successful', extra=create_log_extra(
+        logger.log(logging.DEBUG if cached else logging.INFO, 'Authentication successful', extra=create_log_extra(
             request_id,
             user_id=payload.get('user_id'),
             username=payload.get('username'),
             path=event.get('path'),
-            method=event.get('httpMethod')
+            method=event.get('httpMethod'),
+            token_cache='hit' if cached else 'miss',
+            token_cache_hits=token_cache.hits,
+            token_cache_misses=token_cache.misses
         ))
-        
-        return payload
-        
+    
     except UnauthorizedError:
         raise
     except (ValueError, TypeError, KeyError) as config_error:
@@ -68,4 +116,8 @@ def require_auth(event, context):
             method=event.get('httpMethod') if isinstance(event, dict) else None
         ), exc_info=True)
         raise UnauthorizedError('Authentication failed')
+    
+    # Quotas are keyed by the route template, so /rates/{currency} is one endpoint for every currency.
+    enforce_quota(payload.get('user_id'), event.get('resource') or event.get('path') or 'unknown', request_id)
+    return payload
 
@@ -0,0 +1,196 @@
+import os
+import json
+import math
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from exceptions import DatabaseError
+from stores import user_store
+from utils.token_bucket import TokenBucket
+from utils.logging_helpers import create_log_extra
+
+logger = logging.getLogger()
+
+WINDOW_SECONDS = 60
+
+
+class QuotaExceededError(Exception):
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def is_quota_enabled():
+    return os.environ.get('QUOTA_ENABLED', 'true').strip().lower() in ('true', '1', 'yes')
+
+
+def get_quota_requests_per_minute():
+    """Requests each user may make to each endpoint per minute, across all containers."""
+    limit_str = os.environ.get('QUOTA_REQUESTS_PER_MINUTE', '600')
+    try:
+        limit = int(limit_str)
+        if limit < 1:
+            raise ValueError(limit_str)
+        return limit
+    except (ValueError, TypeError):
+        logger.warning(f'Invalid QUOTA_REQUESTS_PER_MINUTE value: {limit_str}, using default 600')
+        return 600
+
+
+def get_quota_endpoint_limits():
+    """Per-endpoint overrides, as a JSON object of path to requests per minute."""
+    limits_str = os.environ.get('QUOTA_ENDPOINT_LIMITS')
+    if not limits_str:
+        return {}
+    try:
+        limits = {path: int(limit) for path, limit in json.loads(limits_str).items()}
+        if any(limit < 1 for limit in limits.values()):
+            raise ValueError(limits_str)
+        return limits
+    except (ValueError, TypeError, AttributeError):
+        logger.warning(f'Invalid QUOTA_ENDPOINT_LIMITS value: {limits_str}, using the default limit for every endpoint')
+        return {}
+
+
+def get_quota_sync_seconds():
+    seconds_str = os.environ.get('QUOTA_SYNC_SECONDS', '10')
+    try:
+        return max(0.0, float(seconds_str))
+    except (ValueError, TypeError):
+        logger.warning(f'Invalid QUOTA_SYNC_SECONDS value: {seconds_str}, using default 10 seconds')
+        return 10.0
+
+
+class QuotaLimiter:
+    """Per-user, per-endpoint request quotas enforced from memory.
+    
+    Each caller has a token bucket per endpoint in this container, so checking a request
+    never waits on the network. Allowed requests are counted locally and added to shared
+    per-minute counters in the store at most every sync_seconds, on a background thread.
+    Once a shared counter reaches the limit, the caller is rejected here until that minute
+    ends, even if this container's bucket still has tokens.
+    """
+
+    def __init__(self, store, default_limit, endpoint_limits=None, sync_seconds=10.0, clock=time.time, executor=None):
+        self.store = store
+        self.default_limit = default_limit
+        self.endpoint_limits = endpoint_limits or {}
+        self.sync_seconds = sync_seconds
+        self._clock = clock
+        self._executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix='quota-sync')
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._blocked_until = {}
+        self._pending = {}
+        self._last_sync = clock()
+        self._sync_in_flight = False
+        self.allowed = 0
+        self.rejected = 0
+        self.syncs = 0
+        self.sync_failures = 0
+
+    def limit_for(self, endpoint):
+        return self.endpoint_limits.get(endpoint, self.default_limit)
+
+    def check(self, user_id, endpoint, request_id=None):
+        """Count one request, or raise QuotaExceededError with the seconds to wait before retrying."""
+        now = self._clock()
+        key = (user_id, endpoint)
+        
+        with self._lock:
+            retry_after = self._blocked_until.get(key, 0) - now
+            if retry_after <= 0:
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    limit = self.limit_for(endpoint)
+                    bucket = self._buckets[key] = TokenBucket(limit, limit / WINDOW_SECONDS, clock=self._clock)
+                retry_after = bucket.try_acquire()
+            
+            if retry_after > 0:
+                self.rejected += 1
+            else:
+                self.allowed += 1
+                window = int(now // WINDOW_SECONDS) * WINDOW_SECONDS
+                self._pending[(user_id, endpoint, window)] = self._pending.get((user_id, endpoint, window), 0) + 1
+            
+            sync_due = bool(self._pending) and not self._sync_in_flight and now - self._last_sync >= self.sync_seconds
+            if sync_due:
+                self._sync_in_flight = True
+        
+        if sync_due:
+            self._executor.submit(self.sync, request_id)
+        
+        if retry_after > 0:
+            retry_after = math.ceil(retry_after)
+            logger.warning('Request quota exceeded', extra=create_log_extra(
+                request_id,
+                user_id=user_id,
+                endpoint=endpoint,
+                retry_after=retry_after
+            ))
+            raise QuotaExceededError(f'Rate limit exceeded. Retry in {retry_after} seconds.', retry_after)
+
+    def sync(self, request_id=None):
+        """Add the requests counted since the last sync to the shared counters and block callers over their limit."""
+        try:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            
+            failed = {}
+            blocked = {}
+            for (user_id, endpoint, window), count in pending.items():
+                try:
+                    total = self.store.add_quota_usage(user_id, endpoint, window, count, window + 2 * WINDOW_SECONDS)
+                except DatabaseError:
+                    failed[(user_id, endpoint, window)] = count
+                    continue
+                if total >= self.limit_for(endpoint):
+                    blocked[(user_id, endpoint)] = window + WINDOW_SECONDS
+            
+            if failed:
+                self.sync_failures += 1
+                logger.warning('Failed to sync request quotas', extra=create_log_extra(
+                    request_id,
+                    counters=len(failed)
+                ))
+            
+            now = self._clock()
+            with self._lock:
+                for key, count in failed.items():
+                    # Counts for a window that has ended would never block anyone again.
+                    if key[2] + WINDOW_SECONDS > now:
+                        self._pending[key] = self._pending.get(key, 0) + count
+                for key, until in blocked.items():
+                    self._blocked_until[key] = max(self._blocked_until.get(key, 0), until)
+                self._blocked_until = {key: until for key, until in self._blocked_until.items() if until > now}
+                self._buckets = {key: bucket for key, bucket in self._buckets.items() if not bucket.is_full()}
+                self.syncs += 1
+        finally:
+            with self._lock:
+                self._last_sync = self._clock()
+                self._sync_in_flight = False
+
+    def stats(self):
+        with self._lock:
+            return {
+                'allowed': self.allowed,
+                'rejected': self.rejected,
+                'syncs': self.syncs,
+                'sync_failures': self.sync_failures,
+                'pending_counters': len(self._pending),
+                'blocked_callers': len(self._blocked_until)
+            }
+
+
+quota_limiter = QuotaLimiter(
+    user_store,
+    get_quota_requests_per_minute(),
+    get_quota_endpoint_limits(),
+    get_quota_sync_seconds()
+)
+
+
+def enforce_quota(user_id, endpoint, request_id=None):
+    if is_quota_enabled():
+        quota_limiter.check(user_id, endpoint, request_id)
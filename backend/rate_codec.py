@@ -0,0 +1,69 @@
+import sys
+import struct
+from array import array
+
+# Layout, little-endian:
+#   header   magic 'LQRS', format version (u8), currency count N (u16), snapshot version (i64)
+#   index    N three-letter ASCII currency codes, in the order of the values
+#   padding  zero bytes up to the next 8-byte boundary
+#   values   N float64 rates
+MAGIC = b'LQRS'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sBHq')
+CODE_SIZE = 3
+VALUE_SIZE = 8
+
+_NATIVE_LITTLE_ENDIAN = sys.byteorder == 'little'
+
+
+def _values_offset(count):
+    index_end = HEADER.size + count * CODE_SIZE
+    return index_end + (-index_end % VALUE_SIZE)
+
+
+def pack_rates(rates, version):
+    """Pack {currency: rate} into one blob of a few hundred bytes, currencies in sorted order."""
+    currencies = sorted(rates)
+    for currency in currencies:
+        if len(currency) != CODE_SIZE or not currency.isascii():
+            raise ValueError(f'Cannot pack currency code {currency!r}')
+    
+    values = array('d', (float(rates[currency]) for currency in currencies))
+    if not _NATIVE_LITTLE_ENDIAN:
+        values.byteswap()
+    
+    index = ''.join(currencies).encode('ascii')
+    padding = bytes(_values_offset(len(currencies)) - HEADER.size - len(index))
+    return HEADER.pack(MAGIC, FORMAT_VERSION, len(currencies), int(version)) + index + padding + values.tobytes()
+
+
+def unpack_rates(blob):
+    """Decode a packed blob into (rates dict, version).
+    
+    The float64 block is read straight from the buffer through a memoryview cast;
+    only big-endian hosts go through a copied, byte-swapped array.
+    """
+    view = memoryview(blob)
+    if len(view) < HEADER.size:
+        raise ValueError('Packed rates blob is truncated')
+    
+    magic, format_version, count, version = HEADER.unpack_from(view)
+    if magic != MAGIC:
+        raise ValueError('Packed rates blob has an unknown format')
+    if format_version != FORMAT_VERSION:
+        raise ValueError(f'Unsupported packed rates format version {format_version}')
+    
+    offset = _values_offset(count)
+    if len(view) != offset + count * VALUE_SIZE:
+        raise ValueError('Packed rates blob is truncated')
+    
+    index = bytes(view[HEADER.size:HEADER.size + count * CODE_SIZE]).decode('ascii')
+    currencies = [index[i:i + CODE_SIZE] for i in range(0, len(index), CODE_SIZE)]
+    
+    if _NATIVE_LITTLE_ENDIAN:
+        values = view[offset:].cast('d')
+    else:
+        values = array('d', view[offset:])
+        values.byteswap()
+    
+    return dict(zip(currencies, values.tolist())), version
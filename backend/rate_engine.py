@@ -0,0 +1,139 @@
+import os
+import decimal
+import logging
+from decimal import Decimal
+from constants import VALID_CURRENCIES
+from exceptions import ConfigurationError
+from utils.config_validator import is_production
+
+logger = logging.getLogger()
+
+ROUNDING_MODES = {
+    'ROUND_HALF_EVEN': decimal.ROUND_HALF_EVEN,
+    'ROUND_HALF_UP': decimal.ROUND_HALF_UP,
+    'ROUND_HALF_DOWN': decimal.ROUND_HALF_DOWN,
+    'ROUND_DOWN': decimal.ROUND_DOWN,
+    'ROUND_UP': decimal.ROUND_UP
+}
+
+
+def get_anchor_currency():
+    anchor = os.environ.get('RATE_ANCHOR_CURRENCY')
+    if not anchor:
+        return 'USD'
+    anchor = anchor.strip().upper()
+    if anchor not in VALID_CURRENCIES:
+        raise ConfigurationError(f'RATE_ANCHOR_CURRENCY must be one of the configured CURRENCIES, got {anchor}')
+    return anchor
+
+
+DEFAULT_RATE_PRECISION = 15
+
+
+def get_rate_precision():
+    """Significant digits kept in derived rates; the default is all a float carries exactly."""
+    precision_str = os.environ.get('RATE_PRECISION')
+    if not precision_str:
+        return DEFAULT_RATE_PRECISION
+    try:
+        precision = int(precision_str)
+    except (ValueError, TypeError):
+        raise ConfigurationError('RATE_PRECISION must be a valid integer')
+    if precision < 1:
+        raise ConfigurationError('RATE_PRECISION must be at least 1')
+    return precision
+
+
+def get_rate_rounding():
+    rounding = os.environ.get('RATE_ROUNDING')
+    if not rounding:
+        return decimal.ROUND_HALF_EVEN
+    rounding = rounding.strip().upper()
+    if rounding not in ROUNDING_MODES:
+        if is_production():
+            raise ConfigurationError(f'RATE_ROUNDING must be one of: {", ".join(sorted(ROUNDING_MODES))}')
+        logger.warning(f'Invalid RATE_ROUNDING value: {rounding}, using ROUND_HALF_EVEN')
+        return decimal.ROUND_HALF_EVEN
+    return ROUNDING_MODES[rounding]
+
+
+ANCHOR_CURRENCY = get_anchor_currency()
+RATE_PRECISION = get_rate_precision()
+RATE_ROUNDING = get_rate_rounding()
+
+
+def derive_rate(anchor_rates, from_currency, to_currency, precision=None, rounding=None):
+    """Derive any pair from anchor-based rates as rate(to) / rate(from).
+
+    The quotient is rounded once, to `precision` significant digits, so direct and
+    cross pairs follow the same policy.
+    """
+    if from_currency not in anchor_rates or to_currency not in anchor_rates:
+        raise ValueError(f'Conversion rate not found for {from_currency} to {to_currency}')
+
+    from_rate = Decimal(str(anchor_rates[from_currency]))
+    to_rate = Decimal(str(anchor_rates[to_currency]))
+
+    if from_rate <= 0 or to_rate <= 0:
+        raise ValueError(f'Conversion rate not found for {from_currency} to {to_currency}')
+
+    context = decimal.Context(
+        prec=precision or RATE_PRECISION,
+        rounding=rounding or RATE_ROUNDING
+    )
+    return float(context.divide(to_rate, from_rate))
+
+
+class RateSnapshot:
+    """Every supported rate quoted against one base currency, fetched at a single instant."""
+
+    def __init__(self, base_currency, rates, fetched_at, expires_at=None, stale=False, validators=None):
+        self.base_currency = base_currency
+        self.rates = rates
+        self.fetched_at = fetched_at
+        self.expires_at = expires_at
+        self.stale = stale
+        self.validators = validators
+
+    @property
+    def version(self):
+        return self.fetched_at
+
+    @classmethod
+    def from_provider_rates(cls, base_currency, rates, fetched_at, expires_at=None, validators=None):
+        """Keep only the configured currencies, so storage grows with N rather than N squared."""
+        snapshot_rates = {
+            currency: float(rate)
+            for currency, rate in rates.items()
+            if currency in VALID_CURRENCIES
+        }
+        snapshot_rates[base_currency] = 1.0
+        return cls(base_currency, snapshot_rates, fetched_at, expires_at, validators=validators)
+
+    def is_expired(self, now):
+        """Snapshots without a ttl, like seeded ones, are always treated as expired."""
+        return self.expires_at is None or self.expires_at <= now
+
+    def is_stale(self, now):
+        return self.stale or self.is_expired(now)
+
+    def as_stale(self):
+        return RateSnapshot(
+            self.base_currency, self.rates, self.fetched_at, self.expires_at,
+            stale=True, validators=self.validators
+        )
+
+    def with_expiry(self, expires_at, validators=None):
+        """Same rates and version, valid until expires_at; used when the provider reports no change."""
+        return RateSnapshot(
+            self.base_currency, self.rates, self.fetched_at, expires_at,
+            validators=validators or self.validators
+        )
+
+    def seconds_past_expiry(self, now):
+        if self.expires_at is None:
+            return None
+        return max(0, now - self.expires_at)
+
+    def rate(self, from_currency, to_currency):
+        return derive_rate(self.rates, from_currency, to_currency)
@@ -0,0 +1,264 @@
+import os
+import json
+import base64
+import logging
+import binascii
+from itertools import islice
+from datetime import datetime, timezone
+from exceptions import DatabaseError
+from rate_codec import pack_rates, unpack_rates
+from rate_engine import derive_rate, ANCHOR_CURRENCY
+from stores import rate_store
+from utils.logging_helpers import create_log_extra
+from utils.error_handlers import handle_database_error
+
+logger = logging.getLogger()
+
+KEYFRAME = 'keyframe'
+DELTA = 'delta'
+
+
+def _get_int_setting(name, default):
+    value_str = os.environ.get(name)
+    if not value_str:
+        return default
+    try:
+        return int(value_str)
+    except ValueError:
+        logger.warning(f'Invalid {name} value: {value_str}, using default {default}')
+        return default
+
+
+def is_history_enabled():
+    return os.environ.get('HISTORY_ENABLED', 'true').strip().lower() in ('true', '1', 'yes')
+
+
+def get_keyframe_interval():
+    """Entries per keyframe: one full snapshot, then up to interval - 1 deltas against it."""
+    return max(1, _get_int_setting('HISTORY_KEYFRAME_INTERVAL', 24))
+
+
+def get_history_retention_days():
+    """Days history entries are kept; 0 keeps them forever."""
+    return max(0, _get_int_setting('HISTORY_RETENTION_DAYS', 0))
+
+
+def get_history_page_size():
+    return max(1, _get_int_setting('HISTORY_PAGE_SIZE', 100))
+
+
+def get_history_max_page_size():
+    return max(1, _get_int_setting('HISTORY_MAX_PAGE_SIZE', 500))
+
+
+# Last keyframe this container wrote per base; its deltas are encoded against it.
+keyframes = {}
+
+
+def encode_entry(snapshot):
+    """Build the history item for a snapshot and the keyframe state to keep once it is written.
+    
+    The item is a keyframe holding every rate, or a delta holding only the rates that
+    differ from the keyframe named in keyframe_at. Deltas always point at a keyframe
+    rather than at the previous entry, so entries written by different containers never
+    depend on each other.
+    """
+    keyframe = keyframes.get(snapshot.base_currency)
+    needs_keyframe = (
+        keyframe is None
+        or keyframe['deltas'] >= get_keyframe_interval() - 1
+        or keyframe['fetched_at'] >= snapshot.fetched_at
+        or not set(keyframe['rates']) <= set(snapshot.rates)
+    )
+    
+    item = {
+        'base_currency': snapshot.base_currency,
+        'fetched_at': snapshot.fetched_at
+    }
+    
+    if needs_keyframe:
+        item['kind'] = KEYFRAME
+        item['packed_rates'] = pack_rates(snapshot.rates, snapshot.fetched_at)
+        keyframe_at = snapshot.fetched_at
+        state = {'fetched_at': snapshot.fetched_at, 'rates': dict(snapshot.rates), 'deltas': 0}
+    else:
+        changed = {
+            currency: rate
+            for currency, rate in snapshot.rates.items()
+            if keyframe['rates'].get(currency) != rate
+        }
+        item['kind'] = DELTA
+        item['keyframe_at'] = keyframe['fetched_at']
+        item['packed_rates'] = pack_rates(changed, snapshot.fetched_at)
+        keyframe_at = keyframe['fetched_at']
+        state = dict(keyframe, deltas=keyframe['deltas'] + 1)
+    
+    retention_days = get_history_retention_days()
+    if retention_days:
+        # Deltas expire with their keyframe so none is left without its base.
+        item['ttl'] = keyframe_at + retention_days * 86400
+    
+    return item, state
+
+
+def append_snapshot(snapshot, request_id=None):
+    """Append a refreshed snapshot to the history table; failures are logged, never raised."""
+    if not is_history_enabled():
+        return False
+    
+    item, state = encode_entry(snapshot)
+    
+    try:
+        written = rate_store.put_history_entry(item)
+    except DatabaseError as e:
+        logger.warning('Failed to append rate snapshot to history', extra=create_log_extra(
+            request_id,
+            from_currency=snapshot.base_currency,
+            snapshot_version=snapshot.version,
+            error_type=type(e).__name__
+        ))
+        return False
+    
+    if not written:
+        # Another container recorded this second first; its entry stands and ours is not a keyframe.
+        logger.debug('Rate history entry already recorded', extra=create_log_extra(
+            request_id,
+            from_currency=snapshot.base_currency,
+            fetched_at=snapshot.fetched_at
+        ))
+        return False
+    
+    keyframes[snapshot.base_currency] = state
+    logger.debug('Rate snapshot appended to history', extra=create_log_extra(
+        request_id,
+        from_currency=snapshot.base_currency,
+        snapshot_version=snapshot.version,
+        kind=item['kind']
+    ))
+    return True
+
+
+def _unpack_item_rates(item):
+    packed = item['packed_rates']
+    rates, _ = unpack_rates(getattr(packed, 'value', packed))
+    return rates
+
+
+def load_keyframe(base_currency, fetched_at, request_id=None):
+    try:
+        item = rate_store.get_history_entry(base_currency, fetched_at)
+    except DatabaseError as e:
+        handle_database_error(e, request_id, f'while loading history keyframe for {base_currency}')
+    
+    if item is None:
+        raise ValueError(f'History keyframe {fetched_at} for {base_currency} is missing')
+    if item.get('kind') != KEYFRAME:
+        # Decoding a delta against a partial rate set would silently return wrong rates.
+        raise ValueError(f'History entry {fetched_at} for {base_currency} is not a keyframe')
+    return _unpack_item_rates(item)
+
+
+def _decode_entry(item, keyframe, request_id=None):
+    """Return (rates, keyframe) for an item; keyframe is the (fetched_at, rates) pair in use."""
+    base_currency = item['base_currency']
+    
+    if item['kind'] == KEYFRAME:
+        rates = _unpack_item_rates(item)
+        return rates, (int(item['fetched_at']), rates)
+    
+    keyframe_at = int(item['keyframe_at'])
+    if keyframe is None or keyframe[0] != keyframe_at:
+        keyframe = (keyframe_at, load_keyframe(base_currency, keyframe_at, request_id))
+    return {**keyframe[1], **_unpack_item_rates(item)}, keyframe
+
+
+def get_rates_at(base_currency, timestamp, request_id=None):
+    """Rates in effect at timestamp: the newest entry at or before it, as (fetched_at, rates) or None."""
+    try:
+        items, _ = rate_store.query_history(base_currency, end=int(timestamp), newest_first=True, limit=1)
+    except DatabaseError as e:
+        handle_database_error(e, request_id, f'while querying rate history for {base_currency}')
+    
+    if not items:
+        return None
+    
+    rates, _ = _decode_entry(items[0], None, request_id)
+    return int(items[0]['fetched_at']), rates
+
+
+def iter_rates_between(base_currency, start, end, request_id=None, page_size=100):
+    """Yield (fetched_at, rates) for every entry in [start, end], oldest first.
+    
+    Pages are queried lazily, page_size entries at a time, so memory holds one page
+    and the keyframe currently in use, however long the range is.
+    """
+    keyframe = None
+    cursor = None
+    
+    while True:
+        try:
+            items, cursor = rate_store.query_history(
+                base_currency, int(start), int(end), limit=page_size, cursor=cursor
+            )
+        except DatabaseError as e:
+            handle_database_error(e, request_id, f'while querying rate history for {base_currency}')
+        
+        for item in items:
+            rates, keyframe = _decode_entry(item, keyframe, request_id)
+            yield int(item['fetched_at']), rates
+        
+        if cursor is None:
+            return
+
+
+def encode_page_token(fetched_at):
+    return base64.urlsafe_b64encode(json.dumps({'after': fetched_at}).encode()).decode()
+
+
+def decode_page_token(token):
+    """Return the fetched_at a page token resumes after; raises ValueError for a bad token."""
+    try:
+        return int(json.loads(base64.urlsafe_b64decode(token.encode()))['after'])
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError, KeyError, TypeError, ValueError):
+        raise ValueError('Invalid next_token')
+
+
+def to_iso(timestamp):
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat()
+
+
+def _history_point(fetched_at, rates, from_currency, to_currency):
+    try:
+        rate = derive_rate(rates, from_currency, to_currency)
+    except ValueError:
+        rate = None
+    return {'fetched_at': to_iso(fetched_at), 'rate': rate}
+
+
+def get_pair_rate_at(from_currency, to_currency, timestamp, request_id=None):
+    """The pair's rate as it was at timestamp, derived from the anchor history, or None."""
+    entry = get_rates_at(ANCHOR_CURRENCY, timestamp, request_id)
+    if entry is None:
+        return None
+    fetched_at, rates = entry
+    return _history_point(fetched_at, rates, from_currency, to_currency)
+
+
+def get_pair_history(from_currency, to_currency, start, end, limit, page_token=None, request_id=None):
+    """One page of the pair's rates in [start, end], oldest first, and the token for the next page."""
+    if page_token is not None:
+        start = max(int(start), decode_page_token(page_token) + 1)
+    if int(start) > int(end):
+        return [], None
+    
+    entries = iter_rates_between(ANCHOR_CURRENCY, start, end, request_id, page_size=limit + 1)
+    points = []
+    next_token = None
+    for fetched_at, rates in islice(entries, limit + 1):
+        if len(points) == limit:
+            next_token = encode_page_token(last_fetched_at)
+            break
+        points.append(_history_point(fetched_at, rates, from_currency, to_currency))
+        last_fetched_at = fetched_at
+    
+    return points, next_token
@@ -0,0 +1,135 @@
+import logging
+
+logger = logging.getLogger()
+
+
+class RateProvider:
+    """Adapter for one rates API; normalizes its payload to the {currency: rate} dict."""
+
+    kind = None
+    default_url = None
+
+    def __init__(self, base_url=None, name=None):
+        self.base_url = (base_url or self.default_url).rstrip('/')
+        self.name = name or self.kind
+
+    def build_url(self, base_currency):
+        return f'{self.base_url}/{base_currency}'
+
+    def is_unsupported(self, status_code, data=None):
+        return status_code == 404
+
+    def parse_rates(self, data, base_currency):
+        if not isinstance(data, dict) or not isinstance(data.get('rates'), dict):
+            raise ValueError(f'Invalid response format from {self.name} for {base_currency}')
+        return data['rates']
+
+    def body_version(self, data):
+        """The provider's own publication marker in the payload, if it has one."""
+        return None
+
+    def validators_from(self, headers, data=None):
+        """Collect what a later conditional request can be checked against."""
+        body_version = self.body_version(data)
+        validators = {
+            'provider': self.name,
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'body_version': str(body_version) if body_version is not None else None
+        }
+        return {key: value for key, value in validators.items() if value is not None}
+
+    def conditional_headers(self, validators):
+        """If-None-Match / If-Modified-Since for validators this provider issued, else none."""
+        if not validators or validators.get('provider') != self.name:
+            return {}
+        headers = {}
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+        return headers
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.base_url!r})'
+
+
+class ExchangeRateApiProvider(RateProvider):
+    """exchangerate-api.com v4: GET {url}/{base} -> {"base": ..., "rates": {...}}."""
+
+    kind = 'exchangerate_api'
+    default_url = 'https://api.exchangerate-api.com/v4/latest'
+
+    def body_version(self, data):
+        return data.get('time_last_updated') if isinstance(data, dict) else None
+
+
+class OpenErApiProvider(RateProvider):
+    """open.er-api.com v6: same shape plus a result field; errors come back as result=error."""
+
+    kind = 'open_er_api'
+    default_url = 'https://open.er-api.com/v6/latest'
+
+    def is_unsupported(self, status_code, data=None):
+        if status_code == 404:
+            return True
+        return isinstance(data, dict) and data.get('error-type') == 'unsupported-code'
+
+    def parse_rates(self, data, base_currency):
+        if isinstance(data, dict) and data.get('result') == 'error':
+            raise ValueError(f'{self.name} returned error {data.get("error-type")} for {base_currency}')
+        return super().parse_rates(data, base_currency)
+
+    def body_version(self, data):
+        return data.get('time_last_update_unix') if isinstance(data, dict) else None
+
+
+class FrankfurterProvider(RateProvider):
+    """Frankfurter (ECB rates): GET {url}/latest?from={base}; the base is left out of rates."""
+
+    kind = 'frankfurter'
+    default_url = 'https://api.frankfurter.app'
+
+    def build_url(self, base_currency):
+        return f'{self.base_url}/latest?from={base_currency}'
+
+    def is_unsupported(self, status_code, data=None):
+        return status_code in (404, 422)
+
+    def parse_rates(self, data, base_currency):
+        rates = dict(super().parse_rates(data, base_currency))
+        rates.setdefault(base_currency, 1.0)
+        return rates
+
+    def body_version(self, data):
+        return data.get('date') if isinstance(data, dict) else None
+
+
+PROVIDER_TYPES = {
+    provider_type.kind: provider_type
+    for provider_type in (ExchangeRateApiProvider, OpenErApiProvider, FrankfurterProvider)
+}
+
+
+def create_providers(spec, primary_url=None):
+    """Parse 'kind[=url],kind[=url]' into providers, in priority order.
+
+    exchangerate_api without an explicit url uses primary_url (EXCHANGE_RATE_API_URL).
+    Unknown kinds are logged and skipped.
+    """
+    providers = []
+    for entry in (spec or '').split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        kind, _, url = entry.partition('=')
+        kind = kind.strip().lower()
+        provider_type = PROVIDER_TYPES.get(kind)
+        if provider_type is None:
+            logger.warning(f'Unknown rate provider: {kind}, skipping')
+            continue
+        if not url.strip() and provider_type is ExchangeRateApiProvider:
+            url = primary_url
+        name = kind if all(p.name != kind for p in providers) else f'{kind}_{len(providers) + 1}'
+        providers.append(provider_type(url.strip() if url else None, name=name))
+    return providers
@@ -1,5 +1,6 @@
 import json
 import logging
+from datetime import datetime, timezone
 from exceptions import RequestParsingError
 from utils.logging_helpers import create_log_extra
 
@@ -47,3 +48,50 @@ def extract_request_data(body):
     return amount, from_currency, to_currency
 
 
+def extract_batch_items(body):
+    items = body.get('items') if isinstance(body, dict) else None
+    if not isinstance(items, list):
+        raise RequestParsingError('Request body must contain an items array')
+    return items
+
+
+def parse_timestamp(value, name):
+    """Parse epoch seconds or an ISO 8601 date/time (UTC when no offset is given) into epoch seconds."""
+    if value is None or str(value).strip() == '':
+        return None
+    
+    value = str(value).strip()
+    if value.isdigit():
+        return int(value)
+    
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise RequestParsingError(f'Invalid {name}. Use epoch seconds or an ISO 8601 date/time.')
+    
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+def extract_history_query(event):
+    params = event.get('queryStringParameters') or {}
+    
+    limit = params.get('limit')
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise RequestParsingError('Invalid limit. Must be an integer.')
+        if limit < 1:
+            raise RequestParsingError('Invalid limit. Must be at least 1.')
+    
+    return {
+        'from': (params.get('from') or '').upper(),
+        'to': (params.get('to') or '').upper(),
+        'at': parse_timestamp(params.get('at'), 'at'),
+        'start': parse_timestamp(params.get('start'), 'start'),
+        'end': parse_timestamp(params.get('end'), 'end'),
+        'limit': limit,
+        'next_token': params.get('next_token')
+    }
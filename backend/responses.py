@@ -37,19 +37,26 @@ def get_cors_headers():
     }
 
 
-def create_response(status_code, body, request_origin=None):
+def create_response(status_code, body, request_origin=None, headers=None):
     allowed_origin = get_allowed_origin(request_origin)
     cors_headers = get_cors_headers()
     
-    headers = {
+    response_headers = {
         'Access-Control-Allow-Origin': allowed_origin,
-        **cors_headers
+        **cors_headers,
+        **(headers or {})
     }
     
     return {
         'statusCode': status_code,
-        'headers': headers,
+        'headers': response_headers,
         'body': json.dumps(body, default=str)
     }
 
 
+def create_text_response(status_code, text, content_type, request_origin=None):
+    """Like create_response, for bodies that are not JSON documents, such as NDJSON or CSV."""
+    response = create_response(status_code, None, request_origin)
+    response['headers']['Content-Type'] = content_type
+    response['body'] = text
+    return response
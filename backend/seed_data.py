@@ -1,10 +1,9 @@
 import boto3
-import json
 import logging
-from decimal import Decimal
 import os
+import time
 from botocore.exceptions import BotoCoreError, ClientError
-from exceptions import DatabaseError
+from rate_codec import pack_rates
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
@@ -13,56 +12,49 @@ REGION = 'us-east-1'
 STAGE = os.environ.get('STAGE', 'dev')
 TABLE_NAME = f'currency-rates-{STAGE}'
 
-CURRENCY_RATES = [
-    ('USD', 'BRL', 5.20),
-    ('USD', 'EUR', 0.92),
-    ('USD', 'GBP', 0.79),
-    ('USD', 'JPY', 150.00),
-    ('BRL', 'USD', 0.19),
-    ('BRL', 'EUR', 0.18),
-    ('BRL', 'GBP', 0.15),
-    ('BRL', 'JPY', 28.85),
-    ('EUR', 'USD', 1.09),
-    ('EUR', 'BRL', 5.65),
-    ('EUR', 'GBP', 0.86),
-    ('EUR', 'JPY', 163.04),
-    ('GBP', 'USD', 1.27),
-    ('GBP', 'BRL', 6.58),
-    ('GBP', 'EUR', 1.16),
-    ('GBP', 'JPY', 189.87),
-    ('JPY', 'USD', 0.0067),
-    ('JPY', 'BRL', 0.035),
-    ('JPY', 'EUR', 0.0061),
-    ('JPY', 'GBP', 0.0053),
-]
+ANCHOR_CURRENCY = os.environ.get('RATE_ANCHOR_CURRENCY', 'USD')
+
+# Sample rates quoted against USD; every pair is derived from them as rate(to) / rate(from).
+USD_RATES = {
+    'USD': 1.0,
+    'BRL': 5.20,
+    'EUR': 0.92,
+    'GBP': 0.79,
+    'JPY': 150.00,
+}
+
+def get_anchor_rates(anchor_currency=ANCHOR_CURRENCY):
+    """The sample rates re-quoted against the anchor, which is what its snapshot holds."""
+    if anchor_currency not in USD_RATES:
+        raise ValueError(f'No sample rate for anchor currency {anchor_currency}')
+    anchor_rate = USD_RATES[anchor_currency]
+    return {currency: rate / anchor_rate for currency, rate in USD_RATES.items()}
 
 def seed_table():
     dynamodb = boto3.resource('dynamodb', region_name=REGION)
     table = dynamodb.Table(TABLE_NAME)
     
-    logger.info(f'Populating table {TABLE_NAME}...')
+    logger.info(f'Populating table {TABLE_NAME} with the {ANCHOR_CURRENCY} rate snapshot...')
     
-    items_added = 0
-    for from_currency, to_currency, rate in CURRENCY_RATES:
-        try:
-            table.put_item(
-                Item={
-                    'from_currency': from_currency,
-                    'to_currency': to_currency,
-                    'rate': Decimal(str(rate))
-                }
-            )
-            items_added += 1
-            logger.info(f'Added: {from_currency} -> {to_currency} = {rate}')
-        except (BotoCoreError, ClientError) as e:
-            logger.error(f'Database error adding {from_currency} -> {to_currency}: {e}')
-        except (ValueError, TypeError) as e:
-            logger.error(f'Invalid data error adding {from_currency} -> {to_currency}: {e}')
-        except Exception as e:
-            logger.error(f'Unexpected error adding {from_currency} -> {to_currency}: {e}')
+    fetched_at = int(time.time())
     
-    logger.info(f'Total of {items_added} rates added to table {TABLE_NAME}')
+    try:
+        anchor_rates = get_anchor_rates()
+        table.put_item(
+            Item={
+                'from_currency': ANCHOR_CURRENCY,
+                'to_currency': '#snapshot',
+                'packed_rates': pack_rates(anchor_rates, fetched_at),
+                'fetched_at': fetched_at
+            }
+        )
+        logger.info(f'Total of {len(anchor_rates)} rates added to table {TABLE_NAME}')
+    except (BotoCoreError, ClientError) as e:
+        logger.error(f'Database error adding {ANCHOR_CURRENCY} snapshot: {e}')
+    except (ValueError, TypeError) as e:
+        logger.error(f'Invalid data error adding {ANCHOR_CURRENCY} snapshot: {e}')
+    except Exception as e:
+        logger.error(f'Unexpected error adding {ANCHOR_CURRENCY} snapshot: {e}')
 
 if __name__ == '__main__':
     seed_table()
-
@@ -0,0 +1,46 @@
+import os
+import logging
+from exceptions import ConfigurationError
+from stores.base import RateStore, UserStore
+from stores.memory import MemoryRateStore, MemoryUserStore
+from stores.sqlite import SQLiteDatabase, SQLiteRateStore, SQLiteUserStore
+from utils.config_validator import is_production
+
+logger = logging.getLogger()
+
+STORE_BACKENDS = ('dynamodb', 'memory', 'sqlite')
+
+
+def get_store_backend():
+    """Where rates and users are kept: dynamodb (default), memory or sqlite."""
+    backend = os.environ.get('STORE_BACKEND', 'dynamodb').strip().lower()
+    if backend not in STORE_BACKENDS:
+        if is_production():
+            raise ConfigurationError(f'STORE_BACKEND must be one of: {", ".join(STORE_BACKENDS)}')
+        logger.warning(f'Invalid STORE_BACKEND value: {backend}, using default dynamodb')
+        return 'dynamodb'
+    return backend
+
+
+def get_sqlite_path():
+    return os.environ.get('SQLITE_PATH') or 'liquid.db'
+
+
+def create_stores(backend=None):
+    """Build the (RateStore, UserStore) pair for a backend, the configured one by default."""
+    backend = backend or get_store_backend()
+    
+    if backend == 'memory':
+        return MemoryRateStore(), MemoryUserStore()
+    
+    if backend == 'sqlite':
+        database = SQLiteDatabase(get_sqlite_path())
+        return SQLiteRateStore(database), SQLiteUserStore(database)
+    
+    # Imported here so the memory and SQLite backends run without boto3 installed.
+    from stores.dynamodb import DynamoDBRateStore, DynamoDBUserStore, get_dynamodb_resource
+    dynamodb = get_dynamodb_resource()
+    return DynamoDBRateStore.from_environment(dynamodb), DynamoDBUserStore.from_environment(dynamodb)
+
+
+rate_store, user_store = create_stores()
@@ -0,0 +1,87 @@
+class RateStore:
+    """Persistence for rate snapshots, the rate history and the items that coordinate refreshes.
+    
+    Backend failures are raised as DatabaseError.
+    """
+
+    def load_snapshot(self, base_currency):
+        """The stored snapshot for a base currency, or None."""
+        raise NotImplementedError
+
+    def save_snapshot(self, snapshot):
+        raise NotImplementedError
+
+    def save_snapshots(self, snapshots):
+        """Write several snapshots in one batch."""
+        raise NotImplementedError
+
+    def save_snapshot_expiry(self, snapshot):
+        """Write only the expiry and validators of an already stored snapshot."""
+        raise NotImplementedError
+
+    def save_unsupported(self, base_currency, reason, expires_at):
+        raise NotImplementedError
+
+    def load_unsupported(self, base_currency):
+        """(reason, expires_at) remembered for a base currency, or None."""
+        raise NotImplementedError
+
+    def acquire_lease(self, base_currency, owner, expires_at, now):
+        """Take the refresh lease for a base unless another owner holds one that is still live.
+        
+        Returns False when the lease is held elsewhere.
+        """
+        raise NotImplementedError
+
+    def release_lease(self, base_currency, owner):
+        """Drop the lease if owner still holds it."""
+        raise NotImplementedError
+
+    def put_history_entry(self, item):
+        """Store a history item: base_currency, fetched_at, kind, packed_rates and optionally keyframe_at and ttl.
+        
+        The first item written for a (base_currency, fetched_at) wins: returns False, without
+        writing, when that second already has an entry.
+        """
+        raise NotImplementedError
+
+    def get_history_entry(self, base_currency, fetched_at):
+        raise NotImplementedError
+
+    def query_history(self, base_currency, start=None, end=None, newest_first=False, limit=None, cursor=None):
+        """One page of history items with start <= fetched_at <= end, and the cursor of the next page or None."""
+        raise NotImplementedError
+
+
+class UserStore:
+    """Persistence for user items keyed by user_id. Backend failures are raised as DatabaseError."""
+
+    def get_user(self, user_id):
+        """The user item, or None."""
+        raise NotImplementedError
+
+    def put_user(self, user):
+        raise NotImplementedError
+
+    def put_refresh_token(self, digest, record):
+        """Store a refresh token record (user_id, username, issued_at, expires_at) under its digest."""
+        raise NotImplementedError
+
+    def consume_refresh_token(self, digest):
+        """Atomically remove and return the record for a digest, or None; each token is redeemed once."""
+        raise NotImplementedError
+
+    def add_quota_usage(self, user_id, endpoint, window_start, count, expires_at):
+        """Atomically add count to the caller's counter for one quota window and return the new total."""
+        raise NotImplementedError
+
+    def get_login_failures(self, key, now):
+        """The failed login record (failures, last_failure_at) for a username or IP key, or None once it expired."""
+        raise NotImplementedError
+
+    def add_login_failure(self, key, now, expires_at):
+        """Atomically count one more failed login for key, starting over if its record expired, and return the record."""
+        raise NotImplementedError
+
+    def clear_login_failures(self, key):
+        raise NotImplementedError
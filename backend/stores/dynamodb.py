@@ -0,0 +1,368 @@
+import os
+import boto3
+import logging
+from decimal import Decimal
+from contextlib import contextmanager
+from boto3.dynamodb.conditions import Key
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+from exceptions import DatabaseError, ConfigurationError
+from rate_codec import pack_rates, unpack_rates
+from rate_engine import RateSnapshot
+from stores.base import RateStore, UserStore
+from utils.config_validator import is_production
+
+logger = logging.getLogger()
+
+SNAPSHOT_SORT_KEY = '#snapshot'
+LEASE_SORT_KEY = '#lease'
+UNSUPPORTED_SORT_KEY = '#unsupported'
+REFRESH_TOKEN_PREFIX = 'REFRESH#'
+QUOTA_PREFIX = 'QUOTA#'
+LOGIN_FAILURES_PREFIX = 'LOGIN#'
+
+
+def _get_float_env(name, default):
+    value_str = os.environ.get(name)
+    if not value_str:
+        return default
+    try:
+        return float(value_str)
+    except ValueError:
+        logger.warning(f'Invalid {name} value: {value_str}, using default {default}')
+        return default
+
+def get_dynamodb_config():
+    """Short timeouts and standard-mode retries (exponential backoff with jitter) instead of
+    the boto defaults, so DynamoDB calls fit inside the Lambda's remaining time."""
+    return Config(
+        connect_timeout=_get_float_env('DYNAMODB_CONNECT_TIMEOUT', 1.0),
+        read_timeout=_get_float_env('DYNAMODB_READ_TIMEOUT', 2.0),
+        retries={'mode': 'standard', 'max_attempts': int(_get_float_env('DYNAMODB_MAX_ATTEMPTS', 3))}
+    )
+
+def get_dynamodb_resource():
+    region = os.environ.get('AWS_DEFAULT_REGION', 'us-east-1')
+    return boto3.resource('dynamodb', region_name=region, config=get_dynamodb_config())
+
+
+def _get_table_name(env_name, default):
+    table_name = os.environ.get(env_name)
+    if not table_name:
+        if is_production():
+            raise ConfigurationError(f'{env_name} environment variable is required in production')
+        return default
+    return table_name
+
+def get_currency_table_name():
+    return _get_table_name('CURRENCY_TABLE', 'currency-rates-dev')
+
+def get_history_table_name():
+    return _get_table_name('HISTORY_TABLE', 'currency-rates-history-dev')
+
+def get_users_table_name():
+    return _get_table_name('USERS_TABLE', 'users-dev')
+
+
+def get_snapshot_format():
+    """Format new snapshot items are written in: 'packed' (binary) or 'map'. Both are always readable."""
+    snapshot_format = os.environ.get('SNAPSHOT_FORMAT', 'packed').strip().lower()
+    if snapshot_format not in ('packed', 'map'):
+        logger.warning(f'Invalid SNAPSHOT_FORMAT value: {snapshot_format}, using default packed')
+        return 'packed'
+    return snapshot_format
+
+
+def snapshot_from_item(item):
+    """Decode a snapshot item, packed or in the older map-of-Decimal format."""
+    if 'packed_rates' in item:
+        packed = item['packed_rates']
+        rates, _ = unpack_rates(getattr(packed, 'value', packed))
+    else:
+        rates = {currency: float(rate) for currency, rate in item['rates'].items()}
+    
+    return RateSnapshot(
+        item['from_currency'],
+        rates,
+        int(item['fetched_at']),
+        int(item['ttl']) if 'ttl' in item else None,
+        validators=item.get('validators')
+    )
+
+
+def snapshot_to_item(snapshot):
+    item = {
+        'from_currency': snapshot.base_currency,
+        'to_currency': SNAPSHOT_SORT_KEY,
+        'fetched_at': snapshot.fetched_at,
+        'ttl': snapshot.expires_at
+    }
+    if get_snapshot_format() == 'packed':
+        item['packed_rates'] = pack_rates(snapshot.rates, snapshot.version)
+    else:
+        item['rates'] = {currency: Decimal(str(rate)) for currency, rate in snapshot.rates.items()}
+    if snapshot.validators:
+        item['validators'] = dict(snapshot.validators)
+    return item
+
+
+@contextmanager
+def _database_errors(operation):
+    try:
+        yield
+    except (BotoCoreError, ClientError) as e:
+        raise DatabaseError(f'DynamoDB error {operation}: {str(e)}') from e
+
+
+def _is_condition_failure(error):
+    return error.response.get('Error', {}).get('Code') == 'ConditionalCheckFailedException'
+
+
+class DynamoDBRateStore(RateStore):
+    """Snapshots, lease and unsupported markers share the currency table under reserved sort keys;
+    the history lives in its own table keyed by base_currency and fetched_at."""
+
+    def __init__(self, table, history_table):
+        self.table = table
+        self.history_table = history_table
+
+    @classmethod
+    def from_environment(cls, dynamodb=None):
+        dynamodb = dynamodb or get_dynamodb_resource()
+        return cls(dynamodb.Table(get_currency_table_name()), dynamodb.Table(get_history_table_name()))
+
+    def load_snapshot(self, base_currency):
+        with _database_errors(f'fetching rate snapshot for {base_currency}'):
+            response = self.table.get_item(
+                Key={
+                    'from_currency': base_currency,
+                    'to_currency': SNAPSHOT_SORT_KEY
+                }
+            )
+        
+        if 'Item' not in response:
+            return None
+        return snapshot_from_item(response['Item'])
+
+    def save_snapshot(self, snapshot):
+        with _database_errors(f'saving rate snapshot for {snapshot.base_currency}'):
+            self.table.put_item(Item=snapshot_to_item(snapshot))
+
+    def save_snapshots(self, snapshots):
+        with _database_errors('saving rate snapshots'):
+            with self.table.batch_writer() as batch:
+                for snapshot in snapshots:
+                    batch.put_item(Item=snapshot_to_item(snapshot))
+
+    def save_snapshot_expiry(self, snapshot):
+        with _database_errors(f'extending rate snapshot ttl for {snapshot.base_currency}'):
+            self.table.update_item(
+                Key={'from_currency': snapshot.base_currency, 'to_currency': SNAPSHOT_SORT_KEY},
+                UpdateExpression='SET #ttl = :ttl, validators = :validators',
+                ExpressionAttributeNames={'#ttl': 'ttl'},
+                ExpressionAttributeValues={':ttl': snapshot.expires_at, ':validators': snapshot.validators or {}}
+            )
+
+    def save_unsupported(self, base_currency, reason, expires_at):
+        with _database_errors(f'saving unsupported currency {base_currency}'):
+            self.table.put_item(
+                Item={
+                    'from_currency': base_currency,
+                    'to_currency': UNSUPPORTED_SORT_KEY,
+                    'reason': reason,
+                    'ttl': expires_at
+                }
+            )
+
+    def load_unsupported(self, base_currency):
+        with _database_errors(f'fetching unsupported currency {base_currency}'):
+            response = self.table.get_item(
+                Key={
+                    'from_currency': base_currency,
+                    'to_currency': UNSUPPORTED_SORT_KEY
+                }
+            )
+        
+        item = response.get('Item')
+        if not item:
+            return None
+        return item['reason'], int(item.get('ttl', 0))
+
+    def acquire_lease(self, base_currency, owner, expires_at, now):
+        try:
+            self.table.put_item(
+                Item={
+                    'from_currency': base_currency,
+                    'to_currency': LEASE_SORT_KEY,
+                    'owner': owner,
+                    'ttl': expires_at
+                },
+                ConditionExpression='attribute_not_exists(from_currency) OR #ttl < :now',
+                ExpressionAttributeNames={'#ttl': 'ttl'},
+                ExpressionAttributeValues={':now': now}
+            )
+            return True
+        except ClientError as e:
+            if _is_condition_failure(e):
+                return False
+            raise DatabaseError(f'DynamoDB error acquiring refresh lease for {base_currency}: {str(e)}') from e
+        except BotoCoreError as e:
+            raise DatabaseError(f'DynamoDB error acquiring refresh lease for {base_currency}: {str(e)}') from e
+
+    def release_lease(self, base_currency, owner):
+        with _database_errors(f'releasing refresh lease for {base_currency}'):
+            self.table.delete_item(
+                Key={'from_currency': base_currency, 'to_currency': LEASE_SORT_KEY},
+                ConditionExpression='#owner = :owner',
+                ExpressionAttributeNames={'#owner': 'owner'},
+                ExpressionAttributeValues={':owner': owner}
+            )
+
+    def put_history_entry(self, item):
+        # Entries are keyed to the second, so another container may already have written this one.
+        try:
+            self.history_table.put_item(Item=item, ConditionExpression='attribute_not_exists(fetched_at)')
+            return True
+        except ClientError as e:
+            if _is_condition_failure(e):
+                return False
+            raise DatabaseError(f'DynamoDB error appending rate history for {item["base_currency"]}: {str(e)}') from e
+        except BotoCoreError as e:
+            raise DatabaseError(f'DynamoDB error appending rate history for {item["base_currency"]}: {str(e)}') from e
+
+    def get_history_entry(self, base_currency, fetched_at):
+        with _database_errors(f'loading rate history for {base_currency}'):
+            response = self.history_table.get_item(
+                Key={'base_currency': base_currency, 'fetched_at': fetched_at}
+            )
+        return response.get('Item')
+
+    def query_history(self, base_currency, start=None, end=None, newest_first=False, limit=None, cursor=None):
+        condition = Key('base_currency').eq(base_currency)
+        if start is not None and end is not None:
+            condition = condition & Key('fetched_at').between(int(start), int(end))
+        elif end is not None:
+            condition = condition & Key('fetched_at').lte(int(end))
+        elif start is not None:
+            condition = condition & Key('fetched_at').gte(int(start))
+        
+        query_options = {'KeyConditionExpression': condition, 'ScanIndexForward': not newest_first}
+        if limit:
+            query_options['Limit'] = limit
+        if cursor:
+            query_options['ExclusiveStartKey'] = cursor
+        
+        with _database_errors(f'querying rate history for {base_currency}'):
+            response = self.history_table.query(**query_options)
+        return response.get('Items', []), response.get('LastEvaluatedKey')
+
+
+def refresh_token_to_item(digest, record):
+    """Refresh tokens live in the users table under REFRESH#<digest>, removed by its ttl."""
+    return {
+        'user_id': f'{REFRESH_TOKEN_PREFIX}{digest}',
+        'owner_id': record['user_id'],
+        'username': record['username'],
+        'issued_at': record['issued_at'],
+        'ttl': record['expires_at']
+    }
+
+
+def refresh_token_from_item(item):
+    return {
+        'user_id': item['owner_id'],
+        'username': item['username'],
+        'issued_at': int(item['issued_at']),
+        'expires_at': int(item['ttl'])
+    }
+
+
+def login_failures_from_item(item):
+    return {'failures': int(item['failures']), 'last_failure_at': int(item['last_failure_at'])}
+
+
+class DynamoDBUserStore(UserStore):
+
+    def __init__(self, table):
+        self.table = table
+
+    @classmethod
+    def from_environment(cls, dynamodb=None):
+        dynamodb = dynamodb or get_dynamodb_resource()
+        return cls(dynamodb.Table(get_users_table_name()))
+
+    def get_user(self, user_id):
+        with _database_errors(f'fetching user {user_id}'):
+            response = self.table.get_item(
+                Key={'user_id': user_id}
+            )
+        return response.get('Item')
+
+    def put_user(self, user):
+        with _database_errors(f'saving user {user.get("user_id")}'):
+            self.table.put_item(Item=user)
+
+    def put_refresh_token(self, digest, record):
+        with _database_errors('saving refresh token'):
+            self.table.put_item(Item=refresh_token_to_item(digest, record))
+
+    def consume_refresh_token(self, digest):
+        # A delete returning the old item is one atomic round trip: only one caller gets it.
+        with _database_errors('redeeming refresh token'):
+            response = self.table.delete_item(
+                Key={'user_id': f'{REFRESH_TOKEN_PREFIX}{digest}'},
+                ReturnValues='ALL_OLD'
+            )
+        item = response.get('Attributes')
+        return refresh_token_from_item(item) if item else None
+
+    def add_quota_usage(self, user_id, endpoint, window_start, count, expires_at):
+        # Counters share the users table as QUOTA#<user>#<endpoint>#<window> items removed by their ttl.
+        with _database_errors(f'adding quota usage for {user_id}'):
+            response = self.table.update_item(
+                Key={'user_id': f'{QUOTA_PREFIX}{user_id}#{endpoint}#{window_start}'},
+                UpdateExpression='ADD requests :count SET #ttl = :ttl',
+                ExpressionAttributeNames={'#ttl': 'ttl'},
+                ExpressionAttributeValues={':count': count, ':ttl': expires_at},
+                ReturnValues='UPDATED_NEW'
+            )
+        return int(response['Attributes']['requests'])
+
+    def get_login_failures(self, key, now):
+        with _database_errors('fetching failed logins'):
+            response = self.table.get_item(
+                Key={'user_id': f'{LOGIN_FAILURES_PREFIX}{key}'}
+            )
+        item = response.get('Item')
+        # TTL deletion lags by hours, so an expired item may still be returned.
+        if not item or int(item.get('ttl', 0)) <= now:
+            return None
+        return login_failures_from_item(item)
+
+    def add_login_failure(self, key, now, expires_at):
+        item_key = {'user_id': f'{LOGIN_FAILURES_PREFIX}{key}'}
+        try:
+            response = self.table.update_item(
+                Key=item_key,
+                UpdateExpression='ADD failures :one SET last_failure_at = :now, #ttl = :ttl',
+                ConditionExpression='attribute_not_exists(user_id) OR #ttl > :now',
+                ExpressionAttributeNames={'#ttl': 'ttl'},
+                ExpressionAttributeValues={':one': 1, ':now': now, ':ttl': expires_at},
+                ReturnValues='ALL_NEW'
+            )
+            return login_failures_from_item(response['Attributes'])
+        except ClientError as e:
+            if not _is_condition_failure(e):
+                raise DatabaseError(f'DynamoDB error recording failed login: {str(e)}') from e
+        except BotoCoreError as e:
+            raise DatabaseError(f'DynamoDB error recording failed login: {str(e)}') from e
+        
+        # The record expired but TTL has not removed it yet: start counting again.
+        item = {**item_key, 'failures': 1, 'last_failure_at': now, 'ttl': expires_at}
+        with _database_errors('recording failed login'):
+            self.table.put_item(Item=item)
+        return login_failures_from_item(item)
+
+    def clear_login_failures(self, key):
+        with _database_errors('clearing failed logins'):
+            self.table.delete_item(Key={'user_id': f'{LOGIN_FAILURES_PREFIX}{key}'})
@@ -0,0 +1,162 @@
+import time
+import copy
+import threading
+from rate_engine import RateSnapshot
+from stores.base import RateStore, UserStore
+
+
+def _copy_snapshot(snapshot):
+    return RateSnapshot(
+        snapshot.base_currency,
+        dict(snapshot.rates),
+        snapshot.fetched_at,
+        snapshot.expires_at,
+        validators=dict(snapshot.validators) if snapshot.validators else None
+    )
+
+
+def _is_expired(item, now):
+    return item.get('ttl') is not None and int(item['ttl']) <= now
+
+
+class MemoryRateStore(RateStore):
+    """Process-local store for tests, benchmarks and single-process runs; nothing is persisted."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshots = {}
+        self._unsupported = {}
+        self._leases = {}
+        self._history = {}
+
+    def load_snapshot(self, base_currency):
+        with self._lock:
+            snapshot = self._snapshots.get(base_currency)
+        return _copy_snapshot(snapshot) if snapshot is not None else None
+
+    def save_snapshot(self, snapshot):
+        with self._lock:
+            self._snapshots[snapshot.base_currency] = _copy_snapshot(snapshot)
+
+    def save_snapshots(self, snapshots):
+        with self._lock:
+            for snapshot in snapshots:
+                self._snapshots[snapshot.base_currency] = _copy_snapshot(snapshot)
+
+    def save_snapshot_expiry(self, snapshot):
+        with self._lock:
+            stored = self._snapshots.get(snapshot.base_currency)
+            if stored is not None:
+                self._snapshots[snapshot.base_currency] = stored.with_expiry(snapshot.expires_at, snapshot.validators)
+
+    def save_unsupported(self, base_currency, reason, expires_at):
+        with self._lock:
+            self._unsupported[base_currency] = (reason, expires_at)
+
+    def load_unsupported(self, base_currency):
+        with self._lock:
+            return self._unsupported.get(base_currency)
+
+    def acquire_lease(self, base_currency, owner, expires_at, now):
+        with self._lock:
+            lease = self._leases.get(base_currency)
+            if lease is not None and lease[1] >= now:
+                return False
+            self._leases[base_currency] = (owner, expires_at)
+            return True
+
+    def release_lease(self, base_currency, owner):
+        with self._lock:
+            lease = self._leases.get(base_currency)
+            if lease is not None and lease[0] == owner:
+                del self._leases[base_currency]
+
+    def put_history_entry(self, item):
+        with self._lock:
+            entries = self._history.setdefault(item['base_currency'], {})
+            if int(item['fetched_at']) in entries:
+                return False
+            entries[int(item['fetched_at'])] = copy.deepcopy(item)
+            return True
+
+    def get_history_entry(self, base_currency, fetched_at):
+        with self._lock:
+            item = self._history.get(base_currency, {}).get(int(fetched_at))
+        if item is None or _is_expired(item, time.time()):
+            return None
+        return copy.deepcopy(item)
+
+    def query_history(self, base_currency, start=None, end=None, newest_first=False, limit=None, cursor=None):
+        now = time.time()
+        with self._lock:
+            entries = self._history.get(base_currency, {})
+            keys = sorted(
+                (
+                    fetched_at for fetched_at, item in entries.items()
+                    if (start is None or fetched_at >= start)
+                    and (end is None or fetched_at <= end)
+                    and (cursor is None or (fetched_at < cursor if newest_first else fetched_at > cursor))
+                    and not _is_expired(item, now)
+                ),
+                reverse=newest_first
+            )
+            page = keys[:limit] if limit else keys
+            items = [copy.deepcopy(entries[fetched_at]) for fetched_at in page]
+        
+        next_cursor = page[-1] if limit and len(keys) > limit else None
+        return items, next_cursor
+
+
+class MemoryUserStore(UserStore):
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users = {}
+        self._refresh_tokens = {}
+        self._quota_usage = {}
+        self._login_failures = {}
+
+    def get_user(self, user_id):
+        with self._lock:
+            user = self._users.get(user_id)
+        return copy.deepcopy(user) if user is not None else None
+
+    def put_user(self, user):
+        with self._lock:
+            self._users[user['user_id']] = copy.deepcopy(user)
+
+    def put_refresh_token(self, digest, record):
+        with self._lock:
+            self._refresh_tokens[digest] = dict(record)
+
+    def consume_refresh_token(self, digest):
+        with self._lock:
+            return self._refresh_tokens.pop(digest, None)
+
+    def add_quota_usage(self, user_id, endpoint, window_start, count, expires_at):
+        key = (user_id, endpoint, window_start)
+        with self._lock:
+            self._quota_usage = {
+                other: usage for other, usage in self._quota_usage.items() if usage[1] > window_start
+            }
+            requests = self._quota_usage.get(key, (0, expires_at))[0] + count
+            self._quota_usage[key] = (requests, expires_at)
+            return requests
+
+    def get_login_failures(self, key, now):
+        with self._lock:
+            record = self._login_failures.get(key)
+            if record is None or record['expires_at'] <= now:
+                return None
+            return {'failures': record['failures'], 'last_failure_at': record['last_failure_at']}
+
+    def add_login_failure(self, key, now, expires_at):
+        with self._lock:
+            record = self._login_failures.get(key)
+            failures = record['failures'] + 1 if record is not None and record['expires_at'] > now else 1
+            self._login_failures[key] = {'failures': failures, 'last_failure_at': now, 'expires_at': expires_at}
+            return {'failures': failures, 'last_failure_at': now}
+
+    def clear_login_failures(self, key):
+        with self._lock:
+            self._login_failures.pop(key, None)
@@ -0,0 +1,316 @@
+import json
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+from exceptions import DatabaseError
+from rate_codec import pack_rates, unpack_rates
+from rate_engine import RateSnapshot
+from stores.base import RateStore, UserStore
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS snapshots (
+    base_currency TEXT PRIMARY KEY,
+    fetched_at INTEGER NOT NULL,
+    expires_at INTEGER,
+    packed_rates BLOB NOT NULL,
+    validators TEXT
+);
+CREATE TABLE IF NOT EXISTS unsupported_currencies (
+    base_currency TEXT PRIMARY KEY,
+    reason TEXT NOT NULL,
+    expires_at INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS refresh_leases (
+    base_currency TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rate_history (
+    base_currency TEXT NOT NULL,
+    fetched_at INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    keyframe_at INTEGER,
+    packed_rates BLOB NOT NULL,
+    ttl INTEGER,
+    PRIMARY KEY (base_currency, fetched_at)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS users (
+    user_id TEXT PRIMARY KEY,
+    item TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS refresh_tokens (
+    digest TEXT PRIMARY KEY,
+    item TEXT NOT NULL,
+    expires_at INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS refresh_tokens_expires_at ON refresh_tokens (expires_at);
+CREATE TABLE IF NOT EXISTS quota_usage (
+    user_id TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    window_start INTEGER NOT NULL,
+    requests INTEGER NOT NULL,
+    expires_at INTEGER NOT NULL,
+    PRIMARY KEY (user_id, endpoint, window_start)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS login_failures (
+    key TEXT PRIMARY KEY,
+    failures INTEGER NOT NULL,
+    last_failure_at INTEGER NOT NULL,
+    expires_at INTEGER NOT NULL
+);
+'''
+
+HISTORY_COLUMNS = ('base_currency', 'fetched_at', 'kind', 'keyframe_at', 'packed_rates', 'ttl')
+
+
+class SQLiteDatabase:
+    """One SQLite file in WAL mode, with a connection per thread.
+    
+    WAL lets readers in other threads and processes keep reading while a write commits,
+    and synchronous=NORMAL skips the fsync on every commit that WAL does not need.
+    """
+
+    def __init__(self, path, busy_timeout_seconds=5.0):
+        self.path = path
+        self.busy_timeout_seconds = busy_timeout_seconds
+        self._local = threading.local()
+        with self.errors('creating schema'):
+            self.connection().executescript(SCHEMA)
+
+    def connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.busy_timeout_seconds, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    @contextmanager
+    def errors(self, operation):
+        try:
+            yield
+        except sqlite3.Error as e:
+            raise DatabaseError(f'SQLite error {operation}: {str(e)}') from e
+
+    @contextmanager
+    def transaction(self, operation):
+        with self.errors(operation):
+            connection = self.connection()
+            with connection:
+                yield connection
+
+
+def _history_item(row):
+    item = dict(zip(HISTORY_COLUMNS, row))
+    item['packed_rates'] = bytes(item['packed_rates'])
+    return {key: value for key, value in item.items() if value is not None}
+
+
+class SQLiteRateStore(RateStore):
+    """Rates in a local SQLite file: snapshots are kept in the same packed format as in DynamoDB."""
+
+    def __init__(self, database):
+        self.database = database
+
+    def load_snapshot(self, base_currency):
+        with self.database.errors(f'fetching rate snapshot for {base_currency}'):
+            row = self.database.connection().execute(
+                'SELECT fetched_at, expires_at, packed_rates, validators FROM snapshots WHERE base_currency = ?',
+                (base_currency,)
+            ).fetchone()
+        
+        if row is None:
+            return None
+        fetched_at, expires_at, packed_rates, validators = row
+        rates, _ = unpack_rates(packed_rates)
+        return RateSnapshot(
+            base_currency,
+            rates,
+            fetched_at,
+            expires_at,
+            validators=json.loads(validators) if validators else None
+        )
+
+    def _snapshot_row(self, snapshot):
+        return (
+            snapshot.base_currency,
+            snapshot.fetched_at,
+            snapshot.expires_at,
+            pack_rates(snapshot.rates, snapshot.version),
+            json.dumps(snapshot.validators) if snapshot.validators else None
+        )
+
+    def save_snapshot(self, snapshot):
+        self.save_snapshots([snapshot])
+
+    def save_snapshots(self, snapshots):
+        with self.database.transaction('saving rate snapshots') as connection:
+            connection.executemany(
+                'INSERT OR REPLACE INTO snapshots (base_currency, fetched_at, expires_at, packed_rates, validators) '
+                'VALUES (?, ?, ?, ?, ?)',
+                [self._snapshot_row(snapshot) for snapshot in snapshots]
+            )
+
+    def save_snapshot_expiry(self, snapshot):
+        with self.database.transaction(f'extending rate snapshot ttl for {snapshot.base_currency}') as connection:
+            connection.execute(
+                'UPDATE snapshots SET expires_at = ?, validators = ? WHERE base_currency = ?',
+                (
+                    snapshot.expires_at,
+                    json.dumps(snapshot.validators) if snapshot.validators else None,
+                    snapshot.base_currency
+                )
+            )
+
+    def save_unsupported(self, base_currency, reason, expires_at):
+        with self.database.transaction(f'saving unsupported currency {base_currency}') as connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO unsupported_currencies (base_currency, reason, expires_at) VALUES (?, ?, ?)',
+                (base_currency, reason, expires_at)
+            )
+
+    def load_unsupported(self, base_currency):
+        with self.database.errors(f'fetching unsupported currency {base_currency}'):
+            row = self.database.connection().execute(
+                'SELECT reason, expires_at FROM unsupported_currencies WHERE base_currency = ?',
+                (base_currency,)
+            ).fetchone()
+        return tuple(row) if row is not None else None
+
+    def acquire_lease(self, base_currency, owner, expires_at, now):
+        with self.database.transaction(f'acquiring refresh lease for {base_currency}') as connection:
+            cursor = connection.execute(
+                'INSERT INTO refresh_leases (base_currency, owner, expires_at) VALUES (?, ?, ?) '
+                'ON CONFLICT (base_currency) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at '
+                'WHERE refresh_leases.expires_at < ?',
+                (base_currency, owner, expires_at, now)
+            )
+            return cursor.rowcount == 1
+
+    def release_lease(self, base_currency, owner):
+        with self.database.transaction(f'releasing refresh lease for {base_currency}') as connection:
+            connection.execute(
+                'DELETE FROM refresh_leases WHERE base_currency = ? AND owner = ?',
+                (base_currency, owner)
+            )
+
+    def put_history_entry(self, item):
+        with self.database.transaction(f'appending rate history for {item["base_currency"]}') as connection:
+            cursor = connection.execute(
+                f'INSERT OR IGNORE INTO rate_history ({", ".join(HISTORY_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?)',
+                tuple(item.get(column) for column in HISTORY_COLUMNS)
+            )
+            return cursor.rowcount == 1
+
+    def get_history_entry(self, base_currency, fetched_at):
+        with self.database.errors(f'loading rate history for {base_currency}'):
+            row = self.database.connection().execute(
+                f'SELECT {", ".join(HISTORY_COLUMNS)} FROM rate_history '
+                'WHERE base_currency = ? AND fetched_at = ? AND (ttl IS NULL OR ttl > ?)',
+                (base_currency, int(fetched_at), int(time.time()))
+            ).fetchone()
+        return _history_item(row) if row is not None else None
+
+    def query_history(self, base_currency, start=None, end=None, newest_first=False, limit=None, cursor=None):
+        conditions = ['base_currency = ?', '(ttl IS NULL OR ttl > ?)']
+        params = [base_currency, int(time.time())]
+        if start is not None:
+            conditions.append('fetched_at >= ?')
+            params.append(int(start))
+        if end is not None:
+            conditions.append('fetched_at <= ?')
+            params.append(int(end))
+        if cursor is not None:
+            conditions.append('fetched_at < ?' if newest_first else 'fetched_at > ?')
+            params.append(int(cursor))
+        
+        query = (
+            f'SELECT {", ".join(HISTORY_COLUMNS)} FROM rate_history WHERE {" AND ".join(conditions)} '
+            f'ORDER BY fetched_at {"DESC" if newest_first else "ASC"}'
+        )
+        if limit:
+            # One extra row tells whether another page follows.
+            query += ' LIMIT ?'
+            params.append(limit + 1)
+        
+        with self.database.errors(f'querying rate history for {base_currency}'):
+            rows = self.database.connection().execute(query, params).fetchall()
+        
+        items = [_history_item(row) for row in rows[:limit or None]]
+        next_cursor = items[-1]['fetched_at'] if limit and len(rows) > limit else None
+        return items, next_cursor
+
+
+class SQLiteUserStore(UserStore):
+
+    def __init__(self, database):
+        self.database = database
+
+    def get_user(self, user_id):
+        with self.database.errors(f'fetching user {user_id}'):
+            row = self.database.connection().execute(
+                'SELECT item FROM users WHERE user_id = ?',
+                (user_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def put_user(self, user):
+        with self.database.transaction(f'saving user {user.get("user_id")}') as connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO users (user_id, item) VALUES (?, ?)',
+                (user['user_id'], json.dumps(user, default=str))
+            )
+
+    def put_refresh_token(self, digest, record):
+        with self.database.transaction('saving refresh token') as connection:
+            # SQLite has no TTL, so tokens expired by now are swept on every issue.
+            connection.execute('DELETE FROM refresh_tokens WHERE expires_at <= ?', (record['issued_at'],))
+            connection.execute(
+                'INSERT OR REPLACE INTO refresh_tokens (digest, item, expires_at) VALUES (?, ?, ?)',
+                (digest, json.dumps(record), record['expires_at'])
+            )
+
+    def consume_refresh_token(self, digest):
+        with self.database.transaction('redeeming refresh token') as connection:
+            row = connection.execute(
+                'DELETE FROM refresh_tokens WHERE digest = ? RETURNING item',
+                (digest,)
+            ).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def add_quota_usage(self, user_id, endpoint, window_start, count, expires_at):
+        with self.database.transaction(f'adding quota usage for {user_id}') as connection:
+            connection.execute('DELETE FROM quota_usage WHERE expires_at <= ?', (window_start,))
+            row = connection.execute(
+                'INSERT INTO quota_usage (user_id, endpoint, window_start, requests, expires_at) VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT (user_id, endpoint, window_start) DO UPDATE SET requests = requests + excluded.requests '
+                'RETURNING requests',
+                (user_id, endpoint, window_start, count, expires_at)
+            ).fetchone()
+        return row[0]
+
+    def get_login_failures(self, key, now):
+        with self.database.errors('fetching failed logins'):
+            row = self.database.connection().execute(
+                'SELECT failures, last_failure_at FROM login_failures WHERE key = ? AND expires_at > ?',
+                (key, now)
+            ).fetchone()
+        return {'failures': row[0], 'last_failure_at': row[1]} if row is not None else None
+
+    def add_login_failure(self, key, now, expires_at):
+        with self.database.transaction('recording failed login') as connection:
+            connection.execute('DELETE FROM login_failures WHERE expires_at <= ?', (now,))
+            row = connection.execute(
+                'INSERT INTO login_failures (key, failures, last_failure_at, expires_at) VALUES (?, 1, ?, ?) '
+                'ON CONFLICT (key) DO UPDATE SET failures = failures + 1, '
+                'last_failure_at = excluded.last_failure_at, expires_at = excluded.expires_at '
+                'RETURNING failures, last_failure_at',
+                (key, now, expires_at)
+            ).fetchone()
+        return {'failures': row[0], 'last_failure_at': row[1]}
+
+    def clear_login_failures(self, key):
+        with self.database.transaction('clearing failed logins') as connection:
+            connection.execute('DELETE FROM login_failures WHERE key = ?', (key,))
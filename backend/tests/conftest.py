@@ -36,8 +36,16 @@ def sample_dynamodb_item():
     return {
         'Item': {
             'from_currency': 'USD',
-            'to_currency': 'BRL',
-            'rate': 5.2
+            'to_currency': '#snapshot',
+            'rates': {
+                'USD': 1,
+                'BRL': 5.2,
+                'EUR': 0.92,
+                'GBP': 0.79,
+                'JPY': 150
+            },
+            'fetched_at': 1704067200,
+            'ttl': 9999999999
         }
     }
 
@@ -1,6 +1,11 @@
+import os
 import pytest
 from unittest.mock import Mock, patch
-from auth import verify_credentials, hash_password, verify_password, create_user
+from botocore.exceptions import ClientError
+from auth import (
+    verify_credentials, hash_password, verify_password, create_user,
+    get_bcrypt_rounds, get_hash_rounds, needs_rehash, issue_refresh_token, redeem_refresh_token
+)
 from exceptions import AuthenticationError, DatabaseError
 
 
@@ -27,9 +32,31 @@ class TestHashPassword:
         
         assert verify_password(wrong_password, password_hash) is False
 
+    def test_hash_password_uses_configured_rounds(self):
+        with patch.dict(os.environ, {'BCRYPT_ROUNDS': '5'}):
+            assert get_hash_rounds(hash_password('testpassword123')) == 5
+        assert get_hash_rounds(hash_password('testpassword123', rounds=4)) == 4
+
+
+class TestBcryptRounds:
+    def test_default_rounds(self):
+        with patch.dict(os.environ, {}, clear=True):
+            assert get_bcrypt_rounds() == 12
+    
+    @pytest.mark.parametrize('value', ['abc', '3', '32'])
+    def test_invalid_rounds_fall_back(self, value):
+        with patch.dict(os.environ, {'BCRYPT_ROUNDS': value}):
+            assert get_bcrypt_rounds() == 12
+    
+    def test_needs_rehash(self):
+        with patch.dict(os.environ, {'BCRYPT_ROUNDS': '5'}):
+            assert needs_rehash('$2b$04$' + 'a' * 53) is True
+            assert needs_rehash('$2b$05$' + 'a' * 53) is False
+            assert needs_rehash('not-a-bcrypt-hash') is False
+
 
 class TestVerifyCredentials:
-    @patch('auth.users_table')
+    @patch('auth.user_store.table')
     def test_verify_credentials_success(self, mock_table):
         mock_user = {
             'user_id': 'testuser',
@@ -44,7 +71,7 @@ class TestVerifyCredentials:
         assert user is not None
         assert user['user_id'] == 'testuser'
 
-    @patch('auth.users_table')
+    @patch('auth.user_store.table')
     def test_verify_credentials_user_not_found(self, mock_table):
         mock_table.get_item.return_value = {}
         
@@ -52,7 +79,7 @@ class TestVerifyCredentials:
             verify_credentials('nonexistent', 'password123')
         assert 'Invalid credentials' in str(exc_info.value)
 
-    @patch('auth.users_table')
+    @patch('auth.user_store.table')
     def test_verify_credentials_wrong_password(self, mock_table):
         mock_user = {
             'user_id': 'testuser',
@@ -66,7 +93,7 @@ class TestVerifyCredentials:
             verify_credentials('testuser', 'wrongpassword')
         assert 'Invalid credentials' in str(exc_info.value)
 
-    @patch('auth.users_table')
+    @patch('auth.user_store.table')
     def test_verify_credentials_database_error(self, mock_table):
         mock_table.get_item.side_effect = Exception('DynamoDB error')
         
@@ -74,3 +101,101 @@ class TestVerifyCredentials:
             verify_credentials('testuser', 'password123')
         assert 'verifying credentials' in str(exc_info.value)
 
+    @patch.dict(os.environ, {'BCRYPT_ROUNDS': '5'})
+    @patch('auth.user_store.table')
+    def test_outdated_hash_upgraded_on_login(self, mock_table):
+        mock_user = {'user_id': 'testuser', 'username': 'testuser', 'password_hash': hash_password('password123', rounds=4)}
+        mock_table.get_item.return_value = {'Item': mock_user}
+        
+        verify_credentials('testuser', 'password123')
+        
+        saved = mock_table.put_item.call_args.kwargs['Item']
+        assert saved['username'] == 'testuser'
+        assert get_hash_rounds(saved['password_hash']) == 5
+        assert verify_password('password123', saved['password_hash']) is True
+    
+    @patch.dict(os.environ, {'BCRYPT_ROUNDS': '4'})
+    @patch('auth.user_store.table')
+    def test_current_hash_not_rewritten(self, mock_table):
+        mock_user = {'user_id': 'testuser', 'username': 'testuser', 'password_hash': hash_password('password123', rounds=4)}
+        mock_table.get_item.return_value = {'Item': mock_user}
+        
+        verify_credentials('testuser', 'password123')
+        
+        mock_table.put_item.assert_not_called()
+    
+    @patch.dict(os.environ, {'BCRYPT_ROUNDS': '5'})
+    @patch('auth.user_store.table')
+    def test_failed_upgrade_does_not_block_login(self, mock_table):
+        mock_user = {'user_id': 'testuser', 'username': 'testuser', 'password_hash': hash_password('password123', rounds=4)}
+        mock_table.get_item.return_value = {'Item': mock_user}
+        mock_table.put_item.side_effect = ClientError({'Error': {'Code': 'ProvisionedThroughputExceededException'}}, 'PutItem')
+        
+        user = verify_credentials('testuser', 'password123')
+        
+        assert user['user_id'] == 'testuser'
+    
+    @patch.dict(os.environ, {'BCRYPT_ROUNDS': '5'})
+    @patch('auth.user_store.table')
+    def test_wrong_password_never_rehashes(self, mock_table):
+        mock_user = {'user_id': 'testuser', 'username': 'testuser', 'password_hash': hash_password('password123', rounds=4)}
+        mock_table.get_item.return_value = {'Item': mock_user}
+        
+        with pytest.raises(AuthenticationError):
+            verify_credentials('testuser', 'wrongpassword')
+        
+        mock_table.put_item.assert_not_called()
+
+
+class TestRefreshTokens:
+    @patch('auth.user_store.table')
+    def test_issue_stores_only_the_digest(self, mock_table):
+        refresh_token = issue_refresh_token({'user_id': 'testuser', 'username': 'testuser'}, now=1704067200)
+        
+        item = mock_table.put_item.call_args.kwargs['Item']
+        assert item['user_id'].startswith('REFRESH#')
+        assert refresh_token not in item['user_id']
+        assert item['owner_id'] == 'testuser'
+        assert item['ttl'] == 1704067200 + 30 * 86400
+    
+    @patch.dict(os.environ, {'REFRESH_TOKEN_TTL_DAYS': '7'})
+    @patch('auth.user_store.table')
+    def test_redeem_is_one_delete(self, mock_table):
+        refresh_token = issue_refresh_token({'user_id': 'testuser', 'username': 'testuser'}, now=1704067200)
+        item = mock_table.put_item.call_args.kwargs['Item']
+        mock_table.delete_item.return_value = {'Attributes': item}
+        
+        user = redeem_refresh_token(refresh_token, now=1704067300)
+        
+        assert user == {'user_id': 'testuser', 'username': 'testuser'}
+        mock_table.delete_item.assert_called_once_with(Key={'user_id': item['user_id']}, ReturnValues='ALL_OLD')
+        mock_table.get_item.assert_not_called()
+    
+    @patch('auth.user_store.table')
+    def test_unknown_or_used_token(self, mock_table):
+        mock_table.delete_item.return_value = {}
+        
+        with pytest.raises(AuthenticationError) as exc_info:
+            redeem_refresh_token('unknown')
+        assert 'Invalid refresh token' in str(exc_info.value)
+    
+    @patch('auth.user_store.table')
+    def test_expired_token(self, mock_table):
+        mock_table.delete_item.return_value = {'Attributes': {
+            'user_id': 'REFRESH#abc', 'owner_id': 'testuser', 'username': 'testuser', 'issued_at': 1, 'ttl': 100
+        }}
+        
+        with pytest.raises(AuthenticationError) as exc_info:
+            redeem_refresh_token('expired', now=100)
+        assert 'expired' in str(exc_info.value)
+    
+    def test_empty_token(self):
+        with pytest.raises(AuthenticationError):
+            redeem_refresh_token('')
+    
+    @patch('auth.user_store.table')
+    def test_database_error(self, mock_table):
+        mock_table.delete_item.side_effect = ClientError({'Error': {'Code': 'InternalServerError'}}, 'DeleteItem')
+        
+        with pytest.raises(DatabaseError):
+            redeem_refresh_token('token')
@@ -0,0 +1,148 @@
+import io
+import json
+import pytest
+from unittest.mock import patch
+from rate_engine import RateSnapshot
+from exceptions import DatabaseError
+from bulk_converter import convert_stream
+from bulk_convert import split_ranges, read_header, detect_format, run, main
+
+
+@pytest.fixture
+def snapshot():
+    return RateSnapshot('USD', {'USD': 1.0, 'BRL': 5.2, 'EUR': 0.92, 'JPY': 150.0}, 1704067200, 9999999999)
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    rows = ['amount,from,to'] + [f'{i + 1},USD,{"BRL" if i % 2 else "EUR"}' for i in range(50)] + ['ten,USD,BRL']
+    path = tmp_path / 'ledger.csv'
+    path.write_text('\n'.join(rows) + '\n')
+    return path
+
+
+class TestSplitRanges:
+    def test_ranges_end_on_line_boundaries(self):
+        data = b'aaa\nbb\ncccc\nd'
+        ranges = split_ranges(data, 2)
+        
+        assert ranges == [(0, 4, 1), (4, 7, 2), (7, 12, 3), (12, 13, 4)]
+        assert b''.join(data[start:end] for start, end, _ in ranges) == data
+    
+    def test_ranges_do_not_end_inside_quoted_field(self):
+        data = b'a,"x\ny"\nb,"z"\nc\n'
+        
+        assert split_ranges(data, 2, csv_quotes=True) == [(0, 8, 1), (8, 14, 3), (14, 16, 4)]
+    
+    def test_large_chunk_is_one_range(self):
+        assert split_ranges(b'a\nb\n', 1024, start=2, first_line=2) == [(2, 4, 2)]
+    
+    def test_read_header(self):
+        assert read_header(b'\xef\xbb\xbfamount,from,to\n1,USD,BRL\n') == ('amount,from,to\n', 18)
+    
+    def test_detect_format(self):
+        assert detect_format('ledger.CSV') == 'csv'
+        assert detect_format('ledger.jsonl') == 'ndjson'
+
+
+class TestRun:
+    def test_ordered_output_matches_single_process_stream(self, csv_file, snapshot):
+        output = io.StringIO()
+        
+        stats = run(str(csv_file), output, workers=2, chunk_bytes=64, snapshot=snapshot)
+        
+        with open(csv_file) as source:
+            expected = ''.join(convert_stream(source, 'csv', snapshot=snapshot))
+        assert output.getvalue() == expected
+        assert stats['rows'] == 51
+        assert stats['errors'] == 1
+        assert stats['chunks'] > 1
+        assert stats['snapshot_version'] == 1704067200
+    
+    def test_quoted_multiline_csv_is_split_between_rows(self, tmp_path, snapshot):
+        rows = ['amount,from,to,memo'] + [f'{i + 1},USD,BRL,"paid\nin cash"' for i in range(20)]
+        path = tmp_path / 'quoted.csv'
+        path.write_text('\n'.join(rows) + '\n')
+        output = io.StringIO()
+        
+        stats = run(str(path), output, workers=2, chunk_bytes=32, snapshot=snapshot)
+        
+        with open(path, newline='') as source:
+            expected = ''.join(convert_stream(source, 'csv', snapshot=snapshot))
+        assert output.getvalue() == expected
+        assert stats['chunks'] > 1
+        assert stats['errors'] == 0
+    
+    def test_quoted_csv_without_newlines_is_split(self, tmp_path, snapshot):
+        rows = ['amount,from,to,memo'] + [f'"{i + 1}",USD,BRL,"Acme, Inc."' for i in range(20)]
+        path = tmp_path / 'quoted.csv'
+        path.write_text('\n'.join(rows) + '\n')
+        output = io.StringIO()
+        
+        stats = run(str(path), output, workers=2, chunk_bytes=32, snapshot=snapshot)
+        
+        with open(path, newline='') as source:
+            expected = ''.join(convert_stream(source, 'csv', snapshot=snapshot))
+        assert output.getvalue() == expected
+        assert stats['chunks'] > 1
+    
+    def test_unordered_output_keeps_line_numbers(self, csv_file, snapshot):
+        output = io.StringIO()
+        
+        run(str(csv_file), output, output_format='ndjson', workers=2, chunk_bytes=64, ordered=False, snapshot=snapshot)
+        
+        results = [json.loads(line) for line in output.getvalue().splitlines()]
+        assert sorted(result['line'] for result in results) == list(range(2, 53))
+        assert next(result for result in results if result['line'] == 2)['converted_amount'] == 0.92
+    
+    def test_ndjson_input(self, tmp_path, snapshot):
+        path = tmp_path / 'ledger.ndjson'
+        path.write_text('{"amount": 10, "from": "USD", "to": "BRL"}\n\n{"amount": 1, "from": "EUR", "to": "JPY"}\n')
+        output = io.StringIO()
+        
+        stats = run(str(path), output, workers=1, chunk_bytes=8, snapshot=snapshot)
+        
+        results = [json.loads(line) for line in output.getvalue().splitlines()]
+        assert [result['line'] for result in results] == [1, 3]
+        assert results[0]['converted_amount'] == 52.0
+        assert stats['rows'] == 2
+    
+    def test_empty_file(self, tmp_path, snapshot):
+        path = tmp_path / 'empty.csv'
+        path.write_text('')
+        output = io.StringIO()
+        
+        stats = run(str(path), output, workers=1, snapshot=snapshot)
+        
+        assert output.getvalue() == 'line,amount,from,to,rate,converted_amount,error\n'
+        assert stats['rows'] == 0
+    
+    @patch('bulk_convert.get_rate_snapshot')
+    def test_snapshot_loaded_once_from_store(self, mock_get_rate_snapshot, csv_file, snapshot):
+        mock_get_rate_snapshot.return_value = snapshot
+        
+        run(str(csv_file), io.StringIO(), workers=2, chunk_bytes=64)
+        
+        mock_get_rate_snapshot.assert_called_once_with('USD')
+
+
+class TestMain:
+    @patch('bulk_convert.get_rate_snapshot')
+    def test_writes_output_file(self, mock_get_rate_snapshot, csv_file, snapshot, tmp_path):
+        mock_get_rate_snapshot.return_value = snapshot
+        target = tmp_path / 'out.ndjson'
+        
+        code = main([str(csv_file), '-o', str(target), '--output-format', 'ndjson', '--workers', '2'])
+        
+        assert code == 0
+        assert len(target.read_text().splitlines()) == 51
+    
+    @patch('bulk_convert.get_rate_snapshot')
+    def test_store_failure_exits_non_zero(self, mock_get_rate_snapshot, csv_file):
+        mock_get_rate_snapshot.side_effect = DatabaseError('Database service unavailable')
+        
+        assert main([str(csv_file), '--workers', '1']) == 1
+    
+    def test_rejects_zero_workers(self, csv_file):
+        with pytest.raises(SystemExit):
+            main([str(csv_file), '--workers', '0'])
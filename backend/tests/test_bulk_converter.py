@@ -0,0 +1,132 @@
+import os
+import json
+import pytest
+from unittest.mock import patch
+from rate_engine import RateSnapshot
+from bulk_converter import convert_stream, convert_rows, read_ndjson, read_csv, get_bulk_chunk_size
+
+
+@pytest.fixture
+def snapshot():
+    return RateSnapshot('USD', {'USD': 1.0, 'BRL': 5.2, 'EUR': 0.92, 'JPY': 150.0}, 1704067200, 9999999999)
+
+
+def ndjson_lines(records):
+    return [json.dumps(record) + '\n' for record in records]
+
+
+class TestReaders:
+    def test_ndjson_skips_blank_lines_and_flags_bad_ones(self):
+        rows = list(read_ndjson(['{"amount": 1, "from": "USD", "to": "BRL"}\n', '\n', 'oops\n', '[1]\n']))
+        
+        assert rows[0] == (1, {'amount': 1, 'from': 'USD', 'to': 'BRL'}, None)
+        assert rows[1] == (3, None, 'Invalid JSON')
+        assert rows[2][0] == 4 and rows[2][2] is not None
+
+    def test_csv_parses_amounts(self):
+        rows = list(read_csv(['amount,from,to\n', '10.5,usd,brl\n', 'ten,USD,BRL\n']))
+        
+        assert rows[0] == (2, {'amount': 10.5, 'from': 'usd', 'to': 'brl'}, None)
+        assert rows[1][1]['amount'] == 'ten'
+    
+    def test_line_offset_shifts_numbering(self):
+        assert next(read_ndjson(['{}\n'], line_offset=10))[0] == 11
+        assert next(read_csv(['amount,from,to\n', '1,USD,BRL\n'], line_offset=10))[0] == 12
+
+
+class TestConvertStream:
+    def test_ndjson_round_trip(self, snapshot):
+        lines = ndjson_lines([
+            {'amount': 100, 'from': 'USD', 'to': 'BRL'},
+            {'amount': 10, 'from': 'eur', 'to': 'jpy'}
+        ])
+        
+        output = [json.loads(line) for line in convert_stream(lines, snapshot=snapshot)]
+        
+        assert output == [
+            {'line': 1, 'amount': 100.0, 'from': 'USD', 'to': 'BRL', 'rate': 5.2, 'converted_amount': 520.0},
+            {'line': 2, 'amount': 10.0, 'from': 'EUR', 'to': 'JPY', 'rate': 163.04347826087, 'converted_amount': 1630.43}
+        ]
+
+    def test_csv_to_csv(self, snapshot):
+        lines = ['amount,from,to\n', '100,USD,BRL\n']
+        
+        output = ''.join(convert_stream(lines, 'csv', snapshot=snapshot))
+        
+        assert output == (
+            'line,amount,from,to,rate,converted_amount,error\n'
+            '2,100.0,USD,BRL,5.2,520.0,\n'
+        )
+
+    def test_invalid_rows_do_not_stop_the_stream(self, snapshot):
+        lines = ndjson_lines([
+            {'amount': 'abc', 'from': 'USD', 'to': 'BRL'},
+            {'amount': 5, 'from': 'USD', 'to': 'XAU'},
+            {'amount': 5, 'from': 'USD', 'to': 'USD'},
+            {'amount': 5, 'from': 'USD', 'to': 'GBP'},
+            {'amount': 1, 'from': 'USD', 'to': 'BRL'}
+        ])
+        
+        output = [json.loads(line) for line in convert_stream(lines, snapshot=snapshot)]
+        
+        assert output[0]['error'] == 'Invalid amount. Must be a number.'
+        assert 'Invalid currency' in output[1]['error']
+        assert output[2]['error'] == 'From and to currencies must be different.'
+        assert output[3]['error'] == 'Conversion rate not found for USD to GBP'
+        assert output[4]['converted_amount'] == 5.2
+
+    @patch('bulk_converter.logger')
+    @patch('validators.logger')
+    def test_rejected_rows_logged_once_as_a_count(self, mock_validators_logger, mock_logger, snapshot):
+        lines = ndjson_lines([{'amount': 'abc', 'from': 'USD', 'to': 'BRL'}] * 50 + [{'amount': 1, 'from': 'USD', 'to': 'XAU'}] * 50)
+        lines.append('not json\n')
+        
+        output = list(convert_stream(lines, snapshot=snapshot, chunk_size=10))
+        
+        assert len(output) == 101
+        mock_validators_logger.warning.assert_not_called()
+        mock_logger.warning.assert_called_once()
+        assert mock_logger.warning.call_args.kwargs['extra']['rejected_rows'] == 101
+
+    def test_input_is_consumed_one_chunk_at_a_time(self, snapshot):
+        consumed = []
+        
+        def lines():
+            for index in range(100):
+                consumed.append(index)
+                yield json.dumps({'amount': 1, 'from': 'USD', 'to': 'BRL'}) + '\n'
+        
+        output = convert_stream(lines(), snapshot=snapshot, chunk_size=10)
+        next(output)
+        
+        assert len(consumed) == 10
+
+    @patch('bulk_converter.get_rate_snapshot')
+    def test_snapshot_read_once(self, mock_get_rate_snapshot, snapshot):
+        mock_get_rate_snapshot.return_value = snapshot
+        lines = ndjson_lines([{'amount': 1, 'from': 'USD', 'to': 'BRL'}] * 50)
+        
+        assert len(list(convert_stream(lines, chunk_size=7))) == 50
+        mock_get_rate_snapshot.assert_called_once()
+
+    def test_unknown_format(self, snapshot):
+        with pytest.raises(ValueError):
+            convert_stream([], 'xml', snapshot=snapshot)
+
+    def test_empty_csv_still_has_header(self, snapshot):
+        assert ''.join(convert_stream(['amount,from,to\n'], 'csv', snapshot=snapshot)) == 'line,amount,from,to,rate,converted_amount,error\n'
+
+
+class TestChunkSize:
+    @patch.dict(os.environ, {'BULK_CHUNK_SIZE': 'many'})
+    def test_invalid_chunk_size(self):
+        assert get_bulk_chunk_size() == 1000
+
+    def test_pair_rate_derived_once(self, snapshot):
+        rows = [(index, {'amount': 1, 'from': 'EUR', 'to': 'BRL'}, None) for index in range(20)]
+        
+        with patch.object(snapshot, 'rate', wraps=snapshot.rate) as mock_rate:
+            results = list(convert_rows(rows, snapshot, chunk_size=5))
+        
+        assert len(results) == 20
+        mock_rate.assert_called_once_with('EUR', 'BRL')
@@ -0,0 +1,47 @@
+import pytest
+from calibrate_bcrypt import calibrate, measure_rounds, main, DEFAULT_MIN_ROUNDS
+
+
+def doubling(base_seconds):
+    return lambda rounds, samples: base_seconds * 2 ** (rounds - 4)
+
+
+class TestCalibrate:
+    def test_picks_highest_cost_under_target(self):
+        rounds, timings = calibrate(0.25, min_rounds=4, max_rounds=16, measure=doubling(0.001))
+        
+        assert rounds == 11
+        assert max(timings) == 12
+    
+    def test_never_goes_below_min_rounds(self):
+        rounds, _ = calibrate(0.001, min_rounds=10, max_rounds=16, measure=doubling(0.01))
+        
+        assert rounds == 10
+    
+    def test_default_min_rounds_matches_cli(self):
+        rounds, timings = calibrate(0.001, measure=doubling(0.01))
+        
+        assert rounds == DEFAULT_MIN_ROUNDS
+        assert min(timings) == DEFAULT_MIN_ROUNDS
+    
+    def test_stops_at_max_rounds(self):
+        rounds, timings = calibrate(100, min_rounds=4, max_rounds=6, measure=doubling(0.001))
+        
+        assert rounds == 6
+        assert list(timings) == [4, 5, 6]
+    
+    def test_measure_rounds_returns_median(self):
+        ticks = iter([0, 3, 10, 11, 20, 22])
+        
+        assert measure_rounds(4, samples=3, clock=lambda: next(ticks)) == 2
+
+
+class TestMain:
+    def test_prints_setting(self, capsys):
+        assert main(['--target-ms', '1000', '--min-rounds', '4', '--max-rounds', '5', '--samples', '1']) == 0
+        
+        assert capsys.readouterr().out.strip() == 'BCRYPT_ROUNDS=5'
+    
+    def test_rejects_bad_range(self):
+        with pytest.raises(SystemExit):
+            main(['--min-rounds', '12', '--max-rounds', '10'])
@@ -0,0 +1,163 @@
+import pytest
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+from utils.deadline import DeadlineExceededError
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def failing_call():
+    raise ConnectionError('API unavailable')
+
+
+def out_of_time():
+    raise DeadlineExceededError('No time left to call the provider')
+
+
+def make_breaker(clock, **kwargs):
+    settings = {
+        'failure_rate_threshold': 0.5,
+        'minimum_calls': 4,
+        'window_size': 10,
+        'open_seconds': 30,
+        'half_open_max_calls': 2,
+        'failure_exceptions': (ConnectionError,),
+        'clock': clock
+    }
+    settings.update(kwargs)
+    return CircuitBreaker('test', **settings)
+
+
+class TestCircuitBreaker:
+    def test_closed_passes_calls_through(self):
+        breaker = make_breaker(FakeClock())
+
+        assert breaker.call(lambda: 42) == 42
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_opens_when_failure_rate_reached(self):
+        breaker = make_breaker(FakeClock())
+        breaker.call(lambda: 1)
+        breaker.call(lambda: 1)
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                breaker.call(failing_call)
+
+        assert breaker.is_open()
+        with pytest.raises(CircuitOpenError):
+            breaker.call(lambda: 1)
+
+    def test_stays_closed_below_minimum_calls(self):
+        breaker = make_breaker(FakeClock())
+        for _ in range(3):
+            with pytest.raises(ConnectionError):
+                breaker.call(failing_call)
+
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_slow_calls_count_as_failures(self):
+        clock = FakeClock()
+        breaker = make_breaker(clock, slow_call_seconds=2.0)
+
+        def slow_call():
+            clock.now += 3
+            return 'late'
+
+        for _ in range(4):
+            assert breaker.call(slow_call) == 'late'
+
+        assert breaker.is_open()
+
+    def test_non_failure_exceptions_do_not_trip(self):
+        breaker = make_breaker(FakeClock())
+
+        def not_found():
+            raise ValueError('Currency XYZ not supported')
+
+        for _ in range(5):
+            with pytest.raises(ValueError):
+                breaker.call(not_found)
+
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_half_open_after_open_seconds(self):
+        clock = FakeClock()
+        breaker = make_breaker(clock)
+        for _ in range(4):
+            breaker.record(True)
+
+        clock.now += 30
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    def test_half_open_limits_trial_calls(self):
+        clock = FakeClock()
+        breaker = make_breaker(clock)
+        for _ in range(4):
+            breaker.record(True)
+        clock.now += 30
+
+        assert breaker.allow_request()
+        assert breaker.allow_request()
+        assert not breaker.allow_request()
+
+    def test_successful_trials_close_circuit(self):
+        clock = FakeClock()
+        breaker = make_breaker(clock)
+        for _ in range(4):
+            breaker.record(True)
+        clock.now += 30
+
+        breaker.call(lambda: 1)
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        breaker.call(lambda: 1)
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_deadline_expiry_is_neutral(self):
+        clock = FakeClock()
+        breaker = make_breaker(clock, half_open_max_calls=1)
+        for _ in range(4):
+            breaker.record(True)
+        clock.now += 30
+
+        with pytest.raises(DeadlineExceededError):
+            breaker.call(out_of_time)
+
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert breaker.allow_request()
+        assert not breaker.allow_request()
+
+    def test_deadline_expiry_is_not_recorded_when_closed(self):
+        breaker = make_breaker(FakeClock())
+
+        with pytest.raises(DeadlineExceededError):
+            breaker.call(out_of_time)
+
+        assert breaker.stats()['window_calls'] == 0
+
+    def test_failed_trial_reopens_circuit(self):
+        clock = FakeClock()
+        breaker = make_breaker(clock)
+        for _ in range(4):
+            breaker.record(True)
+        clock.now += 30
+
+        with pytest.raises(ConnectionError):
+            breaker.call(failing_call)
+
+        assert breaker.is_open()
+        clock.now += 29
+        assert breaker.is_open()
+
+    def test_reset(self):
+        breaker = make_breaker(FakeClock())
+        for _ in range(4):
+            breaker.record(True)
+
+        breaker.reset()
+
+        assert breaker.stats() == {'state': CircuitBreaker.CLOSED, 'window_calls': 0, 'window_failures': 0}
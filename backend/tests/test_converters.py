@@ -1,5 +1,5 @@
 import pytest
-from converters import calculate_conversion
+from converters import calculate_conversion, calculate_conversions
 
 
 class TestCalculateConversion:
@@ -43,3 +43,16 @@ class TestCalculateConversion:
         result = calculate_conversion(1.11, 2.22)
         assert result == 2.46
 
+
+
+class TestCalculateConversions:
+    def test_matches_single_conversion(self):
+        amounts = [100, 100.5, 1.11, 0.01]
+        rates = [5.2, 5.2, 2.22, 5.2]
+        
+        results = calculate_conversions(amounts, rates)
+        
+        assert results == [calculate_conversion(amount, rate) for amount, rate in zip(amounts, rates)]
+
+    def test_empty(self):
+        assert calculate_conversions([], []) == []
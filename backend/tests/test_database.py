@@ -1,33 +1,132 @@
+import os
+import time
+import threading
 import pytest
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, patch, MagicMock, ANY
 from decimal import Decimal
+from botocore.exceptions import ClientError
 from exceptions import DatabaseError
-from database import get_conversion_rate, save_rate_to_cache, ExternalAPIUnavailableError
+from database import (
+    get_conversion_rate,
+    get_rate_snapshot,
+    load_snapshot,
+    save_rates_to_cache,
+    acquire_refresh_lease,
+    refresh_rates,
+    prefetch_snapshots,
+    get_prefetch_currencies,
+    schedule_background_refresh,
+    _background_refresh,
+    rate_cache,
+    negative_cache,
+    last_known_good,
+    get_conversion_quote,
+    get_conversion_quotes,
+    ExternalAPIUnavailableError
+)
+from utils.deadline import Deadline
+from rate_codec import pack_rates, unpack_rates
+from rate_engine import RateSnapshot
+from boto3.dynamodb.types import Binary
+from external_api import UnsupportedCurrencyError, InvalidRatesPayloadError, ProviderRates, rates_circuit
 
 
-class TestSaveRateToCache:
-    @patch('database.table')
-    def test_save_successful(self, mock_table):
-        save_rate_to_cache('USD', 'BRL', 5.2, 'test-request-id')
+@pytest.fixture(autouse=True)
+def clear_rate_cache():
+    rate_cache.clear()
+    negative_cache.clear()
+    last_known_good.clear()
+    rates_circuit.reset()
+    with patch('database.append_snapshot') as mock_append_snapshot:
+        yield mock_append_snapshot
+    rate_cache.clear()
+    negative_cache.clear()
+    last_known_good.clear()
+    rates_circuit.reset()
+
+
+class TestSaveRatesToCache:
+    @patch('database.rate_store.table')
+    def test_saves_single_snapshot_item(self, mock_table, sample_rates_response):
+        snapshot = save_rates_to_cache('USD', sample_rates_response['rates'], 'test-request-id')
         
         mock_table.put_item.assert_called_once()
-        call_args = mock_table.put_item.call_args[1]['Item']
-        assert call_args['from_currency'] == 'USD'
-        assert call_args['to_currency'] == 'BRL'
-        assert call_args['rate'] == Decimal('5.2')
+        item = mock_table.put_item.call_args[1]['Item']
+        assert item['from_currency'] == 'USD'
+        assert item['to_currency'] == '#snapshot'
+        assert unpack_rates(item['packed_rates'])[0]['BRL'] == 5.2
+        assert 'rates' not in item
+        assert item['ttl'] == snapshot.expires_at
+        assert item['fetched_at'] == snapshot.version
+
+    @patch.dict(os.environ, {'SNAPSHOT_FORMAT': 'map'})
+    @patch('database.rate_store.table')
+    def test_map_format_still_writable(self, mock_table, sample_rates_response):
+        save_rates_to_cache('USD', sample_rates_response['rates'], 'test-request-id')
+        
+        item = mock_table.put_item.call_args[1]['Item']
+        assert item['rates']['BRL'] == Decimal('5.2')
+        assert 'packed_rates' not in item
+
+    @patch('database.rate_store.table')
+    def test_ignores_unsupported_currencies(self, mock_table):
+        snapshot = save_rates_to_cache('USD', {'BRL': 5.2, 'XAU': 0.0004}, 'test-request-id')
+        
+        assert snapshot.rates == {'USD': 1.0, 'BRL': 5.2}
+
+    @patch('database.rate_store.table')
+    def test_populates_memory_cache(self, mock_table, sample_rates_response):
+        snapshot = save_rates_to_cache('USD', sample_rates_response['rates'], 'test-request-id')
+        
+        assert rate_cache.get('USD') is snapshot
 
-    @patch('database.table')
+    @patch('database.rate_store.table')
     def test_save_error(self, mock_table):
         mock_table.put_item.side_effect = Exception('Database error')
         
         with pytest.raises(DatabaseError):
-            save_rate_to_cache('USD', 'BRL', 5.2, 'test-request-id')
+            save_rates_to_cache('USD', {'BRL': 5.2}, 'test-request-id')
         
-        mock_table.put_item.assert_called_once()
+        assert rate_cache.get('USD') is None
+
+
+class TestLoadSnapshot:
+    @patch('database.rate_store.table')
+    def test_load_packed_snapshot(self, mock_table, sample_dynamodb_item):
+        item = sample_dynamodb_item['Item']
+        item['packed_rates'] = Binary(pack_rates(item.pop('rates'), item['fetched_at']))
+        mock_table.get_item.return_value = sample_dynamodb_item
+        
+        snapshot = load_snapshot('USD', 'test-request-id')
+        
+        assert snapshot.rates == {'BRL': 5.2, 'EUR': 0.92, 'GBP': 0.79, 'JPY': 150.0, 'USD': 1.0}
+        assert snapshot.version == 1704067200
+
+    @patch('database.rate_store.table')
+    def test_load_existing_snapshot(self, mock_table, sample_dynamodb_item):
+        mock_table.get_item.return_value = sample_dynamodb_item
+        
+        snapshot = load_snapshot('USD', 'test-request-id')
+        
+        assert snapshot.base_currency == 'USD'
+        assert snapshot.rates['JPY'] == 150.0
+        assert snapshot.version == 1704067200
+        mock_table.get_item.assert_called_once_with(
+            Key={
+                'from_currency': 'USD',
+                'to_currency': '#snapshot'
+            }
+        )
+
+    @patch('database.rate_store.table')
+    def test_load_missing_snapshot(self, mock_table):
+        mock_table.get_item.return_value = {}
+        
+        assert load_snapshot('USD', 'test-request-id') is None
 
 
 class TestGetConversionRate:
-    @patch('database.table')
+    @patch('database.rate_store.table')
     def test_cache_hit(self, mock_table, sample_dynamodb_item):
         mock_table.get_item.return_value = sample_dynamodb_item
         
@@ -37,15 +136,14 @@ class TestGetConversionRate:
         mock_table.get_item.assert_called_once_with(
             Key={
                 'from_currency': 'USD',
-                'to_currency': 'BRL'
+                'to_currency': '#snapshot'
             }
         )
 
-    @patch('database.table')
+    @patch('database.rate_store.table')
     @patch('database.get_latest_rates')
     def test_cache_miss_fetch_from_api(self, mock_get_latest_rates, mock_table):
         mock_table.get_item.return_value = {}
-        mock_table.put_item.return_value = None
         mock_get_latest_rates.return_value = {
             'USD': 1.0,
             'BRL': 5.2,
@@ -55,10 +153,11 @@ class TestGetConversionRate:
         rate = get_conversion_rate('USD', 'BRL', 'test-request-id')
         
         assert rate == 5.2
-        mock_get_latest_rates.assert_called_once_with('USD', 'test-request-id')
-        mock_table.put_item.assert_called_once()
+        mock_get_latest_rates.assert_called_once_with('USD', 'test-request-id', ANY, None)
+        item = mock_table.put_item.call_args[1]['Item']
+        assert item['to_currency'] == '#snapshot'
 
-    @patch('database.table')
+    @patch('database.rate_store.table')
     @patch('database.get_latest_rates')
     def test_currency_not_found_in_api_response(self, mock_get_latest_rates, mock_table):
         mock_table.get_item.return_value = {}
@@ -72,7 +171,7 @@ class TestGetConversionRate:
         
         assert 'Conversion rate not found for USD to BRL' in str(exc_info.value)
 
-    @patch('database.table')
+    @patch('database.rate_store.table')
     @patch('database.get_latest_rates')
     def test_external_api_unavailable(self, mock_get_latest_rates, mock_table):
         mock_table.get_item.return_value = {}
@@ -83,24 +182,15 @@ class TestGetConversionRate:
         
         assert 'External API unavailable' in str(exc_info.value)
 
-    @patch('database.table')
-    @patch('database.get_latest_rates')
-    def test_different_currencies(self, mock_get_latest_rates, mock_table):
-        mock_table.get_item.return_value = {}
-        mock_table.put_item.return_value = None
-        mock_get_latest_rates.return_value = {
-            'EUR': 1.0,
-            'USD': 1.09,
-            'BRL': 5.65,
-            'JPY': 163.04
-        }
-        
-        rate = get_conversion_rate('EUR', 'JPY', 'test-request-id')
+    @patch('database.rate_store.table')
+    def test_cross_rate_derived_from_anchor(self, mock_table, sample_dynamodb_item):
+        mock_table.get_item.return_value = sample_dynamodb_item
         
-        assert rate == 163.04
-        mock_get_latest_rates.assert_called_once_with('EUR', 'test-request-id')
+        assert get_conversion_rate('EUR', 'JPY', 'test-request-id') == 163.04347826087
+        assert get_conversion_rate('BRL', 'USD', 'test-request-id') == 0.192307692307692
+        mock_table.get_item.assert_called_once()
 
-    @patch('database.table')
+    @patch('database.rate_store.table')
     def test_dynamodb_error(self, mock_table):
         mock_table.get_item.side_effect = Exception('DynamoDB error')
         
@@ -109,19 +199,605 @@ class TestGetConversionRate:
         
         assert 'while fetching rate' in str(exc_info.value)
 
-    @patch('database.table')
+    @patch('database.rate_store.table')
+    @patch('database.get_latest_rates')
+    def test_one_external_call_for_every_pair(self, mock_get_latest_rates, mock_table, sample_rates_response):
+        mock_table.get_item.return_value = {}
+        mock_get_latest_rates.return_value = sample_rates_response['rates']
+        
+        rates = [
+            get_conversion_rate(from_currency, to_currency, 'test-request-id')
+            for from_currency, to_currency in (('USD', 'BRL'), ('EUR', 'GBP'), ('JPY', 'BRL'), ('GBP', 'USD'))
+        ]
+        
+        assert rates == [5.2, 0.858695652173913, 0.0346666666666667, 1.26582278481013]
+        mock_get_latest_rates.assert_called_once()
+        mock_table.get_item.assert_called_once()
+        mock_table.put_item.assert_called()
+
+
+class TestGetConversionQuotes:
+    @patch('database.rate_store.table')
+    def test_distinct_pairs_from_one_read(self, mock_table, sample_dynamodb_item):
+        mock_table.get_item.return_value = sample_dynamodb_item
+        
+        rates, missing, snapshot = get_conversion_quotes(
+            [('USD', 'BRL'), ('EUR', 'JPY'), ('USD', 'BRL')], 'test-request-id'
+        )
+        
+        assert rates == {('USD', 'BRL'): 5.2, ('EUR', 'JPY'): 163.04347826087}
+        assert missing == {}
+        assert snapshot.base_currency == 'USD'
+        mock_table.get_item.assert_called_once()
+
+    @patch('database.rate_store.table')
+    def test_missing_pair_reported_and_remembered(self, mock_table, sample_dynamodb_item):
+        del sample_dynamodb_item['Item']['rates']['GBP']
+        mock_table.get_item.return_value = sample_dynamodb_item
+        
+        rates, missing, _ = get_conversion_quotes([('USD', 'BRL'), ('USD', 'GBP')], 'test-request-id')
+        
+        assert list(rates) == [('USD', 'BRL')]
+        assert 'Conversion rate not found' in missing[('USD', 'GBP')]
+        assert negative_cache.get(('USD', 'GBP')) is not None
+
+    @patch('database.rate_store.table')
     @patch('database.get_latest_rates')
-    def test_cache_miss_saves_to_cache(self, mock_get_latest_rates, mock_table):
+    def test_one_external_fetch_for_the_batch(self, mock_get_latest_rates, mock_table, sample_rates_response):
+        mock_table.get_item.return_value = {}
+        mock_get_latest_rates.return_value = sample_rates_response['rates']
+        
+        rates, _, _ = get_conversion_quotes([('USD', 'BRL'), ('BRL', 'EUR'), ('GBP', 'JPY')], 'test-request-id')
+        
+        assert len(rates) == 3
+        mock_get_latest_rates.assert_called_once()
+
+class TestMemoryRateCache:
+    @patch('database.rate_store.table')
+    def test_second_lookup_served_from_memory(self, mock_table, sample_dynamodb_item):
+        mock_table.get_item.return_value = sample_dynamodb_item
+        
+        first = get_conversion_rate('USD', 'BRL', 'test-request-id')
+        second = get_conversion_rate('USD', 'BRL', 'test-request-id')
+        
+        assert first == second == 5.2
+        mock_table.get_item.assert_called_once()
+        assert rate_cache.hits == 1
+
+    @patch('database.rate_store.table')
+    @patch('database.get_latest_rates')
+    def test_api_result_cached_in_memory(self, mock_get_latest_rates, mock_table):
         mock_table.get_item.return_value = {}
-        mock_table.put_item.return_value = None
         mock_get_latest_rates.return_value = {'BRL': 5.2}
         
+        get_conversion_rate('USD', 'BRL', 'test-request-id')
         rate = get_conversion_rate('USD', 'BRL', 'test-request-id')
         
         assert rate == 5.2
-        mock_table.put_item.assert_called_once()
-        call_args = mock_table.put_item.call_args[1]['Item']
-        assert call_args['from_currency'] == 'USD'
-        assert call_args['to_currency'] == 'BRL'
-        assert call_args['rate'] == Decimal('5.2')
+        mock_get_latest_rates.assert_called_once()
+        mock_table.get_item.assert_called_once()
+
+    @patch('database.rate_store.table')
+    @patch('database.get_latest_rates')
+    def test_item_past_grace_window_not_served(self, mock_get_latest_rates, mock_table, sample_dynamodb_item):
+        sample_dynamodb_item['Item']['ttl'] = 1
+        mock_table.get_item.return_value = sample_dynamodb_item
+        mock_get_latest_rates.return_value = {'BRL': 5.5}
+        
+        snapshot = get_rate_snapshot('USD', 'test-request-id')
+        
+        assert snapshot.rates['BRL'] == 5.5
+        mock_get_latest_rates.assert_called_once()
 
+
+class TestStaleWhileRevalidate:
+    @patch('database.schedule_background_refresh')
+    @patch('database.rate_store.table')
+    @patch('database.get_latest_rates')
+    def test_stale_item_within_grace_served_immediately(self, mock_get_latest_rates, mock_table, mock_schedule, sample_dynamodb_item):
+        sample_dynamodb_item['Item']['ttl'] = int(time.time()) - 60
+        mock_table.get_item.return_value = sample_dynamodb_item
+        
+        rate = get_conversion_rate('USD', 'BRL', 'test-request-id')
+        
+        assert rate == 5.2
+        mock_get_latest_rates.assert_not_called()
+        mock_schedule.assert_called_once_with('USD', 'test-request-id')
+
+    @patch('database.schedule_background_refresh')
+    @patch('database.rate_store.table')
+    def test_stale_snapshot_kept_in_memory_during_grace(self, mock_table, mock_schedule, sample_dynamodb_item):
+        sample_dynamodb_item['Item']['ttl'] = int(time.time()) - 60
+        mock_table.get_item.return_value = sample_dynamodb_item
+        
+        get_rate_snapshot('USD', 'test-request-id')
+        get_rate_snapshot('USD', 'test-request-id')
+        
+        mock_table.get_item.assert_called_once()
+        assert mock_schedule.call_count == 2
+
+    @patch('database.get_stale_grace_seconds', return_value=30)
+    @patch('database.schedule_background_refresh')
+    @patch('database.rate_store.table')
+    @patch('database.get_latest_rates')
+    def test_past_hard_limit_refreshes_synchronously(self, mock_get_latest_rates, mock_table, mock_schedule, mock_grace, sample_dynamodb_item):
+        sample_dynamodb_item['Item']['ttl'] = int(time.time()) - 60
+        mock_table.get_item.return_value = sample_dynamodb_item
+        mock_get_latest_rates.return_value = {'BRL': 5.5}
+        
+        rate = get_conversion_rate('USD', 'BRL', 'test-request-id')
+        
+        assert rate == 5.5
+        mock_schedule.assert_not_called()
+
+    @patch('database.schedule_background_refresh')
+    @patch('database.rate_store.table')
+    @patch('database.get_latest_rates')
+    def test_item_without_ttl_refreshes_synchronously(self, mock_get_latest_rates, mock_table, mock_schedule, sample_dynamodb_item):
+        del sample_dynamodb_item['Item']['ttl']
+        mock_table.get_item.return_value = sample_dynamodb_item
+        mock_get_latest_rates.return_value = {'BRL': 5.5}
+        
+        rate = get_conversion_rate('USD', 'BRL', 'test-request-id')
+        
+        assert rate == 5.5
+        mock_schedule.assert_not_called()
+
+    @patch('database.rate_store.table')
+    @patch('database.get_latest_rates')
+    def test_background_refresh_replaces_stale_snapshot(self, mock_get_latest_rates, mock_table):
+        mock_get_latest_rates.return_value = {'BRL': 5.5}
+        
+        schedule_background_refresh('USD', 'test-request-id')
+        for _ in range(100):
+            if rate_cache.get('USD') is not None:
+                break
+            time.sleep(0.01)
+        
+        assert rate_cache.get('USD').rates['BRL'] == 5.5
+
+    @patch('database.rate_store.table')
+    @patch('database.get_latest_rates')
+    def test_background_refresh_failure_is_logged(self, mock_get_latest_rates, mock_table):
+        mock_get_latest_rates.side_effect = ConnectionError('API unavailable')
+        
+        _background_refresh('USD', 'test-request-id')
+        
+        assert rate_cache.get('USD') is None
+
+    @patch('database.get_refresh_lease_seconds', return_value=7)
+    @patch('database.refresh_rates')
+    def test_background_refresh_is_bounded_by_lease(self, mock_refresh, mock_lease):
+        _background_refresh('USD', 'test-request-id')
+        
+        deadline = mock_refresh.call_args.args[2]
+        assert deadline.is_bounded
+        assert deadline.remaining() <= 7
+
+    @patch('database.rate_store.table')
+    @patch('database.get_latest_rates')
+    def test_request_joining_refresh_keeps_its_own_deadline(self, mock_get_latest_rates, mock_table):
+        mock_table.get_item.return_value = {}
+        started = threading.Event()
+        release = threading.Event()
+        
+        def slow_fetch(*args):
+            started.set()
+            release.wait()
+            return {'BRL': 5.5}
+        
+        mock_get_latest_rates.side_effect = slow_fetch
+        now = int(time.time())
+        last_known_good['USD'] = RateSnapshot('USD', {'USD': 1.0, 'BRL': 5.2}, now - 7200, now - 3600)
+        background = threading.Thread(target=_background_refresh, args=('USD', 'background'))
+        background.start()
+        started.wait()
+        
+        began = time.monotonic()
+        try:
+            snapshot = get_rate_snapshot('USD', 'test-request-id', Deadline(0.1))
+        finally:
+            release.set()
+            background.join()
+        
+        assert time.monotonic() - began < 1
+        assert snapshot.stale is True
+        assert snapshot.rates['BRL'] == 5.2
+
+
+def conditional_check_failed():
+    return ClientError(
+        {'Error': {'Code': 'ConditionalCheckFailedException', 'Message': 'The conditional request failed'}},
+        'PutItem'
+    )
+
+
+class TestRefreshLease:
+    @patch('database.rate_store.table')
+    def test_acquire_lease(self, mock_table):
+        owner = acquire_refresh_lease('USD', 'test-request-id')
+        
+        assert owner is not None
+        call_kwargs = mock_table.put_item.call_args[1]
+        assert call_kwargs['Item']['from_currency'] == 'USD'
+        assert call_kwargs['Item']['to_currency'] == '#lease'
+        assert call_kwargs['Item']['owner'] == owner
+        assert 'ConditionExpression' in call_kwargs
+
+    @patch('database.rate_store.table')
+    def test_lease_held_elsewhere(self, mock_table):
+        mock_table.put_item.side_effect = conditional_check_failed()
+        
+        assert acquire_refresh_lease('USD', 'test-request-id') is None
+
+    @patch('database.rate_store.table')
+    def test_lease_errors_do_not_block_refresh(self, mock_table):
+        mock_table.put_item.side_effect = ClientError(
+            {'Error': {'Code': 'ProvisionedThroughputExceededException', 'Message': 'Slow down'}},
+            'PutItem'
+        )
+        
+        assert acquire_refresh_lease('USD', 'test-request-id') is not None
+
+    @patch('database.rate_store.table')
+    @patch('database.get_latest_rates')
+    def test_lease_holder_refreshes_and_releases(self, mock_get_latest_rates, mock_table):
+        mock_get_latest_rates.return_value = {'BRL': 5.2}
+        
+        snapshot = refresh_rates('USD', 'test-request-id')
+        
+        assert snapshot.rates == {'USD': 1.0, 'BRL': 5.2}
+        mock_get_latest_rates.assert_called_once()
+        mock_table.delete_item.assert_called_once()
+
+    @patch('database.REFRESH_POLL_INTERVAL_SECONDS', 0)
+    @patch('database.rate_store.table')
+    @patch('database.get_latest_rates')
+    def test_waits_for_other_container(self, mock_get_latest_rates, mock_table, sample_dynamodb_item):
+        mock_table.put_item.side_effect = conditional_check_failed()
+        mock_table.get_item.side_effect = [{}, sample_dynamodb_item]
+        
+        snapshot = refresh_rates('USD', 'test-request-id')
+        
+        assert snapshot.rates['BRL'] == 5.2
+        mock_get_latest_rates.assert_not_called()
+        assert rate_cache.get('USD') is snapshot
+
+    @patch('database.get_refresh_wait_seconds', return_value=0)
+    @patch('database.rate_store.table')
+    @patch('database.get_latest_rates')
+    def test_fetches_itself_when_wait_times_out(self, mock_get_latest_rates, mock_table, mock_wait):
+        mock_table.put_item.side_effect = [conditional_check_failed(), None]
+        mock_get_latest_rates.return_value = {'BRL': 5.2}
+        
+        snapshot = refresh_rates('USD', 'test-request-id')
+        
+        assert snapshot.rates['BRL'] == 5.2
+        mock_get_latest_rates.assert_called_once()
+        mock_table.delete_item.assert_not_called()
+
+
+class TestPrefetchSnapshots:
+    @patch('database.rate_store.table')
+    @patch('database.get_latest_rates')
+    def test_fetches_every_base_and_writes_one_batch(self, mock_get_latest_rates, mock_table, sample_rates_response):
+        mock_get_latest_rates.return_value = sample_rates_response['rates']
+        
+        snapshots, failures = prefetch_snapshots(['USD', 'EUR', 'BRL'], 'test-request-id')
+        
+        assert sorted(snapshot.base_currency for snapshot in snapshots) == ['BRL', 'EUR', 'USD']
+        assert failures == {}
+        assert mock_get_latest_rates.call_count == 3
+        mock_table.batch_writer.assert_called_once()
+        batch = mock_table.batch_writer.return_value.__enter__.return_value
+        assert batch.put_item.call_count == 3
+        assert len({snapshot.version for snapshot in snapshots}) == 1
+        assert rate_cache.get('EUR') is not None
+
+    @patch('database.rate_store.table')
+    @patch('database.get_latest_rates')
+    def test_partial_failure_still_writes_successful_bases(self, mock_get_latest_rates, mock_table, sample_rates_response):
+        def fake_get_latest_rates(base_currency, request_id=None, deadline=None, validators=None):
+            if base_currency == 'EUR':
+                raise ConnectionError('Timeout while fetching rates for EUR')
+            return sample_rates_response['rates']
+        mock_get_latest_rates.side_effect = fake_get_latest_rates
+        
+        snapshots, failures = prefetch_snapshots(['USD', 'EUR'], 'test-request-id')
+        
+        assert [snapshot.base_currency for snapshot in snapshots] == ['USD']
+        assert 'EUR' in failures
+        batch = mock_table.batch_writer.return_value.__enter__.return_value
+        batch.put_item.assert_called_once()
+
+    @patch('database.rate_store.table')
+    @patch('database.get_latest_rates')
+    def test_nothing_written_when_every_base_fails(self, mock_get_latest_rates, mock_table):
+        mock_get_latest_rates.side_effect = ConnectionError('API unavailable')
+        
+        snapshots, failures = prefetch_snapshots(['USD'], 'test-request-id')
+        
+        assert snapshots == []
+        assert list(failures) == ['USD']
+        mock_table.batch_writer.assert_not_called()
+
+
+class TestGetPrefetchCurrencies:
+    @patch.dict(os.environ, {}, clear=True)
+    def test_defaults_to_anchor(self):
+        assert get_prefetch_currencies() == ['USD']
+
+    @patch.dict(os.environ, {'PREFETCH_CURRENCIES': 'usd, EUR,XAU,EUR'})
+    def test_parses_and_filters_configured_currencies(self):
+        assert get_prefetch_currencies() == ['USD', 'EUR']
+
+
+class TestNegativeCache:
+    @patch('database.rate_store.table')
+    @patch('database.get_latest_rates')
+    def test_unsupported_base_fails_fast(self, mock_get_latest_rates, mock_table):
+        mock_table.get_item.return_value = {}
+        mock_get_latest_rates.side_effect = UnsupportedCurrencyError('Currency XYZ not supported by external API')
+        
+        for _ in range(3):
+            with pytest.raises(ValueError) as exc_info:
+                get_rate_snapshot('XYZ', 'test-request-id')
+            assert 'not supported' in str(exc_info.value)
+        
+        mock_get_latest_rates.assert_called_once()
+        mock_table.get_item.assert_called_once()
+
+    @patch('database.rate_store.table')
+    def test_missing_target_fails_fast(self, mock_table, sample_dynamodb_item):
+        del sample_dynamodb_item['Item']['rates']['JPY']
+        mock_table.get_item.return_value = sample_dynamodb_item
+        
+        with pytest.raises(ValueError):
+            get_conversion_rate('USD', 'JPY', 'test-request-id')
+        
+        with patch('database.get_rate_snapshot') as mock_get_snapshot:
+            with pytest.raises(ValueError) as exc_info:
+                get_conversion_rate('USD', 'JPY', 'test-request-id')
+            mock_get_snapshot.assert_not_called()
+        
+        assert 'Conversion rate not found for USD to JPY' in str(exc_info.value)
+
+    @patch('database.get_negative_cache_ttl_seconds', return_value=0)
+    @patch('database.rate_store.table')
+    @patch('database.get_latest_rates')
+    def test_negative_entry_expires(self, mock_get_latest_rates, mock_table, mock_ttl):
+        mock_table.get_item.return_value = {}
+        mock_get_latest_rates.side_effect = UnsupportedCurrencyError('Currency XYZ not supported by external API')
+        
+        for _ in range(2):
+            with pytest.raises(ValueError):
+                get_rate_snapshot('XYZ', 'test-request-id')
+        
+        assert mock_get_latest_rates.call_count == 2
+
+    @patch.dict(os.environ, {'NEGATIVE_CACHE_PERSIST': 'true'})
+    @patch('database.rate_store.table')
+    @patch('database.get_latest_rates')
+    def test_unsupported_base_persisted(self, mock_get_latest_rates, mock_table):
+        mock_table.get_item.return_value = {}
+        mock_get_latest_rates.side_effect = UnsupportedCurrencyError('Currency XYZ not supported by external API')
+        
+        with pytest.raises(ValueError):
+            get_rate_snapshot('XYZ', 'test-request-id')
+        
+        items = [call[1]['Item'] for call in mock_table.put_item.call_args_list]
+        negative_items = [item for item in items if item['to_currency'] == '#unsupported']
+        assert len(negative_items) == 1
+        assert negative_items[0]['from_currency'] == 'XYZ'
+        assert negative_items[0]['ttl'] > time.time()
+
+    @patch.dict(os.environ, {'NEGATIVE_CACHE_PERSIST': 'true'})
+    @patch('database.rate_store.table')
+    @patch('database.get_latest_rates')
+    def test_persisted_entry_skips_external_api(self, mock_get_latest_rates, mock_table):
+        mock_table.get_item.side_effect = [
+            {},
+            {'Item': {
+                'from_currency': 'XYZ',
+                'to_currency': '#unsupported',
+                'reason': 'Currency XYZ not supported by external API',
+                'ttl': int(time.time()) + 60
+            }}
+        ]
+        
+        with pytest.raises(ValueError) as exc_info:
+            get_rate_snapshot('XYZ', 'test-request-id')
+        
+        assert 'not supported' in str(exc_info.value)
+        mock_get_latest_rates.assert_not_called()
+
+    @patch('database.rate_store.table')
+    @patch('database.get_latest_rates')
+    def test_transient_errors_not_cached(self, mock_get_latest_rates, mock_table):
+        mock_table.get_item.return_value = {}
+        mock_get_latest_rates.side_effect = ConnectionError('API unavailable')
+        
+        for _ in range(2):
+            with pytest.raises(ExternalAPIUnavailableError):
+                get_rate_snapshot('USD', 'test-request-id')
+        
+        assert mock_get_latest_rates.call_count == 2
+
+
+class TestLastKnownGoodFallback:
+    @patch('database.get_stale_grace_seconds', return_value=0)
+    @patch('database.rate_store.table')
+    @patch('database.get_latest_rates')
+    def test_expired_snapshot_served_stale_when_api_fails(self, mock_get_latest_rates, mock_table, mock_grace, sample_dynamodb_item):
+        sample_dynamodb_item['Item']['ttl'] = int(time.time()) - 60
+        mock_table.get_item.return_value = sample_dynamodb_item
+        mock_get_latest_rates.side_effect = ConnectionError('Timeout while fetching rates for USD')
+        
+        rate, snapshot = get_conversion_quote('USD', 'BRL', 'test-request-id')
+        
+        assert rate == 5.2
+        assert snapshot.stale is True
+
+    @patch('database.get_stale_grace_seconds', return_value=0)
+    @patch('database.rate_store.table')
+    @patch('database.get_latest_rates')
+    def test_malformed_payload_served_stale_and_counted(self, mock_get_latest_rates, mock_table, mock_grace, sample_dynamodb_item):
+        sample_dynamodb_item['Item']['ttl'] = int(time.time()) - 60
+        mock_table.get_item.return_value = sample_dynamodb_item
+        mock_get_latest_rates.side_effect = InvalidRatesPayloadError('Invalid response format from external API for USD')
+        
+        rate, snapshot = get_conversion_quote('USD', 'BRL', 'test-request-id')
+        
+        assert rate == 5.2
+        assert snapshot.stale is True
+        assert rates_circuit.stats()['window_failures'] == 1
+
+    @patch('database.rate_store.table')
+    @patch('database.get_latest_rates')
+    def test_malformed_payload_without_snapshot_is_unavailable(self, mock_get_latest_rates, mock_table):
+        mock_table.get_item.return_value = {}
+        mock_get_latest_rates.side_effect = InvalidRatesPayloadError('Invalid response format from external API for USD')
+        
+        with pytest.raises(ExternalAPIUnavailableError):
+            get_rate_snapshot('USD', 'test-request-id')
+
+    @patch('database.rate_store.table')
+    @patch('database.get_latest_rates')
+    def test_seeded_snapshot_without_ttl_served_stale(self, mock_get_latest_rates, mock_table, sample_dynamodb_item):
+        del sample_dynamodb_item['Item']['ttl']
+        mock_table.get_item.return_value = sample_dynamodb_item
+        mock_get_latest_rates.side_effect = ConnectionError('API unavailable')
+        
+        rate, snapshot = get_conversion_quote('EUR', 'GBP', 'test-request-id')
+        
+        assert rate == 0.858695652173913
+        assert snapshot.is_stale(time.time())
+
+    @patch('database.rate_store.table')
+    @patch('database.get_latest_rates')
+    def test_open_circuit_fails_fast_without_calling_api(self, mock_get_latest_rates, mock_table):
+        mock_table.get_item.return_value = {}
+        mock_get_latest_rates.side_effect = ConnectionError('API unavailable')
+        
+        for _ in range(rates_circuit.minimum_calls):
+            with pytest.raises(ExternalAPIUnavailableError):
+                get_rate_snapshot('USD', 'test-request-id')
+        
+        assert rates_circuit.is_open()
+        calls_before = mock_get_latest_rates.call_count
+        lease_writes_before = mock_table.put_item.call_count
+        
+        with pytest.raises(ExternalAPIUnavailableError) as exc_info:
+            get_rate_snapshot('USD', 'test-request-id')
+        
+        assert 'is open' in str(exc_info.value)
+        assert mock_get_latest_rates.call_count == calls_before
+        assert mock_table.put_item.call_count == lease_writes_before
+
+    @patch('database.rate_store.table')
+    def test_open_circuit_serves_last_known_good(self, mock_table, sample_dynamodb_item):
+        sample_dynamodb_item['Item']['ttl'] = 1
+        mock_table.get_item.return_value = sample_dynamodb_item
+        for _ in range(rates_circuit.minimum_calls):
+            rates_circuit.record(True)
+        
+        snapshot = get_rate_snapshot('USD', 'test-request-id')
+        
+        assert snapshot.stale is True
+        assert snapshot.rates['BRL'] == 5.2
+
+
+class TestDeadline:
+    @patch('database.rate_store.table')
+    @patch('database.get_latest_rates')
+    def test_deadline_passed_to_external_api(self, mock_get_latest_rates, mock_table):
+        mock_table.get_item.return_value = {}
+        mock_get_latest_rates.return_value = {'BRL': 5.2}
+        deadline = Deadline(10)
+        
+        get_conversion_rate('USD', 'BRL', 'test-request-id', deadline)
+        
+        mock_get_latest_rates.assert_called_once_with('USD', 'test-request-id', deadline, None)
+
+    @patch('database.rate_store.table')
+    @patch('database.get_latest_rates')
+    def test_expired_deadline_skips_refresh(self, mock_get_latest_rates, mock_table):
+        mock_table.get_item.return_value = {}
+        
+        with pytest.raises(ExternalAPIUnavailableError):
+            get_conversion_rate('USD', 'BRL', 'test-request-id', Deadline(0))
+        
+        mock_get_latest_rates.assert_not_called()
+
+    @patch('database.rate_store.table')
+    @patch('database.get_latest_rates')
+    def test_expired_deadline_serves_last_known_good(self, mock_get_latest_rates, mock_table, sample_dynamodb_item):
+        sample_dynamodb_item['Item']['ttl'] = 1
+        mock_table.get_item.return_value = sample_dynamodb_item
+        
+        rate, snapshot = get_conversion_quote('USD', 'BRL', 'test-request-id', Deadline(0))
+        
+        assert rate == 5.2
+        assert snapshot.stale
+        mock_get_latest_rates.assert_not_called()
+
+    @patch('database.time.sleep')
+    @patch('database.load_snapshot')
+    def test_lease_wait_bounded_by_deadline(self, mock_load_snapshot, mock_sleep):
+        from database import wait_for_refreshed_snapshot
+        
+        assert wait_for_refreshed_snapshot('USD', 'test-request-id', Deadline(0)) is None
+        mock_load_snapshot.assert_not_called()
+
+
+class TestConditionalRefresh:
+    @patch('database.rate_store.table')
+    @patch('database.get_latest_rates')
+    def test_not_modified_extends_ttl_only(self, mock_get_latest_rates, mock_table, sample_dynamodb_item):
+        sample_dynamodb_item['Item']['ttl'] = 1
+        sample_dynamodb_item['Item']['validators'] = {'provider': 'exchangerate_api', 'etag': '"v1"'}
+        mock_table.get_item.return_value = sample_dynamodb_item
+        mock_get_latest_rates.return_value = ProviderRates(
+            validators={'provider': 'exchangerate_api', 'etag': '"v1"'},
+            not_modified=True
+        )
+        
+        snapshot = get_rate_snapshot('USD', 'test-request-id')
+        
+        assert mock_get_latest_rates.call_args.args[3] == {'provider': 'exchangerate_api', 'etag': '"v1"'}
+        assert snapshot.version == 1704067200
+        assert snapshot.rates['BRL'] == 5.2
+        assert snapshot.expires_at > time.time()
+        assert all(call.kwargs['Item']['to_currency'] == '#lease' for call in mock_table.put_item.call_args_list)
+        update = mock_table.update_item.call_args.kwargs
+        assert update['ExpressionAttributeValues'][':ttl'] == snapshot.expires_at
+        assert rate_cache.get('USD') is snapshot
+
+    @patch('database.rate_store.table')
+    @patch('database.get_latest_rates')
+    def test_new_rates_store_validators(self, mock_get_latest_rates, mock_table):
+        mock_table.get_item.return_value = {}
+        mock_get_latest_rates.return_value = ProviderRates(
+            {'USD': 1.0, 'BRL': 5.3},
+            validators={'provider': 'exchangerate_api', 'etag': '"v2"'}
+        )
+        
+        snapshot = get_rate_snapshot('USD', 'test-request-id')
+        
+        item = mock_table.put_item.call_args.kwargs['Item']
+        assert item['validators'] == {'provider': 'exchangerate_api', 'etag': '"v2"'}
+        assert snapshot.validators['etag'] == '"v2"'
+
+    @patch('database.rate_store.table')
+    @patch('database.get_latest_rates')
+    def test_prefetch_extends_unchanged_bases(self, mock_get_latest_rates, mock_table, sample_dynamodb_item):
+        mock_table.get_item.return_value = sample_dynamodb_item
+        last_known_good['USD'] = load_snapshot('USD', 'test-request-id')
+        mock_get_latest_rates.return_value = ProviderRates(validators={'provider': 'exchangerate_api'}, not_modified=True)
+        
+        snapshots, failures = prefetch_snapshots(['USD'], 'test-request-id')
+        
+        assert failures == {}
+        assert [snapshot.version for snapshot in snapshots] == [1704067200]
+        mock_table.batch_writer.assert_not_called()
+        mock_table.update_item.assert_called_once()
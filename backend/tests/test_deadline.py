@@ -0,0 +1,53 @@
+import math
+import pytest
+from unittest.mock import Mock
+from utils.deadline import Deadline, DeadlineExceededError
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+    
+    def __call__(self):
+        return self.now
+
+
+class TestDeadline:
+    def test_unbounded(self):
+        deadline = Deadline()
+        
+        assert not deadline.is_bounded
+        assert deadline.remaining() == math.inf
+        assert deadline.bound(5.0) == 5.0
+
+    def test_remaining_counts_down(self):
+        clock = FakeClock()
+        deadline = Deadline(3.0, clock=clock)
+        
+        clock.now = 1.0
+        assert deadline.remaining() == 2.0
+        assert deadline.bound(5.0) == 2.0
+        assert deadline.bound(0.5) == 0.5
+
+    def test_expired_deadline_raises(self):
+        clock = FakeClock()
+        deadline = Deadline(1.0, clock=clock)
+        clock.now = 1.5
+        
+        assert deadline.expired()
+        with pytest.raises(DeadlineExceededError) as exc_info:
+            deadline.bound(5.0, 'fetching rates')
+        
+        assert 'fetching rates' in str(exc_info.value)
+
+    def test_from_context_keeps_reserve(self):
+        context = Mock()
+        context.get_remaining_time_in_millis.return_value = 3000
+        
+        deadline = Deadline.from_context(context, reserve_seconds=0.5, clock=FakeClock())
+        
+        assert deadline.remaining() == 2.5
+
+    def test_from_context_without_budget(self):
+        assert not Deadline.from_context(None).is_bounded
+        assert not Deadline.from_context(Mock()).is_bounded
@@ -2,9 +2,27 @@ import pytest
 import requests
 import os
 import importlib
+import json
+import threading
+import time
 import external_api
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest.mock import Mock, patch
 from external_api import get_latest_rates
+from rate_providers import ExchangeRateApiProvider, FrankfurterProvider
+from utils.latency_tracker import LatencyTracker
+from utils.deadline import Deadline, DeadlineExceededError
+
+
+def make_response(json_data=None, status_code=200):
+    response = Mock()
+    response.status_code = status_code
+    response.elapsed = timedelta(milliseconds=42)
+    response.headers = {}
+    response.content = json.dumps(json_data).encode()
+    response.raise_for_status.return_value = None
+    return response
 
 
 class TestGetLatestRates:
@@ -12,19 +30,16 @@ class TestGetLatestRates:
         'EXCHANGE_RATE_API_URL': 'https://api.exchangerate-api.com/v4/latest',
         'EXTERNAL_API_TIMEOUT': '5'
     })
-    @patch('external_api.requests.get')
+    @patch('external_api.http_session.get')
     def test_successful_request(self, mock_requests_get, sample_rates_response):
-        mock_response = Mock()
-        mock_response.json.return_value = sample_rates_response
-        mock_response.raise_for_status.return_value = None
-        mock_requests_get.return_value = mock_response
+        mock_requests_get.return_value = make_response(sample_rates_response)
         
         rates = get_latest_rates('USD')
         
         assert rates == sample_rates_response['rates']
         mock_requests_get.assert_called_once_with(
             'https://api.exchangerate-api.com/v4/latest/USD',
-            timeout=5
+            timeout=(3.05, 5.0)
         )
 
     @patch.dict(os.environ, {
@@ -32,25 +47,22 @@ class TestGetLatestRates:
         'EXTERNAL_API_TIMEOUT': '10',
         'STAGE': 'dev'
     })
-    @patch('external_api.requests.get')
-    def test_custom_api_url_and_timeout(self, mock_requests_get, sample_rates_response):
+    def test_custom_api_url_and_timeout(self, sample_rates_response):
         importlib.reload(external_api)
         
-        mock_response = Mock()
-        mock_response.json.return_value = sample_rates_response
-        mock_response.raise_for_status.return_value = None
-        mock_requests_get.return_value = mock_response
-        
-        rates = external_api.get_latest_rates('USD')
+        with patch.object(external_api.http_session, 'get') as mock_requests_get:
+            mock_requests_get.return_value = make_response(sample_rates_response)
+            
+            rates = external_api.get_latest_rates('USD')
         
         assert rates == sample_rates_response['rates']
         mock_requests_get.assert_called_once_with(
             'https://custom-api.com/v4/latest/USD',
-            timeout=10
+            timeout=(3.05, 10.0)
         )
 
     @patch.dict(os.environ, {'EXTERNAL_API_TIMEOUT': '5'})
-    @patch('external_api.requests.get')
+    @patch('external_api.http_session.get')
     def test_timeout_error(self, mock_requests_get):
         mock_requests_get.side_effect = requests.exceptions.Timeout()
         
@@ -60,10 +72,9 @@ class TestGetLatestRates:
         assert 'Timeout while fetching rates' in str(exc_info.value)
 
     @patch.dict(os.environ, {'EXTERNAL_API_TIMEOUT': '5'})
-    @patch('external_api.requests.get')
+    @patch('external_api.http_session.get')
     def test_http_404_error(self, mock_requests_get):
-        mock_response = Mock()
-        mock_response.status_code = 404
+        mock_response = make_response(status_code=404)
         mock_response.raise_for_status.side_effect = requests.exceptions.HTTPError(response=mock_response)
         mock_requests_get.return_value = mock_response
         
@@ -73,10 +84,9 @@ class TestGetLatestRates:
         assert 'Currency INVALID not supported' in str(exc_info.value)
 
     @patch.dict(os.environ, {'EXTERNAL_API_TIMEOUT': '5'})
-    @patch('external_api.requests.get')
+    @patch('external_api.http_session.get')
     def test_http_500_error(self, mock_requests_get):
-        mock_response = Mock()
-        mock_response.status_code = 500
+        mock_response = make_response(status_code=500)
         mock_response.raise_for_status.side_effect = requests.exceptions.HTTPError(response=mock_response)
         mock_requests_get.return_value = mock_response
         
@@ -86,20 +96,29 @@ class TestGetLatestRates:
         assert 'HTTP error 500' in str(exc_info.value)
 
     @patch.dict(os.environ, {'EXTERNAL_API_TIMEOUT': '5'})
-    @patch('external_api.requests.get')
+    @patch('external_api.http_session.get')
     def test_invalid_response_missing_rates(self, mock_requests_get):
-        mock_response = Mock()
-        mock_response.json.return_value = {'base': 'USD', 'date': '2024-01-01'}
-        mock_response.raise_for_status.return_value = None
+        mock_requests_get.return_value = make_response({'base': 'USD', 'date': '2024-01-01'})
+        
+        with pytest.raises(ConnectionError) as exc_info:
+            get_latest_rates('USD')
+        
+        assert 'Invalid response format' in str(exc_info.value)
+
+    @patch.dict(os.environ, {'EXTERNAL_API_TIMEOUT': '5'})
+    @patch('external_api.http_session.get')
+    def test_malformed_body_is_treated_as_outage(self, mock_requests_get):
+        mock_response = make_response()
+        mock_response.content = b'<html>Service Unavailable</html>'
         mock_requests_get.return_value = mock_response
         
-        with pytest.raises(ValueError) as exc_info:
+        with pytest.raises(ConnectionError) as exc_info:
             get_latest_rates('USD')
         
         assert 'Invalid response format' in str(exc_info.value)
 
     @patch.dict(os.environ, {'EXTERNAL_API_TIMEOUT': '5'})
-    @patch('external_api.requests.get')
+    @patch('external_api.http_session.get')
     def test_request_exception(self, mock_requests_get):
         mock_requests_get.side_effect = requests.exceptions.RequestException('Connection failed')
         
@@ -109,7 +128,7 @@ class TestGetLatestRates:
         assert 'Failed to fetch rates' in str(exc_info.value)
 
     @patch.dict(os.environ, {'EXTERNAL_API_TIMEOUT': '5'})
-    @patch('external_api.requests.get')
+    @patch('external_api.http_session.get')
     def test_connection_error(self, mock_requests_get):
         mock_requests_get.side_effect = requests.exceptions.ConnectionError('Network error')
         
@@ -123,8 +142,7 @@ class TestGetLatestRates:
         'EXTERNAL_API_TIMEOUT': '5',
         'STAGE': 'dev'
     })
-    @patch('external_api.requests.get')
-    def test_different_base_currency(self, mock_requests_get, sample_rates_response):
+    def test_different_base_currency(self, sample_rates_response):
         importlib.reload(external_api)
         
         eur_rates = {
@@ -135,16 +153,420 @@ class TestGetLatestRates:
             },
             'base': 'EUR'
         }
-        mock_response = Mock()
-        mock_response.json.return_value = eur_rates
-        mock_response.raise_for_status.return_value = None
-        mock_requests_get.return_value = mock_response
-        
-        rates = external_api.get_latest_rates('EUR')
+        with patch.object(external_api.http_session, 'get') as mock_requests_get:
+            mock_requests_get.return_value = make_response(eur_rates)
+            
+            rates = external_api.get_latest_rates('EUR')
         
         assert rates == eur_rates['rates']
         mock_requests_get.assert_called_once_with(
             'https://api.exchangerate-api.com/v4/latest/EUR',
-            timeout=5
+            timeout=(3.05, 5.0)
         )
 
+
+
+class RatesStubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    
+    def do_GET(self):
+        body = json.dumps({'base': 'USD', 'rates': {'USD': 1.0, 'BRL': 5.2}}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def rates_stub_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), RatesStubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}/v4/latest'
+    server.shutdown()
+    server.server_close()
+
+
+class TestHttpSession:
+    @patch.dict(os.environ, {'EXTERNAL_API_POOL_SIZE': '4', 'EXTERNAL_API_GZIP': 'true'})
+    def test_session_pool_and_headers(self):
+        session = external_api.create_http_session()
+        adapter = session.get_adapter('https://api.exchangerate-api.com')
+        
+        assert adapter._pool_maxsize == 4
+        assert adapter.max_retries.total == 0
+        assert session.headers['Accept-Encoding'] == 'gzip, deflate'
+        assert session.headers['Connection'] == 'keep-alive'
+
+    @patch.dict(os.environ, {'EXTERNAL_API_GZIP': 'false'})
+    def test_gzip_can_be_disabled(self):
+        session = external_api.create_http_session()
+        
+        assert session.headers['Accept-Encoding'] == 'identity'
+
+    @patch.dict(os.environ, {'EXTERNAL_API_CONNECT_TIMEOUT': '1.5', 'EXTERNAL_API_READ_TIMEOUT': '8'})
+    def test_split_timeouts_from_env(self):
+        assert external_api.get_connect_timeout(5.0) == 1.5
+        assert external_api.get_read_timeout(5.0) == 8.0
+
+    def test_connect_timeout_never_exceeds_request_timeout(self):
+        assert external_api.get_connect_timeout(2.0) == 2.0
+        assert external_api.get_connect_timeout(10.0) == 3.05
+
+    def test_warm_calls_reuse_connection(self, rates_stub_server):
+        with patch.object(external_api, 'RATE_PROVIDERS', [ExchangeRateApiProvider(rates_stub_server)]), \
+                patch.object(external_api, 'http_session', external_api.create_http_session()), \
+                patch('external_api.logger') as mock_logger:
+            external_api.get_latest_rates('USD')
+            rates = external_api.get_latest_rates('USD')
+        
+        assert rates == {'USD': 1.0, 'BRL': 5.2}
+        received = [
+            call.kwargs['extra'] for call in mock_logger.info.call_args_list
+            if call.args[0] == 'External API response received'
+        ]
+        assert received[0]['connections_opened'] == 1
+        assert received[1]['connection_reused'] is True
+        assert received[1]['connections_opened'] == 1
+
+
+class QuietHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    
+    def handle_error(self, request, client_address):
+        pass
+
+
+class DelayedStub:
+    """Local rates provider answering with a fixed delay, status and payload."""
+    
+    def __init__(self, delay=0.0, status=200, payload=None):
+        self.delay = delay
+        self.status = status
+        self.payload = payload if payload is not None else {'rates': {'USD': 1.0, 'BRL': 5.2}}
+        self.requests = 0
+        stub = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            
+            def do_GET(self):
+                stub.requests += 1
+                time.sleep(stub.delay)
+                body = json.dumps(stub.payload).encode()
+                self.send_response(stub.status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        self.server = QuietHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+    
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub_factory():
+    stubs = []
+    
+    def create(**kwargs):
+        stub = DelayedStub(**kwargs)
+        stubs.append(stub)
+        return stub
+    
+    yield create
+    for stub in stubs:
+        stub.close()
+
+
+@pytest.fixture
+def hedged(monkeypatch):
+    def configure(*providers, hedge_delay=0.05):
+        monkeypatch.setattr(external_api, 'RATE_PROVIDERS', list(providers))
+        monkeypatch.setattr(external_api, 'HEDGE_DELAY_SECONDS', hedge_delay)
+        monkeypatch.setattr(external_api, 'http_session', external_api.create_http_session())
+        monkeypatch.setattr(external_api, 'primary_latency', LatencyTracker())
+    
+    return configure
+
+
+class TestHedgedRequests:
+    def test_fast_primary_wins_without_hedging(self, stub_factory, hedged):
+        primary = stub_factory()
+        secondary = stub_factory(payload={'rates': {'USD': 1.0, 'BRL': 9.9}})
+        hedged(ExchangeRateApiProvider(primary.url), ExchangeRateApiProvider(secondary.url), hedge_delay=0.5)
+        
+        rates = external_api.get_latest_rates('USD')
+        
+        assert rates == {'USD': 1.0, 'BRL': 5.2}
+        assert secondary.requests == 0
+        assert len(external_api.primary_latency) == 1
+
+    def test_slow_primary_is_hedged_to_secondary(self, stub_factory, hedged):
+        primary = stub_factory(delay=1.0)
+        secondary = stub_factory(payload={'rates': {'USD': 1.0, 'BRL': 5.3}})
+        hedged(ExchangeRateApiProvider(primary.url), ExchangeRateApiProvider(secondary.url), hedge_delay=0.05)
+        
+        started_at = time.monotonic()
+        rates = external_api.get_latest_rates('USD')
+        
+        assert rates == {'USD': 1.0, 'BRL': 5.3}
+        assert time.monotonic() - started_at < 0.8
+        assert secondary.requests == 1
+
+    def test_failed_primary_fails_over_immediately(self, stub_factory, hedged):
+        primary = stub_factory(status=500, payload={'error': 'boom'})
+        secondary = stub_factory()
+        hedged(ExchangeRateApiProvider(primary.url), ExchangeRateApiProvider(secondary.url), hedge_delay=5.0)
+        
+        started_at = time.monotonic()
+        rates = external_api.get_latest_rates('USD')
+        
+        assert rates == {'USD': 1.0, 'BRL': 5.2}
+        assert time.monotonic() - started_at < 1.0
+
+    def test_invalid_secondary_response_waits_for_primary(self, stub_factory, hedged):
+        primary = stub_factory(delay=0.3)
+        secondary = stub_factory(payload={'unexpected': True})
+        hedged(ExchangeRateApiProvider(primary.url), ExchangeRateApiProvider(secondary.url), hedge_delay=0.05)
+        
+        assert external_api.get_latest_rates('USD') == {'USD': 1.0, 'BRL': 5.2}
+
+    def test_secondary_adapter_normalizes_payload(self, stub_factory, hedged):
+        primary = stub_factory(delay=1.0)
+        secondary = stub_factory(payload={'amount': 1.0, 'base': 'USD', 'rates': {'BRL': 5.25}})
+        hedged(ExchangeRateApiProvider(primary.url), FrankfurterProvider(secondary.url), hedge_delay=0.05)
+        
+        assert external_api.get_latest_rates('USD') == {'BRL': 5.25, 'USD': 1.0}
+
+    def test_all_providers_failing_raises_connection_error(self, stub_factory, hedged):
+        primary = stub_factory(status=503, payload={})
+        secondary = stub_factory(status=500, payload={})
+        hedged(ExchangeRateApiProvider(primary.url), ExchangeRateApiProvider(secondary.url))
+        
+        with pytest.raises(ConnectionError) as exc_info:
+            external_api.get_latest_rates('USD')
+        
+        assert 'from all providers' in str(exc_info.value)
+
+    def test_currency_unsupported_everywhere(self, stub_factory, hedged):
+        primary = stub_factory(status=404, payload={})
+        secondary = stub_factory(status=404, payload={})
+        hedged(ExchangeRateApiProvider(primary.url), ExchangeRateApiProvider(secondary.url))
+        
+        with pytest.raises(external_api.UnsupportedCurrencyError):
+            external_api.get_latest_rates('XYZ')
+
+    def test_hedge_delay_follows_primary_percentile(self, monkeypatch):
+        tracker = LatencyTracker()
+        monkeypatch.setattr(external_api, 'primary_latency', tracker)
+        monkeypatch.setattr(external_api, 'HEDGE_MIN_SAMPLES', 10)
+        monkeypatch.setattr(external_api, 'HEDGE_PERCENTILE', 90.0)
+        
+        assert external_api.get_hedge_delay() == external_api.HEDGE_DELAY_SECONDS
+        
+        for latency_ms in range(10, 110, 10):
+            tracker.record(latency_ms / 1000)
+        
+        assert external_api.get_hedge_delay() == 0.09
+
+    def test_hedge_delay_is_clamped(self, monkeypatch):
+        tracker = LatencyTracker()
+        monkeypatch.setattr(external_api, 'primary_latency', tracker)
+        monkeypatch.setattr(external_api, 'HEDGE_MIN_SAMPLES', 1)
+        
+        tracker.record(0.001)
+        assert external_api.get_hedge_delay() == external_api.HEDGE_MIN_DELAY_SECONDS
+        
+        tracker.clear()
+        tracker.record(60.0)
+        assert external_api.get_hedge_delay() == external_api.READ_TIMEOUT
+
+
+class TestGetRateProviders:
+    @patch.dict(os.environ, {'RATE_PROVIDERS': 'exchangerate_api,frankfurter=http://stub.local'})
+    def test_primary_uses_configured_url(self):
+        providers = external_api.get_rate_providers('https://primary.local/v4/latest')
+        
+        assert [provider.name for provider in providers] == ['exchangerate_api', 'frankfurter']
+        assert providers[0].base_url == 'https://primary.local/v4/latest'
+        assert providers[1].base_url == 'http://stub.local'
+
+    @patch.dict(os.environ, {'RATE_PROVIDERS': ''})
+    def test_defaults_to_single_provider(self):
+        providers = external_api.get_rate_providers('https://primary.local/v4/latest')
+        
+        assert len(providers) == 1
+        assert providers[0].build_url('USD') == 'https://primary.local/v4/latest/USD'
+
+
+class TestDeadlineAwareFetch:
+    @patch('utils.retry.time.sleep')
+    @patch('external_api.http_session.get')
+    def test_timeouts_cut_to_deadline(self, mock_requests_get, mock_sleep, sample_rates_response):
+        mock_requests_get.return_value = make_response(sample_rates_response)
+        
+        external_api.get_latest_rates('USD', deadline=Deadline(1.0, clock=lambda: 0.0))
+        
+        assert mock_requests_get.call_args.kwargs['timeout'] == (1.0, 1.0)
+
+    @patch('utils.retry.time.sleep')
+    @patch('external_api.http_session.get')
+    def test_connection_failure_retried_with_backoff(self, mock_requests_get, mock_sleep, sample_rates_response):
+        mock_requests_get.side_effect = [
+            requests.exceptions.ConnectionError('reset'),
+            make_response(sample_rates_response)
+        ]
+        
+        rates = external_api.get_latest_rates('USD', deadline=Deadline(10.0))
+        
+        assert rates == sample_rates_response['rates']
+        assert mock_requests_get.call_count == 2
+        mock_sleep.assert_called_once()
+
+    @patch('utils.retry.time.sleep')
+    @patch('external_api.http_session.get')
+    def test_no_retry_when_budget_too_small(self, mock_requests_get, mock_sleep):
+        mock_requests_get.side_effect = requests.exceptions.Timeout()
+        
+        with pytest.raises(ConnectionError):
+            external_api.get_latest_rates('USD', deadline=Deadline(0.2))
+        
+        assert mock_requests_get.call_count == 1
+        mock_sleep.assert_not_called()
+
+    @patch('external_api.http_session.get')
+    def test_expired_deadline_makes_no_call(self, mock_requests_get):
+        with pytest.raises(DeadlineExceededError):
+            external_api.get_latest_rates('USD', deadline=Deadline(0))
+        
+        mock_requests_get.assert_not_called()
+
+    @patch('external_api.http_session.get')
+    def test_not_found_is_not_retried(self, mock_requests_get):
+        mock_response = make_response(status_code=404)
+        mock_response.raise_for_status.side_effect = requests.exceptions.HTTPError(response=mock_response)
+        mock_requests_get.return_value = mock_response
+        
+        with pytest.raises(ValueError):
+            external_api.get_latest_rates('XYZ', deadline=Deadline(10.0))
+        
+        assert mock_requests_get.call_count == 1
+
+    def test_hedged_wait_bounded_by_deadline(self, stub_factory, hedged):
+        primary = stub_factory(delay=1.0)
+        secondary = stub_factory(delay=1.0)
+        hedged(ExchangeRateApiProvider(primary.url), ExchangeRateApiProvider(secondary.url), hedge_delay=0.05)
+        
+        started_at = time.monotonic()
+        with pytest.raises((DeadlineExceededError, ConnectionError)):
+            external_api.get_latest_rates('USD', deadline=Deadline(0.3))
+        
+        assert time.monotonic() - started_at < 0.8
+
+
+class ConditionalStub(DelayedStub):
+    """Stub that honours If-None-Match against a fixed ETag."""
+    
+    def __init__(self, etag='"v1"', payload=None):
+        super().__init__(payload=payload)
+        self.etag = etag
+        self.conditional_requests = 0
+        stub = self
+        handler = self.server.RequestHandlerClass
+        
+        def do_GET(request):
+            stub.requests += 1
+            if request.headers.get('If-None-Match') is not None:
+                stub.conditional_requests += 1
+            if request.headers.get('If-None-Match') == stub.etag:
+                request.send_response(304)
+                request.send_header('ETag', stub.etag)
+                request.send_header('Content-Length', '0')
+                request.end_headers()
+                return
+            body = json.dumps(stub.payload).encode()
+            request.send_response(200)
+            request.send_header('ETag', stub.etag)
+            request.send_header('Content-Length', str(len(body)))
+            request.end_headers()
+            request.wfile.write(body)
+        
+        handler.do_GET = do_GET
+
+
+class TestConditionalRequests:
+    @pytest.fixture(autouse=True)
+    def fresh_session(self, monkeypatch):
+        monkeypatch.setattr(external_api, 'http_session', external_api.create_http_session())
+
+    def test_full_body_returns_validators_and_supported_rates_only(self, monkeypatch):
+        stub = ConditionalStub(payload={
+            'base': 'USD',
+            'time_last_updated': 1704067200,
+            'rates': {'USD': 1, 'BRL': 5.2, 'XAU': 0.0004, 'ZAR': 18.7}
+        })
+        try:
+            monkeypatch.setattr(external_api, 'RATE_PROVIDERS', [ExchangeRateApiProvider(stub.url)])
+            
+            rates = external_api.get_latest_rates('USD')
+        finally:
+            stub.close()
+        
+        assert rates == {'USD': 1.0, 'BRL': 5.2}
+        assert not rates.not_modified
+        assert rates.validators == {'provider': 'exchangerate_api', 'etag': '"v1"', 'body_version': '1704067200'}
+        assert stub.conditional_requests == 0
+
+    def test_not_modified_response(self, monkeypatch):
+        stub = ConditionalStub()
+        try:
+            monkeypatch.setattr(external_api, 'RATE_PROVIDERS', [ExchangeRateApiProvider(stub.url)])
+            
+            rates = external_api.get_latest_rates('USD', validators={'provider': 'exchangerate_api', 'etag': '"v1"'})
+        finally:
+            stub.close()
+        
+        assert rates.not_modified
+        assert rates == {}
+        assert rates.validators['etag'] == '"v1"'
+        assert stub.conditional_requests == 1
+
+    def test_changed_etag_returns_full_body(self, monkeypatch):
+        stub = ConditionalStub(etag='"v2"')
+        try:
+            monkeypatch.setattr(external_api, 'RATE_PROVIDERS', [ExchangeRateApiProvider(stub.url)])
+            
+            rates = external_api.get_latest_rates('USD', validators={'provider': 'exchangerate_api', 'etag': '"v1"'})
+        finally:
+            stub.close()
+        
+        assert not rates.not_modified
+        assert rates.validators['etag'] == '"v2"'
+
+    @patch('external_api.http_session.get')
+    def test_same_body_version_is_not_modified(self, mock_requests_get, sample_rates_response):
+        mock_requests_get.return_value = make_response(dict(sample_rates_response, time_last_updated=1704067200))
+        
+        rates = get_latest_rates('USD', validators={'provider': 'exchangerate_api', 'body_version': '1704067200'})
+        
+        assert rates.not_modified
+
+    @patch('external_api.http_session.get')
+    def test_validators_from_other_provider_are_not_sent(self, mock_requests_get, sample_rates_response):
+        mock_requests_get.return_value = make_response(sample_rates_response)
+        
+        get_latest_rates('USD', validators={'provider': 'frankfurter', 'etag': '"v1"'})
+        
+        assert 'headers' not in mock_requests_get.call_args.kwargs
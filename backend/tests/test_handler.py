@@ -0,0 +1,427 @@
+import csv
+import json
+import time
+import base64
+import pytest
+from unittest.mock import Mock, patch
+from cryptography.hazmat.primitives.asymmetric import ed25519
+import auth
+import database
+import handler
+import rate_history
+from rate_engine import RateSnapshot
+from jwt_keyring import Keyring
+from database import ExternalAPIUnavailableError, DatabaseError
+from quotas import QuotaExceededError
+from utils.deadline import DeadlineExceededError
+from stores.memory import MemoryRateStore, MemoryUserStore
+
+
+def make_context():
+    context = Mock()
+    context.aws_request_id = 'req-123'
+    context.get_remaining_time_in_millis.return_value = 30000
+    return context
+
+
+def make_event(body=None, query=None, headers=None, method='POST'):
+    return {
+        'httpMethod': method,
+        'headers': headers or {'Authorization': 'Bearer valid-token'},
+        'queryStringParameters': query,
+        'body': json.dumps(body) if isinstance(body, (dict, list)) else body
+    }
+
+
+def parse_body(response):
+    return json.loads(response['body'])
+
+
+@pytest.fixture
+def snapshot():
+    now = int(time.time())
+    return RateSnapshot('USD', {'USD': 1.0, 'BRL': 5.2, 'EUR': 0.92, 'JPY': 150.0}, now, now + 3600)
+
+
+@pytest.fixture
+def authenticated():
+    with patch('handler.require_auth', return_value={'user_id': 'user123', 'username': 'testuser'}) as mock_auth:
+        yield mock_auth
+
+
+@pytest.fixture
+def rate_snapshot(snapshot):
+    database.negative_cache.clear()
+    with patch('database.get_rate_snapshot', return_value=snapshot) as mock_get:
+        yield mock_get
+    database.negative_cache.clear()
+
+
+class TestPrefetchRates:
+    @patch('handler.get_prefetch_currencies', return_value=['USD', 'EUR'])
+    @patch('handler.prefetch_snapshots')
+    def test_reports_refreshed_and_failed_bases(self, mock_prefetch, mock_currencies, snapshot):
+        mock_prefetch.return_value = ([snapshot], {'EUR': 'Provider timeout'})
+        
+        result = handler.prefetch_rates({}, make_context())
+        
+        assert result == {'refreshed': ['USD'], 'failed': {'EUR': 'Provider timeout'}}
+        mock_prefetch.assert_called_once_with(['USD', 'EUR'], 'req-123')
+
+    @patch('handler.get_prefetch_currencies', return_value=['USD'])
+    @patch('handler.prefetch_snapshots', return_value=([], {'USD': 'Provider timeout'}))
+    def test_fails_when_every_base_fails(self, mock_prefetch, mock_currencies):
+        with pytest.raises(ExternalAPIUnavailableError):
+            handler.prefetch_rates({}, make_context())
+
+    @patch('handler.get_prefetch_currencies', return_value=['USD'])
+    @patch('handler.prefetch_snapshots', side_effect=DatabaseError('DynamoDB error'))
+    def test_database_error_is_raised(self, mock_prefetch, mock_currencies):
+        with pytest.raises(DatabaseError):
+            handler.prefetch_rates({}, make_context())
+
+
+HISTORY_START = 1704067200
+
+
+@pytest.fixture
+def history():
+    rate_history.keyframes.clear()
+    store = MemoryRateStore()
+    with patch('rate_history.rate_store', store):
+        for offset, brl in enumerate([5.0, 5.1, 5.2]):
+            fetched_at = HISTORY_START + offset * 60
+            rate_history.append_snapshot(RateSnapshot('USD', {'USD': 1.0, 'BRL': brl, 'EUR': 0.9}, fetched_at, fetched_at + 3600))
+        yield store
+    rate_history.keyframes.clear()
+
+
+class TestRatesHistory:
+    def history_event(self, **query):
+        return make_event(query=query, method='GET')
+
+    def test_pages_through_range_with_next_token(self, authenticated, history):
+        first = handler.rates_history(self.history_event(
+            **{'from': 'USD', 'to': 'BRL', 'start': str(HISTORY_START), 'end': str(HISTORY_START + 120), 'limit': '2'}
+        ), make_context())
+        
+        assert first['statusCode'] == 200
+        first_body = parse_body(first)
+        assert [point['rate'] for point in first_body['points']] == pytest.approx([5.0, 5.1])
+        assert first_body['next_token'] is not None
+        
+        second = handler.rates_history(self.history_event(
+            **{'from': 'USD', 'to': 'BRL', 'start': str(HISTORY_START), 'end': str(HISTORY_START + 120), 'limit': '2',
+               'next_token': first_body['next_token']}
+        ), make_context())
+        
+        second_body = parse_body(second)
+        assert [point['rate'] for point in second_body['points']] == pytest.approx([5.2])
+        assert second_body['next_token'] is None
+
+    def test_rate_at_timestamp(self, authenticated, history):
+        response = handler.rates_history(self.history_event(
+            **{'from': 'USD', 'to': 'BRL', 'at': str(HISTORY_START + 90)}
+        ), make_context())
+        
+        assert response['statusCode'] == 200
+        assert parse_body(response)['rate'] == pytest.approx(5.1)
+
+    def test_no_rate_before_timestamp(self, authenticated, history):
+        response = handler.rates_history(self.history_event(
+            **{'from': 'USD', 'to': 'BRL', 'at': str(HISTORY_START - 1)}
+        ), make_context())
+        
+        assert response['statusCode'] == 404
+
+    def test_invalid_next_token(self, authenticated, history):
+        response = handler.rates_history(self.history_event(
+            **{'from': 'USD', 'to': 'BRL', 'start': str(HISTORY_START), 'next_token': 'not-a-token'}
+        ), make_context())
+        
+        assert response['statusCode'] == 400
+        assert parse_body(response)['error'] == 'Invalid next_token'
+
+    @pytest.mark.parametrize('query', [
+        {'from': 'USD', 'to': 'USD', 'start': '1704067200'},
+        {'from': 'USD', 'to': 'BRL', 'at': '1704067200', 'start': '1704067200'},
+        {'from': 'USD', 'to': 'BRL'},
+        {'from': 'USD', 'to': 'BRL', 'start': '1704067200', 'limit': '0'},
+        {'from': 'USD', 'to': 'BRL', 'start': 'yesterday'}
+    ])
+    def test_invalid_query(self, authenticated, history, query):
+        response = handler.rates_history(self.history_event(**query), make_context())
+        
+        assert response['statusCode'] == 400
+
+
+class TestConvertBatch:
+    def test_each_item_carries_its_own_status(self, authenticated, rate_snapshot):
+        event = make_event({'items': [
+            {'amount': 100, 'from': 'USD', 'to': 'BRL'},
+            'not an object',
+            {'amount': -5, 'from': 'USD', 'to': 'EUR'},
+            {'amount': 10, 'from': 'USD', 'to': 'GBP'},
+            {'amount': 2, 'from': 'EUR', 'to': 'JPY'}
+        ]})
+        
+        response = handler.convert_batch(event, make_context())
+        
+        assert response['statusCode'] == 200
+        body = parse_body(response)
+        statuses = [result['status'] for result in body['results']]
+        assert statuses == [200, 400, 400, 404, 200]
+        assert body['results'][0]['converted_amount'] == 520.0
+        assert body['results'][1]['error'] == 'Each item must be an object with amount, from and to.'
+        assert body['succeeded'] == 2
+        assert body['failed'] == 3
+        assert body['stale'] is False
+        rate_snapshot.assert_called_once()
+
+    def test_missing_items_array(self, authenticated, rate_snapshot):
+        response = handler.convert_batch(make_event({'amount': 100}), make_context())
+        
+        assert response['statusCode'] == 400
+        assert parse_body(response)['error'] == 'Request body must contain an items array'
+
+    def test_empty_batch(self, authenticated, rate_snapshot):
+        response = handler.convert_batch(make_event({'items': []}), make_context())
+        
+        assert response['statusCode'] == 400
+        rate_snapshot.assert_not_called()
+
+    def test_anchor_unavailable(self, authenticated, rate_snapshot):
+        rate_snapshot.side_effect = ValueError('Rate not available for USD')
+        
+        response = handler.convert_batch(make_event({'items': [{'amount': 1, 'from': 'USD', 'to': 'BRL'}]}), make_context())
+        
+        assert response['statusCode'] == 404
+
+    @pytest.mark.parametrize('error', [
+        ExternalAPIUnavailableError('API down'),
+        DeadlineExceededError('Out of time')
+    ])
+    def test_api_unavailable(self, authenticated, rate_snapshot, error):
+        rate_snapshot.side_effect = error
+        
+        response = handler.convert_batch(make_event({'items': [{'amount': 1, 'from': 'USD', 'to': 'BRL'}]}), make_context())
+        
+        assert response['statusCode'] == 503
+
+    @patch('handler.require_auth', side_effect=QuotaExceededError('Rate limit exceeded. Retry in 3 seconds.', 3))
+    def test_quota_exceeded(self, mock_auth):
+        response = handler.convert_batch(make_event({'items': [{'amount': 1, 'from': 'USD', 'to': 'BRL'}]}), make_context())
+        
+        assert response['statusCode'] == 429
+        assert response['headers']['Retry-After'] == '3'
+
+    @patch('handler.require_auth', side_effect=handler.UnauthorizedError('Invalid token'))
+    def test_unauthorized(self, mock_auth):
+        response = handler.convert_batch(make_event({'items': []}), make_context())
+        
+        assert response['statusCode'] == 401
+
+
+class TestConvertAll:
+    def test_converts_to_every_other_currency(self, authenticated, rate_snapshot):
+        response = handler.convert_all(make_event({'amount': 100, 'from': 'USD'}), make_context())
+        
+        assert response['statusCode'] == 200
+        body = parse_body(response)
+        assert body['from'] == 'USD'
+        assert [conversion['to'] for conversion in body['conversions']] == ['BRL', 'EUR', 'JPY']
+        assert body['conversions'][0]['converted_amount'] == 520.0
+        assert body['unavailable'] == ['GBP']
+        assert body['stale'] is False
+
+    def test_invalid_amount(self, authenticated, rate_snapshot):
+        response = handler.convert_all(make_event({'amount': -1, 'from': 'USD'}), make_context())
+        
+        assert response['statusCode'] == 400
+        rate_snapshot.assert_not_called()
+
+    def test_invalid_currency(self, authenticated, rate_snapshot):
+        response = handler.convert_all(make_event({'amount': 100, 'from': 'XYZ'}), make_context())
+        
+        assert response['statusCode'] == 400
+
+    def test_api_unavailable(self, authenticated, rate_snapshot):
+        rate_snapshot.side_effect = ExternalAPIUnavailableError('API down')
+        
+        response = handler.convert_all(make_event({'amount': 100, 'from': 'USD'}), make_context())
+        
+        assert response['statusCode'] == 503
+
+    def test_anchor_unavailable(self, authenticated, rate_snapshot):
+        rate_snapshot.side_effect = ValueError('Rate not available for USD')
+        
+        response = handler.convert_all(make_event({'amount': 100, 'from': 'USD'}), make_context())
+        
+        assert response['statusCode'] == 404
+
+
+@pytest.fixture
+def bulk_snapshot(snapshot):
+    with patch('bulk_converter.get_rate_snapshot', return_value=snapshot) as mock_get:
+        yield mock_get
+
+
+class TestConvertBulk:
+    NDJSON_BODY = '{"amount": 100, "from": "USD", "to": "BRL"}\n{"amount": 1, "from": "USD"}\n'
+    CSV_BODY = 'amount,from,to\n100,USD,BRL\n5,USD,EUR\n'
+
+    def test_ndjson_by_default(self, authenticated, bulk_snapshot):
+        response = handler.convert_bulk(make_event(self.NDJSON_BODY), make_context())
+        
+        assert response['statusCode'] == 200
+        assert response['headers']['Content-Type'] == 'application/x-ndjson'
+        lines = [json.loads(line) for line in response['body'].splitlines()]
+        assert lines[0]['converted_amount'] == 520.0
+        assert lines[1]['line'] == 2
+        assert 'error' in lines[1]
+
+    def test_csv_from_content_type(self, authenticated, bulk_snapshot):
+        event = make_event(self.CSV_BODY, headers={'Authorization': 'Bearer valid-token', 'Content-Type': 'text/csv'})
+        
+        response = handler.convert_bulk(event, make_context())
+        
+        assert response['statusCode'] == 200
+        assert response['headers']['Content-Type'] == 'text/csv'
+        assert response['body'].splitlines()[0] == 'line,amount,from,to,rate,converted_amount,error'
+        assert len(response['body'].splitlines()) == 3
+
+    def test_format_query_overrides_content_type(self, authenticated, bulk_snapshot):
+        event = make_event(
+            self.CSV_BODY,
+            query={'format': 'csv', 'output': 'ndjson'},
+            headers={'Authorization': 'Bearer valid-token', 'Content-Type': 'application/x-ndjson'}
+        )
+        
+        response = handler.convert_bulk(event, make_context())
+        
+        assert response['statusCode'] == 200
+        assert response['headers']['Content-Type'] == 'application/x-ndjson'
+        assert json.loads(response['body'].splitlines()[1])['to'] == 'EUR'
+
+    def test_invalid_format(self, authenticated, bulk_snapshot):
+        response = handler.convert_bulk(make_event(self.CSV_BODY, query={'format': 'xml'}), make_context())
+        
+        assert response['statusCode'] == 400
+        assert parse_body(response)['error'] == 'Invalid format. Must be one of: ndjson, csv.'
+
+    def test_base64_body(self, authenticated, bulk_snapshot):
+        event = make_event(base64.b64encode(self.NDJSON_BODY.encode()).decode())
+        event['isBase64Encoded'] = True
+        
+        response = handler.convert_bulk(event, make_context())
+        
+        assert response['statusCode'] == 200
+        assert json.loads(response['body'].splitlines()[0])['converted_amount'] == 520.0
+
+    def test_body_not_utf8(self, authenticated, bulk_snapshot):
+        event = make_event(base64.b64encode(b'\xff\xfe').decode())
+        event['isBase64Encoded'] = True
+        
+        response = handler.convert_bulk(event, make_context())
+        
+        assert response['statusCode'] == 400
+        assert parse_body(response)['error'] == 'Request body must be UTF-8 text'
+
+    def test_invalid_csv(self, authenticated, bulk_snapshot):
+        oversized_field = 'x' * (csv.field_size_limit() + 1)
+        
+        response = handler.convert_bulk(make_event(f'amount,from,to\n1,{oversized_field},BRL\n', query={'format': 'csv'}), make_context())
+        
+        assert response['statusCode'] == 400
+        assert parse_body(response)['error'].startswith('Invalid CSV')
+
+    def test_api_unavailable(self, authenticated, bulk_snapshot):
+        bulk_snapshot.side_effect = ExternalAPIUnavailableError('API down')
+        
+        response = handler.convert_bulk(make_event(self.NDJSON_BODY), make_context())
+        
+        assert response['statusCode'] == 503
+
+
+@pytest.fixture
+def user_store():
+    store = MemoryUserStore()
+    with patch('auth.user_store', store):
+        yield store
+
+
+class TestRefresh:
+    USER = {'user_id': 'user123', 'username': 'testuser'}
+
+    @patch('handler.generate_token', return_value='new-access-token')
+    def test_rotates_refresh_token(self, mock_generate, user_store):
+        refresh_token = auth.issue_refresh_token(self.USER)
+        
+        response = handler.refresh(make_event({'refresh_token': refresh_token}), make_context())
+        
+        assert response['statusCode'] == 200
+        body = parse_body(response)
+        assert body['token'] == 'new-access-token'
+        assert body['refresh_token'] != refresh_token
+        assert body['user']['username'] == 'testuser'
+        mock_generate.assert_called_once_with('user123', 'testuser')
+        
+        rotated = handler.refresh(make_event({'refresh_token': body['refresh_token']}), make_context())
+        assert rotated['statusCode'] == 200
+
+    @patch('handler.generate_token', return_value='new-access-token')
+    def test_reused_refresh_token_is_rejected(self, mock_generate, user_store):
+        refresh_token = auth.issue_refresh_token(self.USER)
+        handler.refresh(make_event({'refresh_token': refresh_token}), make_context())
+        
+        response = handler.refresh(make_event({'refresh_token': refresh_token}), make_context())
+        
+        assert response['statusCode'] == 401
+        assert parse_body(response)['error'] == 'Invalid refresh token'
+
+    def test_expired_refresh_token(self, user_store):
+        refresh_token = auth.issue_refresh_token(self.USER, now=time.time() - 365 * 86400)
+        
+        response = handler.refresh(make_event({'refresh_token': refresh_token}), make_context())
+        
+        assert response['statusCode'] == 401
+        assert parse_body(response)['error'] == 'Refresh token has expired'
+
+    def test_missing_refresh_token(self, user_store):
+        response = handler.refresh(make_event({}), make_context())
+        
+        assert response['statusCode'] == 400
+        assert parse_body(response)['error'] == 'refresh_token is required'
+
+    def test_database_error(self, user_store):
+        with patch.object(user_store, 'consume_refresh_token', side_effect=DatabaseError('DynamoDB error')):
+            response = handler.refresh(make_event({'refresh_token': 'some-token'}), make_context())
+        
+        assert response['statusCode'] == 500
+
+
+class TestJwks:
+    def test_no_public_keys_for_hmac(self):
+        with patch('jwt_config.keyring', Keyring('HS256', None, 'secret', {None: ('secret', None)})):
+            response = handler.jwks(make_event(method='GET'), make_context())
+        
+        assert response['statusCode'] == 200
+        assert parse_body(response) == {'keys': []}
+
+    def test_publishes_asymmetric_keys(self):
+        private_key = ed25519.Ed25519PrivateKey.generate()
+        keyring = Keyring('EdDSA', 'k1', private_key, {'k1': (private_key.public_key(), None)})
+        
+        with patch('jwt_config.keyring', keyring):
+            response = handler.jwks(make_event(method='GET'), make_context())
+        
+        assert response['statusCode'] == 200
+        keys = parse_body(response)['keys']
+        assert [key['kid'] for key in keys] == ['k1']
+        assert 'd' not in keys[0]
+
+    @patch('handler.get_jwks', side_effect=RuntimeError('boom'))
+    def test_unexpected_error(self, mock_get_jwks):
+        response = handler.jwks(make_event(method='GET'), make_context())
+        
+        assert response['statusCode'] == 500
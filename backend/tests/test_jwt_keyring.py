@@ -0,0 +1,187 @@
+import os
+import json
+import jwt
+import pytest
+import importlib
+from unittest.mock import patch
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa, ed25519
+import jwt_config
+from jwt_keyring import load_keyring, derive_key_id
+from exceptions import ConfigurationError
+
+
+def private_pem(key):
+    return key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption()
+    ).decode()
+
+
+def public_pem(key):
+    return key.public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo
+    ).decode()
+
+
+@pytest.fixture(scope='module')
+def ed25519_key():
+    return ed25519.Ed25519PrivateKey.generate()
+
+
+@pytest.fixture(scope='module')
+def previous_key():
+    return ed25519.Ed25519PrivateKey.generate()
+
+
+@pytest.fixture(scope='module')
+def rsa_key():
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+@pytest.fixture
+def reload_jwt_config():
+    """Reload jwt_config under the given environment, and restore the default HS256 setup afterwards."""
+    def reload(environment):
+        with patch.dict(os.environ, environment):
+            importlib.reload(jwt_config)
+    yield reload
+    with patch.dict(os.environ, {'JWT_ALGORITHM': 'HS256', 'STAGE': 'dev'}):
+        importlib.reload(jwt_config)
+
+
+class TestLoadKeyring:
+    def test_hmac_keeps_single_secret_without_kid(self):
+        with patch.dict(os.environ, {}, clear=True):
+            keyring = load_keyring('HS256', 'test-secret-key-with-minimum-32-chars')
+        
+        assert keyring.signing_kid is None
+        assert keyring.key_for(None) == 'test-secret-key-with-minimum-32-chars'
+        assert keyring.jwks() == {'keys': []}
+    
+    def test_eddsa_kid_defaults_to_thumbprint(self, ed25519_key):
+        with patch.dict(os.environ, {'JWT_PRIVATE_KEY': private_pem(ed25519_key)}, clear=True):
+            keyring = load_keyring('EdDSA')
+        
+        assert keyring.signing_kid == derive_key_id(ed25519_key.public_key())
+        assert isinstance(keyring.signing_key, ed25519.Ed25519PrivateKey)
+    
+    def test_escaped_newlines_are_accepted(self, ed25519_key):
+        pem = private_pem(ed25519_key).replace('\n', '\\n')
+        with patch.dict(os.environ, {'JWT_PRIVATE_KEY': pem, 'JWT_KEY_ID': 'current'}, clear=True):
+            assert load_keyring('EdDSA').signing_kid == 'current'
+    
+    def test_verification_keys_and_retirement(self, ed25519_key, previous_key):
+        environment = {
+            'JWT_PRIVATE_KEY': private_pem(ed25519_key),
+            'JWT_KEY_ID': 'current',
+            'JWT_VERIFICATION_KEYS': json.dumps([{'kid': 'previous', 'public_key': public_pem(previous_key), 'retire_at': 2000}])
+        }
+        with patch.dict(os.environ, environment, clear=True):
+            keyring = load_keyring('EdDSA')
+        
+        assert keyring.kids == ['current', 'previous']
+        assert keyring.key_for('previous', now=1999) is not None
+        assert keyring.key_for('previous', now=2000) is None
+        assert keyring.key_for('unknown') is None
+        assert [key['kid'] for key in keyring.jwks(now=1999)['keys']] == ['current', 'previous']
+        assert [key['kid'] for key in keyring.jwks(now=2000)['keys']] == ['current']
+    
+    def test_jwks_entries(self, rsa_key):
+        with patch.dict(os.environ, {'JWT_PRIVATE_KEY': private_pem(rsa_key), 'JWT_KEY_ID': 'rsa-1'}, clear=True):
+            jwk = load_keyring('RS256').jwks()['keys'][0]
+        
+        assert jwk['kty'] == 'RSA'
+        assert jwk['kid'] == 'rsa-1'
+        assert jwk['alg'] == 'RS256'
+        assert jwk['use'] == 'sig'
+        assert 'd' not in jwk
+    
+    @pytest.mark.parametrize('algorithm, environment, message', [
+        ('ES999', {}, 'Unsupported JWT_ALGORITHM'),
+        ('EdDSA', {}, 'JWT_PRIVATE_KEY environment variable is required'),
+        ('EdDSA', {'JWT_PRIVATE_KEY': 'not a pem'}, 'JWT_PRIVATE_KEY is invalid'),
+        ('EdDSA', {'JWT_PRIVATE_KEY': '', 'JWT_VERIFICATION_KEYS': ''}, 'JWT_PRIVATE_KEY environment variable is required'),
+    ])
+    def test_invalid_configuration(self, algorithm, environment, message):
+        with patch.dict(os.environ, environment, clear=True):
+            with pytest.raises(ConfigurationError) as exc_info:
+                load_keyring(algorithm)
+        assert message in str(exc_info.value)
+    
+    def test_key_type_must_match_algorithm(self, ed25519_key, rsa_key):
+        with patch.dict(os.environ, {'JWT_PRIVATE_KEY': private_pem(ed25519_key)}, clear=True):
+            with pytest.raises(ConfigurationError):
+                load_keyring('RS256')
+        
+        environment = {
+            'JWT_PRIVATE_KEY': private_pem(ed25519_key),
+            'JWT_VERIFICATION_KEYS': json.dumps([{'kid': 'rsa', 'public_key': public_pem(rsa_key)}])
+        }
+        with patch.dict(os.environ, environment, clear=True):
+            with pytest.raises(ConfigurationError):
+                load_keyring('EdDSA')
+
+
+class TestAsymmetricTokens:
+    def test_eddsa_round_trip_with_kid(self, reload_jwt_config, ed25519_key):
+        reload_jwt_config({'JWT_ALGORITHM': 'EdDSA', 'JWT_PRIVATE_KEY': private_pem(ed25519_key), 'JWT_KEY_ID': 'current', 'STAGE': 'dev'})
+        
+        token = jwt_config.generate_token('user123', 'testuser')
+        
+        assert jwt.get_unverified_header(token)['kid'] == 'current'
+        assert jwt_config.validate_token(token)['user_id'] == 'user123'
+        assert jwt.decode(token, ed25519_key.public_key(), algorithms=['EdDSA'])['username'] == 'testuser'
+    
+    def test_rs256_round_trip(self, reload_jwt_config, rsa_key):
+        reload_jwt_config({'JWT_ALGORITHM': 'RS256', 'JWT_PRIVATE_KEY': private_pem(rsa_key), 'STAGE': 'dev'})
+        
+        token = jwt_config.generate_token('user123', 'testuser')
+        
+        assert jwt_config.validate_token(token)['username'] == 'testuser'
+    
+    def test_tokens_from_previous_key_verify_during_overlap(self, reload_jwt_config, ed25519_key, previous_key):
+        old_token = jwt.encode(
+            {'user_id': 'user123', 'username': 'testuser', 'exp': 9999999999},
+            previous_key, algorithm='EdDSA', headers={'kid': 'previous'}
+        )
+        reload_jwt_config({
+            'JWT_ALGORITHM': 'EdDSA',
+            'JWT_PRIVATE_KEY': private_pem(ed25519_key),
+            'JWT_VERIFICATION_KEYS': json.dumps([{'kid': 'previous', 'public_key': public_pem(previous_key)}]),
+            'STAGE': 'dev'
+        })
+        
+        assert jwt_config.validate_token(old_token)['user_id'] == 'user123'
+    
+    def test_unknown_kid_is_rejected(self, reload_jwt_config, ed25519_key, previous_key):
+        reload_jwt_config({'JWT_ALGORITHM': 'EdDSA', 'JWT_PRIVATE_KEY': private_pem(ed25519_key), 'STAGE': 'dev'})
+        forged = jwt.encode(
+            {'user_id': 'user123', 'username': 'testuser', 'exp': 9999999999},
+            previous_key, algorithm='EdDSA', headers={'kid': 'someone-else'}
+        )
+        
+        with pytest.raises(jwt_config.UnauthorizedError) as exc_info:
+            jwt_config.validate_token(forged)
+        assert 'Invalid token' in str(exc_info.value)
+    
+    def test_hmac_token_rejected_by_asymmetric_keyring(self, reload_jwt_config, ed25519_key):
+        hmac_token = jwt.encode({'user_id': 'user123', 'username': 'testuser', 'exp': 9999999999}, 'test-secret-key-with-minimum-32-chars', algorithm='HS256')
+        reload_jwt_config({'JWT_ALGORITHM': 'EdDSA', 'JWT_PRIVATE_KEY': private_pem(ed25519_key), 'STAGE': 'dev'})
+        
+        with pytest.raises(jwt_config.UnauthorizedError):
+            jwt_config.validate_token(hmac_token)
+    
+    def test_asymmetric_algorithm_does_not_need_secret_in_production(self, reload_jwt_config, ed25519_key):
+        with patch.dict(os.environ, {}, clear=True):
+            reload_jwt_config({
+                'JWT_ALGORITHM': 'EdDSA',
+                'JWT_PRIVATE_KEY': private_pem(ed25519_key),
+                'JWT_EXPIRATION_HOURS': '1',
+                'STAGE': 'prod'
+            })
+        
+        assert jwt_config.JWT_SECRET_KEY is None
+        assert jwt_config.get_jwks()['keys'][0]['crv'] == 'Ed25519'
@@ -0,0 +1,23 @@
+from utils.latency_tracker import LatencyTracker
+
+
+class TestLatencyTracker:
+    def test_empty_percentile(self):
+        assert LatencyTracker().percentile(95) is None
+
+    def test_nearest_rank_percentile(self):
+        tracker = LatencyTracker()
+        for seconds in [0.5, 0.1, 0.3, 0.2, 0.4]:
+            tracker.record(seconds)
+        
+        assert tracker.percentile(50) == 0.3
+        assert tracker.percentile(95) == 0.5
+        assert tracker.percentile(0) == 0.1
+
+    def test_window_keeps_recent_samples(self):
+        tracker = LatencyTracker(window_size=3)
+        for seconds in [9.0, 0.1, 0.2, 0.3]:
+            tracker.record(seconds)
+        
+        assert len(tracker) == 3
+        assert tracker.percentile(100) == 0.3
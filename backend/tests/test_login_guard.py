@@ -0,0 +1,175 @@
+import os
+import pytest
+from unittest.mock import Mock, patch
+from botocore.exceptions import ClientError
+from exceptions import DatabaseError
+from stores.dynamodb import DynamoDBUserStore
+from stores.memory import MemoryUserStore
+from login_guard import LoginGuard, LoginLockedError, get_login_max_failures, get_login_lockout_seconds
+
+
+class FakeClock:
+    def __init__(self, now=1704067200.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def make_guard(store=None, clock=None, max_failures=3, max_failures_per_ip=5, lockout_seconds=30, window_seconds=3600):
+    return LoginGuard(
+        store or MemoryUserStore(),
+        max_failures,
+        max_failures_per_ip,
+        lockout_seconds,
+        window_seconds,
+        clock=clock or FakeClock()
+    )
+
+
+class TestLoginGuardConfig:
+    @patch.dict(os.environ, {}, clear=True)
+    def test_defaults(self):
+        assert get_login_max_failures() == 5
+        assert get_login_lockout_seconds() == 30
+
+    @patch.dict(os.environ, {'LOGIN_MAX_FAILURES': '0'})
+    def test_invalid_value_uses_default(self):
+        assert get_login_max_failures() == 5
+
+
+class TestLoginGuard:
+    def test_allows_attempts_below_threshold(self):
+        guard = make_guard()
+        
+        for _ in range(2):
+            guard.check('admin', '10.0.0.1')
+            guard.record_failure('admin', '10.0.0.1')
+        
+        guard.check('admin', '10.0.0.1')
+
+    def test_locks_username_after_threshold(self):
+        guard = make_guard()
+        for _ in range(3):
+            guard.record_failure('admin', '10.0.0.1')
+        
+        with pytest.raises(LoginLockedError) as exc_info:
+            guard.check('admin', '10.0.0.2')
+        
+        assert exc_info.value.retry_after == 30
+        assert 'Too many failed login attempts' in str(exc_info.value)
+
+    def test_locked_attempt_never_reaches_store(self):
+        store = MemoryUserStore()
+        guard = make_guard(store=store)
+        for _ in range(3):
+            guard.record_failure('admin')
+        
+        with patch.object(store, 'get_login_failures') as mock_get:
+            with pytest.raises(LoginLockedError):
+                guard.check('admin')
+        
+        mock_get.assert_not_called()
+
+    def test_lockout_doubles_with_each_further_failure(self):
+        clock = FakeClock()
+        guard = make_guard(clock=clock)
+        for _ in range(3):
+            guard.record_failure('admin')
+        
+        clock.now += 30
+        guard.check('admin')
+        guard.record_failure('admin')
+        
+        with pytest.raises(LoginLockedError) as exc_info:
+            guard.check('admin')
+        assert exc_info.value.retry_after == 60
+
+    def test_lockout_is_capped_by_window(self):
+        guard = make_guard(window_seconds=100)
+        
+        assert guard.locked_until(50, 1000, 3) == 1100
+
+    def test_locks_ip_across_usernames(self):
+        guard = make_guard()
+        for index in range(5):
+            guard.record_failure(f'user{index}', '10.0.0.1')
+        
+        guard.check('admin', '10.0.0.2')
+        with pytest.raises(LoginLockedError):
+            guard.check('admin', '10.0.0.1')
+
+    def test_lock_recorded_by_another_container_is_honoured(self):
+        store = MemoryUserStore()
+        clock = FakeClock()
+        other = make_guard(store=store, clock=clock)
+        for _ in range(3):
+            other.record_failure('admin')
+        
+        with pytest.raises(LoginLockedError):
+            make_guard(store=store, clock=clock).check('admin')
+
+    def test_success_clears_username_failures(self):
+        guard = make_guard()
+        for _ in range(2):
+            guard.record_failure('admin', '10.0.0.1')
+        
+        guard.record_success('admin')
+        guard.record_failure('admin', '10.0.0.1')
+        
+        guard.check('admin', '10.0.0.1')
+
+    def test_failures_expire_after_window(self):
+        clock = FakeClock()
+        guard = make_guard(clock=clock, window_seconds=600)
+        for _ in range(2):
+            guard.record_failure('admin')
+        
+        clock.now += 600
+        guard.record_failure('admin')
+        
+        guard.check('admin')
+
+    def test_store_errors_fail_open(self):
+        store = Mock()
+        store.get_login_failures.side_effect = DatabaseError('DynamoDB error')
+        store.add_login_failure.side_effect = DatabaseError('DynamoDB error')
+        guard = make_guard(store=store)
+        
+        guard.record_failure('admin', '10.0.0.1')
+        guard.check('admin', '10.0.0.1')
+
+
+class TestDynamoDBLoginFailures:
+    def test_add_login_failure(self):
+        table = Mock()
+        table.update_item.return_value = {'Attributes': {'failures': 2, 'last_failure_at': 100, 'ttl': 3700}}
+        
+        record = DynamoDBUserStore(table).add_login_failure('user#admin', 100, 3700)
+        
+        assert record == {'failures': 2, 'last_failure_at': 100}
+        assert table.update_item.call_args.kwargs['Key'] == {'user_id': 'LOGIN#user#admin'}
+
+    def test_expired_record_restarts_count(self):
+        table = Mock()
+        table.update_item.side_effect = ClientError({'Error': {'Code': 'ConditionalCheckFailedException'}}, 'UpdateItem')
+        
+        record = DynamoDBUserStore(table).add_login_failure('user#admin', 100, 3700)
+        
+        assert record == {'failures': 1, 'last_failure_at': 100}
+        table.put_item.assert_called_once_with(
+            Item={'user_id': 'LOGIN#user#admin', 'failures': 1, 'last_failure_at': 100, 'ttl': 3700}
+        )
+
+    def test_expired_record_is_ignored_on_read(self):
+        table = Mock()
+        table.get_item.return_value = {'Item': {'failures': 9, 'last_failure_at': 50, 'ttl': 100}}
+        
+        assert DynamoDBUserStore(table).get_login_failures('user#admin', 100) is None
+
+    def test_database_error(self):
+        table = Mock()
+        table.update_item.side_effect = ClientError({'Error': {'Code': 'InternalServerError'}}, 'UpdateItem')
+        
+        with pytest.raises(DatabaseError):
+            DynamoDBUserStore(table).add_login_failure('user#admin', 100, 3700)
@@ -1,7 +1,32 @@
+import time
+import jwt
 import pytest
 from unittest.mock import Mock, patch
-from middleware import require_auth, UnauthorizedError
+import middleware
+from middleware import require_auth, verify_token, get_token_cache_stats, token_cache, UnauthorizedError
 from jwt_config import UnauthorizedError as JWTUnauthorizedError
+from jwt_keyring import Keyring
+from exceptions import AuthenticationError
+from quotas import QuotaExceededError
+
+
+@pytest.fixture(autouse=True)
+def clear_token_cache():
+    token_cache.clear()
+    yield
+    token_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def mock_enforce_quota():
+    with patch('middleware.enforce_quota') as mock_enforce:
+        yield mock_enforce
+
+
+def make_context():
+    context = Mock()
+    context.aws_request_id = 'req-123'
+    return context
 
 
 class TestRequireAuth:
@@ -22,6 +47,20 @@ class TestRequireAuth:
         mock_get_token.assert_called_once_with(event)
         mock_validate.assert_called_once_with('valid-token')
 
+    @patch('middleware.get_token_from_header')
+    @patch('middleware.validate_token')
+    def test_require_auth_enforces_quota_per_route(self, mock_validate, mock_get_token, mock_enforce_quota):
+        mock_get_token.return_value = 'valid-token'
+        mock_validate.return_value = {'user_id': 'user123', 'username': 'testuser'}
+        mock_enforce_quota.side_effect = QuotaExceededError('Rate limit exceeded. Retry in 3 seconds.', 3)
+        
+        event = {'path': '/rates/USD', 'resource': '/rates/{currency}', 'httpMethod': 'GET'}
+        
+        with pytest.raises(QuotaExceededError):
+            require_auth(event, make_context())
+        
+        mock_enforce_quota.assert_called_once_with('user123', '/rates/{currency}', 'req-123')
+
     @patch('middleware.get_token_from_header')
     def test_require_auth_no_token(self, mock_get_token):
         mock_get_token.return_value = None
@@ -48,3 +87,93 @@ class TestRequireAuth:
         with pytest.raises(UnauthorizedError):
             require_auth(event, context)
 
+
+
+class TestVerifiedTokenCache:
+    @patch('middleware.validate_token')
+    def test_hit_skips_verification(self, mock_validate):
+        mock_validate.return_value = {'user_id': 'user123', 'username': 'testuser', 'exp': time.time() + 3600}
+        event = {'headers': {'Authorization': 'Bearer cached-token'}}
+        
+        first = require_auth(event, make_context())
+        second = require_auth(event, make_context())
+        
+        assert first == second
+        mock_validate.assert_called_once_with('cached-token')
+        stats = get_token_cache_stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+    
+    @patch('middleware.validate_token')
+    def test_cache_is_keyed_by_digest(self, mock_validate):
+        mock_validate.return_value = {'user_id': 'user123', 'username': 'testuser', 'exp': time.time() + 3600}
+        
+        verify_token('secret-token')
+        
+        assert 'secret-token' not in token_cache._entries
+        assert len(token_cache) == 1
+    
+    @patch('middleware.validate_token')
+    def test_entry_expires_with_token(self, mock_validate):
+        mock_validate.return_value = {'user_id': 'user123', 'username': 'testuser', 'exp': time.time() - 1}
+        
+        verify_token('expired-token')
+        mock_validate.side_effect = JWTUnauthorizedError('Token has expired')
+        
+        with pytest.raises(JWTUnauthorizedError):
+            verify_token('expired-token')
+    
+    @patch('middleware.validate_token')
+    def test_token_without_exp_is_not_cached(self, mock_validate):
+        mock_validate.return_value = {'user_id': 'user123', 'username': 'testuser'}
+        
+        assert verify_token('no-exp') == (mock_validate.return_value, False)
+        assert verify_token('no-exp')[1] is False
+        assert mock_validate.call_count == 2
+    
+    @patch('middleware.validate_token')
+    def test_failures_are_not_cached(self, mock_validate):
+        mock_validate.side_effect = JWTUnauthorizedError('Invalid token')
+        
+        for _ in range(2):
+            with pytest.raises(JWTUnauthorizedError):
+                verify_token('bad-token')
+        
+        assert mock_validate.call_count == 2
+        assert len(token_cache) == 0
+    
+    def test_cached_token_is_rejected_once_its_key_retires(self):
+        signing_key = 'current-secret-key-that-is-long-enough'
+        active = Keyring('HS256', 'k1', signing_key, {'k1': (signing_key, None)})
+        retired = Keyring('HS256', 'k1', signing_key, {'k1': (signing_key, time.time() - 1)})
+        token = jwt.encode(
+            {'user_id': 'user123', 'username': 'testuser', 'exp': int(time.time()) + 60},
+            signing_key,
+            algorithm='HS256',
+            headers={'kid': 'k1'}
+        )
+        
+        with patch('jwt_config.keyring', active):
+            verify_token(token)
+            assert verify_token(token)[1] is True
+        
+        with patch('jwt_config.keyring', retired):
+            # jwt_config may have been reloaded by other tests, so match on the shared base class.
+            with pytest.raises(AuthenticationError, match='Invalid token'):
+                verify_token(token)
+        
+        assert len(token_cache) == 0
+    
+    def test_real_token_round_trip(self):
+        import jwt_config
+        token = jwt.encode(
+            {'user_id': 'user123', 'username': 'testuser', 'exp': int(time.time()) + 60},
+            jwt_config.JWT_SECRET_KEY,
+            algorithm=jwt_config.JWT_ALGORITHM
+        )
+        
+        with patch('middleware.validate_token', wraps=middleware.validate_token) as mock_validate:
+            assert verify_token(token)[0]['user_id'] == 'user123'
+            assert verify_token(token)[1] is True
+        
+        mock_validate.assert_called_once()
@@ -0,0 +1,197 @@
+import os
+import pytest
+from unittest.mock import Mock, patch
+from exceptions import DatabaseError
+from stores.memory import MemoryUserStore
+from quotas import (
+    QuotaLimiter,
+    QuotaExceededError,
+    enforce_quota,
+    get_quota_requests_per_minute,
+    get_quota_endpoint_limits,
+    get_quota_sync_seconds
+)
+
+
+class FakeClock:
+    def __init__(self, now=1704067200.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class ImmediateExecutor:
+    """Runs submitted syncs inline, so tests see their effect right away."""
+
+    def __init__(self):
+        self.submitted = 0
+
+    def submit(self, fn, *args):
+        self.submitted += 1
+        fn(*args)
+
+
+def make_limiter(store=None, default_limit=5, endpoint_limits=None, sync_seconds=10.0, clock=None):
+    return QuotaLimiter(
+        store or MemoryUserStore(),
+        default_limit,
+        endpoint_limits,
+        sync_seconds,
+        clock=clock or FakeClock(),
+        executor=ImmediateExecutor()
+    )
+
+
+class TestQuotaConfig:
+    @patch.dict(os.environ, {}, clear=True)
+    def test_defaults(self):
+        assert get_quota_requests_per_minute() == 600
+        assert get_quota_endpoint_limits() == {}
+        assert get_quota_sync_seconds() == 10.0
+
+    @patch.dict(os.environ, {'QUOTA_REQUESTS_PER_MINUTE': '0', 'QUOTA_SYNC_SECONDS': 'soon'})
+    def test_invalid_values_use_defaults(self):
+        assert get_quota_requests_per_minute() == 600
+        assert get_quota_sync_seconds() == 10.0
+
+    @patch.dict(os.environ, {'QUOTA_ENDPOINT_LIMITS': '{"/convert/batch": 30}'})
+    def test_endpoint_limits(self):
+        assert get_quota_endpoint_limits() == {'/convert/batch': 30}
+
+    @patch.dict(os.environ, {'QUOTA_ENDPOINT_LIMITS': '[30]'})
+    def test_invalid_endpoint_limits(self):
+        assert get_quota_endpoint_limits() == {}
+
+
+class TestQuotaLimiter:
+    def test_allows_burst_up_to_limit(self):
+        limiter = make_limiter(default_limit=3)
+        
+        for _ in range(3):
+            limiter.check('user1', '/convert')
+        
+        with pytest.raises(QuotaExceededError) as exc_info:
+            limiter.check('user1', '/convert')
+        
+        assert exc_info.value.retry_after == 20
+        assert 'Retry in 20 seconds' in str(exc_info.value)
+        assert limiter.stats()['rejected'] == 1
+
+    def test_quotas_are_per_user_and_endpoint(self):
+        limiter = make_limiter(default_limit=1)
+        
+        limiter.check('user1', '/convert')
+        limiter.check('user2', '/convert')
+        limiter.check('user1', '/rates/{currency}')
+        
+        with pytest.raises(QuotaExceededError):
+            limiter.check('user1', '/convert')
+
+    def test_endpoint_limit_overrides_default(self):
+        limiter = make_limiter(default_limit=1, endpoint_limits={'/convert': 2})
+        
+        limiter.check('user1', '/convert')
+        limiter.check('user1', '/convert')
+        
+        assert limiter.limit_for('/convert') == 2
+        assert limiter.limit_for('/health') == 1
+
+    def test_tokens_refill_over_time(self):
+        clock = FakeClock()
+        limiter = make_limiter(default_limit=6, clock=clock)
+        for _ in range(6):
+            limiter.check('user1', '/convert')
+        
+        clock.now += 10
+        limiter.check('user1', '/convert')
+
+    def test_no_store_call_before_sync_is_due(self):
+        store = Mock()
+        limiter = make_limiter(store=store)
+        
+        limiter.check('user1', '/convert')
+        
+        store.add_quota_usage.assert_not_called()
+        assert limiter.stats()['pending_counters'] == 1
+
+    def test_sync_batches_counts_per_key(self):
+        clock = FakeClock()
+        store = MemoryUserStore()
+        limiter = make_limiter(store=store, default_limit=100, clock=clock)
+        for _ in range(4):
+            limiter.check('user1', '/convert')
+        
+        clock.now += 10
+        with patch.object(store, 'add_quota_usage', wraps=store.add_quota_usage) as mock_add:
+            limiter.check('user1', '/convert')
+        
+        window = int(clock.now // 60) * 60
+        mock_add.assert_called_once_with('user1', '/convert', window, 5, window + 120)
+        assert limiter.stats()['syncs'] == 1
+        assert limiter.stats()['pending_counters'] == 0
+
+    def test_shared_total_over_limit_blocks_until_window_ends(self):
+        clock = FakeClock(1704067210.0)
+        store = MemoryUserStore()
+        # Another container already used most of this minute's quota.
+        store.add_quota_usage('user1', '/convert', 1704067200, 9, 1704067320)
+        limiter = make_limiter(store=store, default_limit=10, clock=clock)
+        
+        limiter.sync()
+        limiter.check('user1', '/convert')
+        limiter.sync()
+        
+        with pytest.raises(QuotaExceededError) as exc_info:
+            limiter.check('user1', '/convert')
+        assert exc_info.value.retry_after == 50
+        
+        clock.now = 1704067260.0
+        limiter.check('user1', '/convert')
+
+    def test_failed_sync_keeps_counts_for_next_sync(self):
+        clock = FakeClock()
+        store = Mock()
+        store.add_quota_usage.side_effect = DatabaseError('DynamoDB error')
+        limiter = make_limiter(store=store, default_limit=100, clock=clock)
+        limiter.check('user1', '/convert')
+        
+        limiter.sync()
+        
+        assert limiter.stats()['sync_failures'] == 1
+        assert limiter.stats()['pending_counters'] == 1
+        
+        store.add_quota_usage.side_effect = None
+        store.add_quota_usage.return_value = 2
+        limiter.check('user1', '/convert')
+        clock.now += 10
+        limiter.sync()
+        
+        store.add_quota_usage.assert_called_with('user1', '/convert', 1704067200, 2, 1704067320)
+
+    def test_failed_counts_for_ended_window_are_dropped(self):
+        clock = FakeClock()
+        store = Mock()
+        store.add_quota_usage.side_effect = DatabaseError('DynamoDB error')
+        limiter = make_limiter(store=store, clock=clock)
+        limiter.check('user1', '/convert')
+        
+        clock.now += 60
+        limiter.sync()
+        
+        assert limiter.stats()['pending_counters'] == 0
+
+
+class TestEnforceQuota:
+    @patch('quotas.quota_limiter')
+    def test_checks_limiter(self, mock_limiter):
+        enforce_quota('user1', '/convert', 'req-123')
+        
+        mock_limiter.check.assert_called_once_with('user1', '/convert', 'req-123')
+
+    @patch.dict(os.environ, {'QUOTA_ENABLED': 'false'})
+    @patch('quotas.quota_limiter')
+    def test_disabled(self, mock_limiter):
+        enforce_quota('user1', '/convert', 'req-123')
+        
+        mock_limiter.check.assert_not_called()
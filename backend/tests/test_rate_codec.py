@@ -0,0 +1,61 @@
+import struct
+import pytest
+from rate_codec import pack_rates, unpack_rates, HEADER
+
+
+RATES = {
+    'USD': 1.0,
+    'BRL': 5.2,
+    'EUR': 0.92,
+    'GBP': 0.79,
+    'JPY': 150.0
+}
+
+
+class TestRateCodec:
+    def test_round_trip(self):
+        rates, version = unpack_rates(pack_rates(RATES, 1704067200))
+        
+        assert rates == RATES
+        assert version == 1704067200
+
+    def test_blob_is_compact(self):
+        blob = pack_rates(RATES, 1704067200)
+        
+        assert len(blob) == HEADER.size + 5 * 3 + 2 + 5 * 8
+        assert len(blob) % 8 == 0
+
+    def test_currencies_in_fixed_order(self):
+        assert pack_rates({'EUR': 0.92, 'BRL': 5.2}, 1) == pack_rates({'BRL': 5.2, 'EUR': 0.92}, 1)
+
+    def test_decodes_from_bytearray(self):
+        rates, _ = unpack_rates(bytearray(pack_rates(RATES, 1)))
+        
+        assert rates['JPY'] == 150.0
+
+    def test_empty_snapshot(self):
+        assert unpack_rates(pack_rates({}, 7)) == ({}, 7)
+
+    def test_rejects_invalid_currency_code(self):
+        with pytest.raises(ValueError):
+            pack_rates({'EURO': 1.0}, 1)
+
+    def test_rejects_unknown_magic(self):
+        blob = bytearray(pack_rates(RATES, 1))
+        blob[:4] = b'XXXX'
+        
+        with pytest.raises(ValueError):
+            unpack_rates(bytes(blob))
+
+    def test_rejects_unknown_format_version(self):
+        blob = bytearray(pack_rates(RATES, 1))
+        struct.pack_into('<B', blob, 4, 99)
+        
+        with pytest.raises(ValueError) as exc_info:
+            unpack_rates(bytes(blob))
+        
+        assert 'format version 99' in str(exc_info.value)
+
+    def test_rejects_truncated_blob(self):
+        with pytest.raises(ValueError):
+            unpack_rates(pack_rates(RATES, 1)[:-3])
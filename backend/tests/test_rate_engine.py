@@ -0,0 +1,80 @@
+import decimal
+import pytest
+from rate_engine import derive_rate, RateSnapshot
+
+
+ANCHOR_RATES = {
+    'USD': 1.0,
+    'BRL': 5.2,
+    'EUR': 0.92,
+    'GBP': 0.79,
+    'JPY': 150.0
+}
+
+
+class TestDeriveRate:
+    def test_direct_anchor_pair(self):
+        assert derive_rate(ANCHOR_RATES, 'USD', 'BRL') == 5.2
+
+    def test_inverse_anchor_pair(self):
+        assert derive_rate(ANCHOR_RATES, 'BRL', 'USD') == 0.192307692307692
+
+    def test_cross_pair(self):
+        assert derive_rate(ANCHOR_RATES, 'EUR', 'JPY') == 163.04347826087
+
+    def test_direct_anchor_pair_is_not_rounded_by_default(self):
+        rate = derive_rate({'USD': 1.0, 'JPY': 151.234567}, 'USD', 'JPY')
+
+        assert rate == 151.234567
+        assert 1e9 * rate == 151234567000.0
+
+    def test_same_currency(self):
+        assert derive_rate(ANCHOR_RATES, 'EUR', 'EUR') == 1.0
+
+    def test_precision_is_significant_digits(self):
+        assert derive_rate(ANCHOR_RATES, 'JPY', 'BRL', precision=3) == 0.0347
+        assert derive_rate(ANCHOR_RATES, 'JPY', 'BRL', precision=8) == 0.034666667
+
+    def test_direct_pair_follows_precision_policy(self):
+        assert derive_rate({'USD': 1.0, 'BRL': 5.123456789}, 'USD', 'BRL', precision=4) == 5.123
+
+    def test_rounding_mode(self):
+        rates = {'USD': 1.0, 'XXX': 2.5}
+        assert derive_rate(rates, 'USD', 'XXX', precision=1, rounding=decimal.ROUND_HALF_EVEN) == 2.0
+        assert derive_rate(rates, 'USD', 'XXX', precision=1, rounding=decimal.ROUND_HALF_UP) == 3.0
+
+    def test_missing_currency(self):
+        with pytest.raises(ValueError) as exc_info:
+            derive_rate(ANCHOR_RATES, 'USD', 'CHF')
+
+        assert 'Conversion rate not found for USD to CHF' in str(exc_info.value)
+
+    def test_non_positive_rate(self):
+        with pytest.raises(ValueError):
+            derive_rate({'USD': 1.0, 'BRL': 0}, 'BRL', 'USD')
+
+
+class TestRateSnapshot:
+    def test_from_provider_rates_keeps_configured_currencies(self):
+        snapshot = RateSnapshot.from_provider_rates('USD', {'BRL': 5.2, 'XAU': 0.0004, 'EUR': '0.92'}, 1704067200)
+
+        assert snapshot.rates == {'USD': 1.0, 'BRL': 5.2, 'EUR': 0.92}
+        assert snapshot.version == 1704067200
+
+    def test_rate(self):
+        snapshot = RateSnapshot('USD', ANCHOR_RATES, 1704067200)
+
+        assert snapshot.rate('GBP', 'EUR') == 1.16455696202532
+
+    def test_is_expired(self):
+        snapshot = RateSnapshot('USD', ANCHOR_RATES, 1704067200, expires_at=1704070800)
+
+        assert not snapshot.is_expired(1704070799)
+        assert snapshot.is_expired(1704070800)
+        assert snapshot.seconds_past_expiry(1704070860) == 60
+
+    def test_snapshot_without_ttl_is_expired(self):
+        snapshot = RateSnapshot('USD', ANCHOR_RATES, 1704067200)
+
+        assert snapshot.is_expired(0)
+        assert snapshot.seconds_past_expiry(0) is None
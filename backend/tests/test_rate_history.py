@@ -0,0 +1,198 @@
+import os
+import pytest
+from unittest.mock import patch
+from botocore.exceptions import ClientError
+from rate_engine import RateSnapshot
+from rate_history import (
+    append_snapshot,
+    encode_entry,
+    get_rates_at,
+    iter_rates_between,
+    get_pair_rate_at,
+    get_pair_history,
+    decode_page_token,
+    keyframes,
+    KEYFRAME,
+    DELTA
+)
+
+
+class FakeHistoryTable:
+    """In-memory stand-in for the history table supporting the Query shapes rate_history uses."""
+    
+    def __init__(self):
+        self.items = {}
+        self.queries = []
+    
+    def put_item(self, Item, ConditionExpression=None):
+        key = (Item['base_currency'], Item['fetched_at'])
+        if ConditionExpression is not None and key in self.items:
+            raise ClientError({'Error': {'Code': 'ConditionalCheckFailedException'}}, 'PutItem')
+        self.items[key] = dict(Item)
+    
+    def get_item(self, Key):
+        item = self.items.get((Key['base_currency'], Key['fetched_at']))
+        return {'Item': item} if item is not None else {}
+    
+    def query(self, KeyConditionExpression, ScanIndexForward=True, Limit=None, ExclusiveStartKey=None):
+        self.queries.append(ExclusiveStartKey)
+        partition, sort = KeyConditionExpression.get_expression()['values']
+        base_currency = partition.get_expression()['values'][1]
+        sort_expression = sort.get_expression()
+        operator, bounds = sort_expression['operator'], sort_expression['values'][1:]
+        
+        def matches(fetched_at):
+            if operator == 'BETWEEN':
+                return bounds[0] <= fetched_at <= bounds[1]
+            return fetched_at <= bounds[0]
+        
+        keys = sorted(
+            (fetched_at for base, fetched_at in self.items if base == base_currency and matches(fetched_at)),
+            reverse=not ScanIndexForward
+        )
+        if ExclusiveStartKey is not None:
+            keys = [key for key in keys if (key > ExclusiveStartKey['fetched_at']) == ScanIndexForward]
+        
+        page = keys[:Limit] if Limit else keys
+        response = {'Items': [self.items[(base_currency, key)] for key in page]}
+        if Limit and len(keys) > Limit:
+            response['LastEvaluatedKey'] = {'base_currency': base_currency, 'fetched_at': page[-1]}
+        return response
+
+
+@pytest.fixture
+def history_table():
+    table = FakeHistoryTable()
+    keyframes.clear()
+    with patch('rate_history.rate_store.history_table', table):
+        yield table
+    keyframes.clear()
+
+
+def snapshot_at(fetched_at, brl=5.2, eur=0.92):
+    return RateSnapshot('USD', {'USD': 1.0, 'BRL': brl, 'EUR': eur}, fetched_at)
+
+
+class TestEncodeEntry:
+    def test_first_entry_is_keyframe(self, history_table):
+        item, state = encode_entry(snapshot_at(100))
+        
+        assert item['kind'] == KEYFRAME
+        assert state == {'fetched_at': 100, 'rates': {'USD': 1.0, 'BRL': 5.2, 'EUR': 0.92}, 'deltas': 0}
+
+    def test_delta_keeps_only_changed_rates(self, history_table):
+        append_snapshot(snapshot_at(100))
+        append_snapshot(snapshot_at(200, brl=5.3))
+        
+        delta = history_table.items[('USD', 200)]
+        assert delta['kind'] == DELTA
+        assert delta['keyframe_at'] == 100
+        assert len(delta['packed_rates']) < len(history_table.items[('USD', 100)]['packed_rates'])
+
+    @patch.dict(os.environ, {'HISTORY_KEYFRAME_INTERVAL': '3'})
+    def test_keyframe_every_interval(self, history_table):
+        for fetched_at in (100, 200, 300, 400):
+            append_snapshot(snapshot_at(fetched_at))
+        
+        kinds = [history_table.items[('USD', fetched_at)]['kind'] for fetched_at in (100, 200, 300, 400)]
+        assert kinds == [KEYFRAME, DELTA, DELTA, KEYFRAME]
+
+    @patch.dict(os.environ, {'HISTORY_RETENTION_DAYS': '30'})
+    def test_deltas_expire_with_keyframe(self, history_table):
+        append_snapshot(snapshot_at(100))
+        append_snapshot(snapshot_at(200))
+        
+        assert history_table.items[('USD', 200)]['ttl'] == 100 + 30 * 86400
+
+    def test_failed_write_does_not_become_keyframe(self, history_table):
+        with patch.object(history_table, 'put_item', side_effect=ClientError({'Error': {'Code': 'Boom'}}, 'PutItem')):
+            assert append_snapshot(snapshot_at(100)) is False
+        
+        append_snapshot(snapshot_at(200))
+        assert history_table.items[('USD', 200)]['kind'] == KEYFRAME
+
+    def test_entry_from_another_container_in_same_second_is_kept(self, history_table):
+        append_snapshot(snapshot_at(100))
+        # Another container's state: a keyframe at 50, so its entry for 100 is a delta.
+        keyframes['USD'] = {'fetched_at': 50, 'rates': {'USD': 1.0, 'BRL': 5.2, 'EUR': 0.92}, 'deltas': 0}
+        
+        assert append_snapshot(snapshot_at(100, brl=5.3)) is False
+        
+        assert history_table.items[('USD', 100)]['kind'] == KEYFRAME
+        assert keyframes['USD']['fetched_at'] == 50
+
+    @patch.dict(os.environ, {'HISTORY_ENABLED': 'false'})
+    def test_disabled(self, history_table):
+        assert append_snapshot(snapshot_at(100)) is False
+        assert history_table.items == {}
+
+
+class TestHistoryReads:
+    def test_point_in_time_uses_newest_entry_before(self, history_table):
+        append_snapshot(snapshot_at(100))
+        append_snapshot(snapshot_at(200, brl=5.3))
+        append_snapshot(snapshot_at(300, brl=5.4))
+        
+        fetched_at, rates = get_rates_at('USD', 250)
+        
+        assert fetched_at == 200
+        assert rates == {'USD': 1.0, 'BRL': 5.3, 'EUR': 0.92}
+
+    def test_delta_against_non_keyframe_is_rejected(self, history_table):
+        # A delta left where its keyframe should be, as before writes were conditional.
+        delta_item, _ = encode_entry(snapshot_at(100))
+        history_table.items[('USD', 100)] = dict(delta_item, kind=DELTA, keyframe_at=50)
+        history_table.items[('USD', 200)] = dict(delta_item, fetched_at=200, kind=DELTA, keyframe_at=100)
+        
+        with pytest.raises(ValueError, match='not a keyframe'):
+            get_rates_at('USD', 200)
+
+    def test_point_before_history(self, history_table):
+        append_snapshot(snapshot_at(100))
+        
+        assert get_rates_at('USD', 50) is None
+
+    def test_range_is_paginated_and_decoded(self, history_table):
+        for index, fetched_at in enumerate(range(100, 1100, 100)):
+            append_snapshot(snapshot_at(fetched_at, brl=5.0 + index / 10))
+        
+        entries = list(iter_rates_between('USD', 250, 950, page_size=2))
+        
+        assert [fetched_at for fetched_at, _ in entries] == [300, 400, 500, 600, 700, 800, 900]
+        assert entries[0][1]['BRL'] == 5.2
+        assert entries[-1][1]['BRL'] == 5.8
+        assert len(history_table.queries) == 4
+
+    def test_range_is_lazy(self, history_table):
+        for fetched_at in range(100, 1100, 100):
+            append_snapshot(snapshot_at(fetched_at))
+        
+        entries = iter_rates_between('USD', 0, 2000, page_size=2)
+        next(entries)
+        
+        assert len(history_table.queries) == 1
+
+
+class TestPairHistory:
+    def test_pair_rate_at(self, history_table):
+        append_snapshot(snapshot_at(1704067200))
+        
+        point = get_pair_rate_at('EUR', 'BRL', 1704067300)
+        
+        assert point == {'fetched_at': '2024-01-01T00:00:00+00:00', 'rate': 5.65217391304348}
+
+    def test_pages_with_next_token(self, history_table):
+        for fetched_at in range(100, 600, 100):
+            append_snapshot(snapshot_at(fetched_at))
+        
+        first, token = get_pair_history('USD', 'BRL', 0, 1000, limit=3)
+        second, last_token = get_pair_history('USD', 'BRL', 0, 1000, limit=3, page_token=token)
+        
+        assert len(first) == 3
+        assert decode_page_token(token) == 300
+        assert len(second) == 2
+        assert last_token is None
+
+    def test_invalid_token(self, history_table):
+        with pytest.raises(ValueError):
+            get_pair_history('USD', 'BRL', 0, 1000, limit=3, page_token='not-a-token')
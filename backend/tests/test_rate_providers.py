@@ -0,0 +1,94 @@
+import pytest
+from rate_providers import (
+    create_providers,
+    ExchangeRateApiProvider,
+    OpenErApiProvider,
+    FrankfurterProvider
+)
+
+
+class TestProviderAdapters:
+    def test_exchangerate_api(self):
+        provider = ExchangeRateApiProvider('https://api.exchangerate-api.com/v4/latest/')
+        
+        assert provider.build_url('USD') == 'https://api.exchangerate-api.com/v4/latest/USD'
+        assert provider.parse_rates({'base': 'USD', 'rates': {'BRL': 5.2}}, 'USD') == {'BRL': 5.2}
+
+    def test_missing_rates_is_invalid(self):
+        with pytest.raises(ValueError):
+            ExchangeRateApiProvider().parse_rates({'base': 'USD'}, 'USD')
+
+    def test_open_er_api_error_payload(self):
+        provider = OpenErApiProvider()
+        payload = {'result': 'error', 'error-type': 'unsupported-code'}
+        
+        assert provider.is_unsupported(200, payload)
+        with pytest.raises(ValueError):
+            provider.parse_rates(payload, 'XYZ')
+
+    def test_frankfurter_adds_base(self):
+        provider = FrankfurterProvider('http://stub.local')
+        
+        assert provider.build_url('EUR') == 'http://stub.local/latest?from=EUR'
+        assert provider.parse_rates({'base': 'EUR', 'rates': {'USD': 1.09}}, 'EUR') == {'USD': 1.09, 'EUR': 1.0}
+        assert provider.is_unsupported(422)
+
+
+class TestCreateProviders:
+    def test_order_and_urls(self):
+        providers = create_providers('frankfurter, exchangerate_api, open_er_api=http://er.local', 'http://primary.local')
+        
+        assert [type(provider) for provider in providers] == [FrankfurterProvider, ExchangeRateApiProvider, OpenErApiProvider]
+        assert providers[0].base_url == FrankfurterProvider.default_url
+        assert providers[1].base_url == 'http://primary.local'
+        assert providers[2].base_url == 'http://er.local'
+
+    def test_unknown_kind_is_skipped(self):
+        providers = create_providers('unknown,frankfurter')
+        
+        assert [provider.name for provider in providers] == ['frankfurter']
+
+    def test_duplicate_kinds_get_distinct_names(self):
+        providers = create_providers('exchangerate_api=http://a.local,exchangerate_api=http://b.local')
+        
+        assert [provider.name for provider in providers] == ['exchangerate_api', 'exchangerate_api_2']
+
+    def test_empty_spec(self):
+        assert create_providers(None) == []
+
+
+class TestValidators:
+    def test_validators_from_headers_and_body(self):
+        provider = ExchangeRateApiProvider()
+        
+        validators = provider.validators_from(
+            {'ETag': '"abc"', 'Last-Modified': 'Mon, 01 Jan 2024 00:00:00 GMT'},
+            {'time_last_updated': 1704067200}
+        )
+        
+        assert validators == {
+            'provider': 'exchangerate_api',
+            'etag': '"abc"',
+            'last_modified': 'Mon, 01 Jan 2024 00:00:00 GMT',
+            'body_version': '1704067200'
+        }
+
+    def test_conditional_headers(self):
+        provider = ExchangeRateApiProvider()
+        
+        headers = provider.conditional_headers({
+            'provider': 'exchangerate_api',
+            'etag': '"abc"',
+            'last_modified': 'Mon, 01 Jan 2024 00:00:00 GMT'
+        })
+        
+        assert headers == {'If-None-Match': '"abc"', 'If-Modified-Since': 'Mon, 01 Jan 2024 00:00:00 GMT'}
+
+    def test_no_conditional_headers_for_other_provider(self):
+        assert FrankfurterProvider().conditional_headers({'provider': 'exchangerate_api', 'etag': '"abc"'}) == {}
+        assert FrankfurterProvider().conditional_headers(None) == {}
+
+    def test_frankfurter_body_version_is_date(self):
+        validators = FrankfurterProvider().validators_from({}, {'date': '2024-01-02', 'rates': {}})
+        
+        assert validators['body_version'] == '2024-01-02'
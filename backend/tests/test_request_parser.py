@@ -1,6 +1,6 @@
 import pytest
 import json
-from request_parser import parse_request_body, extract_request_data
+from request_parser import parse_request_body, extract_request_data, extract_batch_items, parse_timestamp, extract_history_query
 from exceptions import RequestParsingError
 
 
@@ -101,3 +101,66 @@ class TestExtractRequestData:
         assert from_currency == 'USD'
         assert to_currency == 'BRL'
 
+
+
+class TestExtractBatchItems:
+    def test_extract_items(self):
+        items = [{'amount': 100, 'from': 'USD', 'to': 'BRL'}]
+        assert extract_batch_items({'items': items}) == items
+
+    def test_missing_items(self):
+        with pytest.raises(RequestParsingError):
+            extract_batch_items({})
+
+    def test_items_not_a_list(self):
+        with pytest.raises(RequestParsingError):
+            extract_batch_items({'items': {'amount': 100}})
+
+class TestParseTimestamp:
+    def test_epoch_seconds(self):
+        assert parse_timestamp('1735689600', 'at') == 1735689600
+
+    def test_iso_date_is_utc(self):
+        assert parse_timestamp('2025-01-01', 'at') == 1735689600
+
+    def test_iso_with_offset(self):
+        assert parse_timestamp('2025-01-01T03:00:00+03:00', 'at') == 1735689600
+
+    def test_missing(self):
+        assert parse_timestamp(None, 'at') is None
+        assert parse_timestamp('', 'at') is None
+
+    def test_invalid(self):
+        with pytest.raises(RequestParsingError) as exc_info:
+            parse_timestamp('yesterday', 'start')
+        assert 'Invalid start' in str(exc_info.value)
+
+
+class TestExtractHistoryQuery:
+    def test_extract_all_fields(self):
+        event = {'queryStringParameters': {
+            'from': 'usd', 'to': 'brl', 'start': '2025-01-01', 'end': '1735776000', 'limit': '50', 'next_token': 'abc'
+        }}
+        
+        query = extract_history_query(event)
+        
+        assert query == {
+            'from': 'USD',
+            'to': 'BRL',
+            'at': None,
+            'start': 1735689600,
+            'end': 1735776000,
+            'limit': 50,
+            'next_token': 'abc'
+        }
+
+    def test_no_query_string(self):
+        query = extract_history_query({'queryStringParameters': None})
+        assert query['from'] == ''
+        assert query['limit'] is None
+
+    def test_invalid_limit(self):
+        with pytest.raises(RequestParsingError):
+            extract_history_query({'queryStringParameters': {'limit': 'ten'}})
+        with pytest.raises(RequestParsingError):
+            extract_history_query({'queryStringParameters': {'limit': '0'}})
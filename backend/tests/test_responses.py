@@ -2,7 +2,7 @@ import pytest
 import json
 import os
 from unittest.mock import patch
-from responses import create_response, get_allowed_origin
+from responses import create_response, create_text_response, get_allowed_origin
 
 
 class TestGetAllowedOrigin:
@@ -111,3 +111,21 @@ class TestCreateResponse:
         parsed_body = json.loads(response['body'])
         assert parsed_body == body
 
+
+    def test_extra_headers_are_merged(self):
+        response = create_response(429, {'error': 'slow down'}, headers={'Retry-After': '5'})
+        headers = response['headers']
+        
+        assert headers['Retry-After'] == '5'
+        assert headers['Content-Type'] == 'application/json'
+
+
+class TestCreateTextResponse:
+    @patch.dict(os.environ, {'ALLOWED_ORIGIN': '*', 'STAGE': 'dev'})
+    def test_body_is_kept_as_text(self):
+        response = create_text_response(200, 'a,b\n1,2\n', 'text/csv')
+        
+        assert response['statusCode'] == 200
+        assert response['body'] == 'a,b\n1,2\n'
+        assert response['headers']['Content-Type'] == 'text/csv'
+        assert response['headers']['Access-Control-Allow-Origin'] == '*'
@@ -0,0 +1,66 @@
+import pytest
+from unittest.mock import Mock
+from utils.deadline import Deadline
+from utils.retry import retry_with_backoff, backoff_delay
+
+
+def upper_bound(low, high):
+    return high
+
+
+class TestBackoffDelay:
+    def test_exponential_growth_is_capped(self):
+        delays = [backoff_delay(attempt, 0.1, 0.5, rand=upper_bound) for attempt in range(1, 6)]
+        
+        assert delays == [0.1, 0.2, 0.4, 0.5, 0.5]
+
+    def test_full_jitter_range(self):
+        rand = Mock(return_value=0.05)
+        
+        backoff_delay(3, 0.1, 2.0, rand=rand)
+        
+        rand.assert_called_once_with(0, 0.4)
+
+
+class TestRetryWithBackoff:
+    def test_retries_until_success(self):
+        fn = Mock(side_effect=[ConnectionError('down'), ConnectionError('down'), 'ok'])
+        sleep = Mock()
+        
+        assert retry_with_backoff(fn, max_attempts=3, sleep=sleep, rand=upper_bound) == 'ok'
+        assert [call.args[0] for call in sleep.call_args_list] == [0.1, 0.2]
+
+    def test_gives_up_after_max_attempts(self):
+        fn = Mock(side_effect=ConnectionError('down'))
+        
+        with pytest.raises(ConnectionError):
+            retry_with_backoff(fn, max_attempts=2, sleep=Mock())
+        
+        assert fn.call_count == 2
+
+    def test_other_errors_are_not_retried(self):
+        fn = Mock(side_effect=ValueError('bad'))
+        
+        with pytest.raises(ValueError):
+            retry_with_backoff(fn, retry_on=(ConnectionError,), sleep=Mock())
+        
+        assert fn.call_count == 1
+
+    def test_no_retry_without_budget(self):
+        fn = Mock(side_effect=ConnectionError('down'))
+        sleep = Mock()
+        
+        with pytest.raises(ConnectionError):
+            retry_with_backoff(fn, Deadline(0.3), min_attempt_seconds=0.5, sleep=sleep, rand=upper_bound)
+        
+        assert fn.call_count == 1
+        sleep.assert_not_called()
+
+    def test_on_retry_callback(self):
+        fn = Mock(side_effect=[ConnectionError('down'), 'ok'])
+        on_retry = Mock()
+        
+        retry_with_backoff(fn, on_retry=on_retry, sleep=Mock(), rand=upper_bound)
+        
+        on_retry.assert_called_once()
+        assert on_retry.call_args.args[:2] == (1, 0.1)
@@ -0,0 +1,104 @@
+import time
+import threading
+import pytest
+from utils.single_flight import SingleFlight
+from utils.deadline import Deadline, DeadlineExceededError
+
+
+class TestSingleFlight:
+    def test_returns_result(self):
+        flights = SingleFlight()
+
+        assert flights.do('USD', lambda: 42) == 42
+        assert not flights.in_flight('USD')
+
+    def test_concurrent_callers_share_one_execution(self):
+        flights = SingleFlight()
+        calls = []
+        started = threading.Event()
+
+        def slow_fetch():
+            calls.append(1)
+            started.set()
+            time.sleep(0.1)
+            return {'BRL': 5.2}
+
+        results = []
+
+        def worker():
+            results.append(flights.do('USD', slow_fetch))
+
+        leader = threading.Thread(target=worker)
+        leader.start()
+        started.wait()
+        followers = [threading.Thread(target=worker) for _ in range(5)]
+        for thread in followers:
+            thread.start()
+        for thread in [leader] + followers:
+            thread.join()
+
+        assert len(calls) == 1
+        assert results == [{'BRL': 5.2}] * 6
+
+    def test_error_propagates_to_all_callers(self):
+        flights = SingleFlight()
+        started = threading.Event()
+        errors = []
+
+        def failing_fetch():
+            started.set()
+            time.sleep(0.1)
+            raise ConnectionError('API unavailable')
+
+        def worker():
+            try:
+                flights.do('USD', failing_fetch)
+            except ConnectionError as e:
+                errors.append(e)
+
+        leader = threading.Thread(target=worker)
+        leader.start()
+        started.wait()
+        follower = threading.Thread(target=worker)
+        follower.start()
+        leader.join()
+        follower.join()
+
+        assert len(errors) == 2
+
+    def test_different_keys_run_independently(self):
+        flights = SingleFlight()
+
+        assert flights.do('USD', lambda: 'usd') == 'usd'
+        assert flights.do('EUR', lambda: 'eur') == 'eur'
+
+    def test_key_released_after_error(self):
+        flights = SingleFlight()
+
+        with pytest.raises(ValueError):
+            flights.do('USD', lambda: (_ for _ in ()).throw(ValueError('boom')))
+
+        assert flights.do('USD', lambda: 'ok') == 'ok'
+
+    def test_follower_gives_up_at_its_deadline(self):
+        flights = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_fetch():
+            started.set()
+            release.wait()
+            return 'usd'
+
+        leader = threading.Thread(target=flights.do, args=('USD', slow_fetch))
+        leader.start()
+        started.wait()
+
+        began = time.monotonic()
+        with pytest.raises(DeadlineExceededError):
+            flights.do('USD', slow_fetch, Deadline(0.05))
+
+        assert time.monotonic() - began < 1
+        release.set()
+        leader.join()
+        assert not flights.in_flight('USD')
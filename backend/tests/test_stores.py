@@ -0,0 +1,295 @@
+import os
+import time
+import threading
+import pytest
+from unittest.mock import patch
+from rate_codec import pack_rates
+from rate_engine import RateSnapshot
+from stores import create_stores, get_store_backend
+from stores.memory import MemoryRateStore, MemoryUserStore
+from stores.sqlite import SQLiteDatabase, SQLiteRateStore, SQLiteUserStore
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def stores(request, tmp_path):
+    if request.param == 'memory':
+        return MemoryRateStore(), MemoryUserStore()
+    database = SQLiteDatabase(str(tmp_path / 'liquid.db'))
+    return SQLiteRateStore(database), SQLiteUserStore(database)
+
+
+@pytest.fixture
+def rate_store(stores):
+    return stores[0]
+
+
+@pytest.fixture
+def user_store(stores):
+    return stores[1]
+
+
+def make_snapshot(base_currency='USD', fetched_at=1704067200, expires_at=1704070800, validators=None):
+    return RateSnapshot(
+        base_currency,
+        {'USD': 1.0, 'BRL': 5.2, 'EUR': 0.92},
+        fetched_at,
+        expires_at,
+        validators=validators
+    )
+
+
+def history_item(fetched_at, ttl=None):
+    item = {
+        'base_currency': 'USD',
+        'fetched_at': fetched_at,
+        'kind': 'keyframe',
+        'packed_rates': pack_rates({'USD': 1.0, 'BRL': 5.2}, fetched_at)
+    }
+    if ttl is not None:
+        item['ttl'] = ttl
+    return item
+
+
+class TestRateStoreContract:
+    def test_snapshot_round_trip(self, rate_store):
+        rate_store.save_snapshot(make_snapshot(validators={'provider': 'exchangerate_api', 'etag': '"abc"'}))
+        
+        snapshot = rate_store.load_snapshot('USD')
+        
+        assert snapshot.rates == {'USD': 1.0, 'BRL': 5.2, 'EUR': 0.92}
+        assert snapshot.fetched_at == 1704067200
+        assert snapshot.expires_at == 1704070800
+        assert snapshot.validators == {'provider': 'exchangerate_api', 'etag': '"abc"'}
+
+    def test_missing_snapshot(self, rate_store):
+        assert rate_store.load_snapshot('EUR') is None
+
+    def test_batch_save_replaces_existing(self, rate_store):
+        rate_store.save_snapshot(make_snapshot(fetched_at=100))
+        rate_store.save_snapshots([make_snapshot('USD', fetched_at=200), make_snapshot('EUR', fetched_at=200)])
+        
+        assert rate_store.load_snapshot('USD').fetched_at == 200
+        assert rate_store.load_snapshot('EUR').fetched_at == 200
+
+    def test_expiry_update_keeps_rates_and_version(self, rate_store):
+        snapshot = make_snapshot()
+        rate_store.save_snapshot(snapshot)
+        
+        rate_store.save_snapshot_expiry(snapshot.with_expiry(1704100000, {'provider': 'frankfurter'}))
+        stored = rate_store.load_snapshot('USD')
+        
+        assert stored.expires_at == 1704100000
+        assert stored.validators == {'provider': 'frankfurter'}
+        assert stored.version == snapshot.version
+        assert stored.rates == snapshot.rates
+
+    def test_unsupported_round_trip(self, rate_store):
+        assert rate_store.load_unsupported('XAU') is None
+        
+        rate_store.save_unsupported('XAU', 'Currency not supported: XAU', 1704070800)
+        
+        assert rate_store.load_unsupported('XAU') == ('Currency not supported: XAU', 1704070800)
+
+    def test_lease_is_exclusive_until_it_expires(self, rate_store):
+        assert rate_store.acquire_lease('USD', 'first', expires_at=110, now=100) is True
+        assert rate_store.acquire_lease('USD', 'second', expires_at=115, now=105) is False
+        assert rate_store.acquire_lease('USD', 'second', expires_at=121, now=111) is True
+
+    def test_lease_released_only_by_owner(self, rate_store):
+        rate_store.acquire_lease('USD', 'first', expires_at=110, now=100)
+        
+        rate_store.release_lease('USD', 'second')
+        assert rate_store.acquire_lease('USD', 'second', expires_at=110, now=100) is False
+        
+        rate_store.release_lease('USD', 'first')
+        assert rate_store.acquire_lease('USD', 'second', expires_at=110, now=100) is True
+
+    def test_history_entry_round_trip(self, rate_store):
+        item = history_item(100)
+        rate_store.put_history_entry(item)
+        
+        assert rate_store.get_history_entry('USD', 100) == item
+        assert rate_store.get_history_entry('USD', 200) is None
+
+    def test_history_entry_first_write_wins(self, rate_store):
+        keyframe = history_item(100)
+        delta = dict(history_item(100), kind='delta', keyframe_at=50)
+        
+        assert rate_store.put_history_entry(keyframe) is True
+        assert rate_store.put_history_entry(delta) is False
+        assert rate_store.get_history_entry('USD', 100) == keyframe
+
+    def test_history_pages_follow_cursor(self, rate_store):
+        for fetched_at in range(100, 1100, 100):
+            rate_store.put_history_entry(history_item(fetched_at))
+        
+        pages = []
+        cursor = None
+        while True:
+            items, cursor = rate_store.query_history('USD', 200, 800, limit=3, cursor=cursor)
+            pages.append([item['fetched_at'] for item in items])
+            if cursor is None:
+                break
+        
+        assert pages == [[200, 300, 400], [500, 600, 700], [800]]
+
+    def test_history_newest_first(self, rate_store):
+        for fetched_at in (100, 200, 300):
+            rate_store.put_history_entry(history_item(fetched_at))
+        
+        items, _ = rate_store.query_history('USD', end=250, newest_first=True, limit=1)
+        
+        assert [item['fetched_at'] for item in items] == [200]
+
+    def test_expired_history_is_hidden(self, rate_store):
+        rate_store.put_history_entry(history_item(100, ttl=int(time.time()) - 1))
+        rate_store.put_history_entry(history_item(200))
+        
+        items, _ = rate_store.query_history('USD', 0, 1000)
+        
+        assert [item['fetched_at'] for item in items] == [200]
+        assert rate_store.get_history_entry('USD', 100) is None
+
+
+class TestUserStoreContract:
+    def test_user_round_trip(self, user_store):
+        user = {'user_id': 'admin', 'username': 'admin', 'password_hash': 'hash', 'created_at': '2024-01-01T00:00:00'}
+        
+        user_store.put_user(user)
+        
+        assert user_store.get_user('admin') == user
+
+    def test_missing_user(self, user_store):
+        assert user_store.get_user('nobody') is None
+
+    def test_refresh_token_is_redeemed_once(self, user_store):
+        record = {'user_id': 'admin', 'username': 'admin', 'issued_at': 1704067200, 'expires_at': 1706659200}
+        
+        user_store.put_refresh_token('digest', record)
+        
+        assert user_store.consume_refresh_token('digest') == record
+        assert user_store.consume_refresh_token('digest') is None
+        assert user_store.get_user('admin') is None
+
+    def test_quota_usage_accumulates_per_window(self, user_store):
+        assert user_store.add_quota_usage('admin', '/convert', 60, 3, 180) == 3
+        assert user_store.add_quota_usage('admin', '/convert', 60, 2, 180) == 5
+        assert user_store.add_quota_usage('admin', '/convert', 120, 1, 240) == 1
+        assert user_store.add_quota_usage('admin', '/rates', 60, 4, 180) == 4
+        assert user_store.get_user('admin') is None
+
+    def test_login_failures_count_until_expired_or_cleared(self, user_store):
+        assert user_store.get_login_failures('user#admin', 100) is None
+        
+        user_store.add_login_failure('user#admin', 100, 200)
+        assert user_store.add_login_failure('user#admin', 150, 250) == {'failures': 2, 'last_failure_at': 150}
+        assert user_store.get_login_failures('user#admin', 200) == {'failures': 2, 'last_failure_at': 150}
+        assert user_store.get_login_failures('user#admin', 250) is None
+        assert user_store.add_login_failure('user#admin', 250, 350) == {'failures': 1, 'last_failure_at': 250}
+        
+        user_store.clear_login_failures('user#admin')
+        assert user_store.get_login_failures('user#admin', 260) is None
+
+
+class TestServiceOnStore:
+    """The same conversion and login paths the DynamoDB tests cover, run on each local backend."""
+
+    @pytest.fixture(autouse=True)
+    def use_stores(self, stores):
+        from database import rate_cache, negative_cache, last_known_good
+        from rate_history import keyframes
+        from external_api import rates_circuit
+        rate_store, user_store = stores
+        for cache in (rate_cache, negative_cache, last_known_good, keyframes):
+            cache.clear()
+        rates_circuit.reset()
+        with patch('database.rate_store', rate_store), \
+             patch('rate_history.rate_store', rate_store), \
+             patch('auth.user_store', user_store):
+            yield
+        for cache in (rate_cache, negative_cache, last_known_good, keyframes):
+            cache.clear()
+
+    @patch('database.get_latest_rates')
+    def test_conversion_fetches_once_then_reads_store(self, mock_get_latest_rates, rate_store, sample_rates_response):
+        from database import get_conversion_rate, rate_cache, last_known_good
+        mock_get_latest_rates.return_value = sample_rates_response['rates']
+        
+        assert get_conversion_rate('USD', 'BRL') == 5.2
+        rate_cache.clear()
+        last_known_good.clear()
+        assert get_conversion_rate('EUR', 'BRL') == pytest.approx(5.65217)
+        
+        mock_get_latest_rates.assert_called_once()
+        assert rate_store.load_snapshot('USD').rates['BRL'] == 5.2
+
+    @patch('database.get_latest_rates')
+    def test_refresh_is_recorded_in_history(self, mock_get_latest_rates, sample_rates_response):
+        from database import get_conversion_rate
+        from rate_history import get_pair_rate_at
+        mock_get_latest_rates.return_value = sample_rates_response['rates']
+        
+        get_conversion_rate('USD', 'BRL')
+        
+        assert get_pair_rate_at('USD', 'BRL', int(time.time()) + 1)['rate'] == 5.2
+
+    def test_create_and_verify_user(self):
+        from auth import create_user, verify_credentials
+        
+        create_user('admin', 'secret-password')
+        
+        assert verify_credentials('admin', 'secret-password')['user_id'] == 'admin'
+
+    def test_refresh_token_flow(self):
+        from auth import create_user, verify_credentials, issue_refresh_token, redeem_refresh_token
+        create_user('admin', 'secret-password')
+        
+        refresh_token = issue_refresh_token(verify_credentials('admin', 'secret-password'))
+        
+        with patch('auth.verify_password') as mock_verify_password:
+            assert redeem_refresh_token(refresh_token) == {'user_id': 'admin', 'username': 'admin'}
+        mock_verify_password.assert_not_called()
+
+
+class TestSQLiteDatabase:
+    def test_uses_wal_journal(self, tmp_path):
+        database = SQLiteDatabase(str(tmp_path / 'liquid.db'))
+        
+        assert database.connection().execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+    def test_writes_visible_to_other_threads_and_connections(self, tmp_path):
+        path = str(tmp_path / 'liquid.db')
+        store = SQLiteRateStore(SQLiteDatabase(path))
+        
+        thread = threading.Thread(target=store.save_snapshot, args=(make_snapshot(),))
+        thread.start()
+        thread.join()
+        
+        assert store.load_snapshot('USD') is not None
+        assert SQLiteRateStore(SQLiteDatabase(path)).load_snapshot('USD').rates['BRL'] == 5.2
+
+    def test_sqlite_errors_become_database_errors(self, tmp_path):
+        from exceptions import DatabaseError
+        store = SQLiteRateStore(SQLiteDatabase(str(tmp_path / 'liquid.db')))
+        store.database.connection().execute('DROP TABLE snapshots')
+        
+        with pytest.raises(DatabaseError):
+            store.load_snapshot('USD')
+
+
+class TestCreateStores:
+    def test_memory_backend(self):
+        rate_store, user_store = create_stores('memory')
+        
+        assert isinstance(rate_store, MemoryRateStore)
+        assert isinstance(user_store, MemoryUserStore)
+
+    def test_sqlite_backend_shares_one_file(self, tmp_path):
+        with patch.dict(os.environ, {'SQLITE_PATH': str(tmp_path / 'liquid.db')}):
+            rate_store, user_store = create_stores('sqlite')
+        
+        assert rate_store.database is user_store.database
+
+    @patch.dict(os.environ, {'STORE_BACKEND': 'cassandra'})
+    def test_invalid_backend_falls_back_to_dynamodb(self):
+        assert get_store_backend() == 'dynamodb'
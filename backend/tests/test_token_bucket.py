@@ -0,0 +1,51 @@
+import pytest
+from utils.token_bucket import TokenBucket
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestTokenBucket:
+    def test_allows_burst_up_to_capacity(self):
+        bucket = TokenBucket(3, 1.0, clock=FakeClock())
+
+        assert [bucket.try_acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+        assert bucket.try_acquire() == pytest.approx(1.0)
+
+    def test_refills_over_time(self):
+        clock = FakeClock()
+        bucket = TokenBucket(2, 0.5, clock=clock)
+        bucket.try_acquire()
+        bucket.try_acquire()
+
+        assert bucket.try_acquire() == pytest.approx(2.0)
+        clock.now = 2.0
+        assert bucket.try_acquire() == 0.0
+
+    def test_never_exceeds_capacity(self):
+        clock = FakeClock()
+        bucket = TokenBucket(2, 1.0, clock=clock)
+        clock.now = 100.0
+
+        assert bucket.try_acquire() == 0.0
+        assert bucket.try_acquire() == 0.0
+        assert bucket.try_acquire() > 0
+
+    def test_is_full(self):
+        clock = FakeClock()
+        bucket = TokenBucket(1, 1.0, clock=clock)
+        assert bucket.is_full()
+
+        bucket.try_acquire()
+        assert not bucket.is_full()
+        clock.now = 1.0
+        assert bucket.is_full()
+
+    def test_rejects_invalid_settings(self):
+        with pytest.raises(ValueError):
+            TokenBucket(0, 1.0)
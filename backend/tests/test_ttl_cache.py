@@ -0,0 +1,107 @@
+import pytest
+from utils.ttl_cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestTTLCache:
+    def test_get_missing_key_counts_miss(self):
+        cache = TTLCache(max_size=2, default_ttl_seconds=60)
+
+        assert cache.get('USD') is None
+        assert cache.misses == 1
+        assert cache.hits == 0
+
+    def test_set_and_get_counts_hit(self):
+        cache = TTLCache(max_size=2, default_ttl_seconds=60)
+        cache.set(('USD', 'BRL'), 5.2)
+
+        assert cache.get(('USD', 'BRL')) == 5.2
+        assert cache.hits == 1
+
+    def test_entry_expires_after_default_ttl(self):
+        clock = FakeClock()
+        cache = TTLCache(max_size=2, default_ttl_seconds=60, clock=clock)
+        cache.set('key', 'value')
+
+        clock.now += 59
+        assert cache.get('key') == 'value'
+
+        clock.now += 1
+        assert cache.get('key') is None
+        assert cache.expirations == 1
+        assert len(cache) == 0
+
+    def test_entry_expires_at_explicit_timestamp(self):
+        clock = FakeClock()
+        cache = TTLCache(max_size=2, default_ttl_seconds=3600, clock=clock)
+        cache.set('key', 'value', expires_at=clock.now + 10)
+
+        clock.now += 10
+        assert cache.get('key') is None
+
+    def test_lru_eviction(self):
+        cache = TTLCache(max_size=2, default_ttl_seconds=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        assert cache.get('b') is None
+        assert cache.get('a') == 1
+        assert cache.get('c') == 3
+        assert cache.evictions == 1
+
+    def test_overwrite_does_not_evict(self):
+        cache = TTLCache(max_size=2, default_ttl_seconds=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.set('a', 10)
+
+        assert len(cache) == 2
+        assert cache.get('a') == 10
+        assert cache.evictions == 0
+
+    def test_invalidate_and_clear(self):
+        cache = TTLCache(max_size=2, default_ttl_seconds=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+
+        cache.invalidate('a')
+        assert cache.get('a') is None
+
+        cache.clear()
+        assert len(cache) == 0
+        assert cache.stats()['misses'] == 0
+
+    def test_clear_can_keep_stats(self):
+        cache = TTLCache(max_size=2, default_ttl_seconds=60)
+        cache.set('a', 1)
+        cache.get('a')
+
+        cache.clear(reset_stats=False)
+
+        assert len(cache) == 0
+        assert cache.stats()['hits'] == 1
+
+    def test_stats_hit_rate(self):
+        cache = TTLCache(max_size=2, default_ttl_seconds=60)
+        cache.set('a', 1)
+        cache.get('a')
+        cache.get('missing')
+
+        stats = cache.stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['hit_rate'] == 0.5
+        assert stats['max_size'] == 2
+
+    def test_invalid_max_size(self):
+        with pytest.raises(ValueError):
+            TTLCache(max_size=0, default_ttl_seconds=60)
@@ -1,5 +1,14 @@
+import os
 import pytest
-from validators import validate_amount, validate_currency, validate_conversion_request
+from unittest.mock import patch
+from validators import (
+    validate_amount,
+    validate_currency,
+    validate_conversion_request,
+    validate_batch_size,
+    validate_fan_out_request,
+    validate_history_request
+)
 from exceptions import ValidationError
 from constants import VALID_CURRENCIES, MAX_AMOUNT, MIN_AMOUNT
 
@@ -106,3 +115,54 @@ class TestValidateConversionRequest:
                     amount_float = validate_conversion_request(100, from_curr, to_curr)
                     assert amount_float == 100.0
 
+
+
+class TestValidateFanOutRequest:
+    def test_valid_request(self):
+        assert validate_fan_out_request(100, 'USD') == 100.0
+
+    def test_invalid_currency(self):
+        with pytest.raises(ValidationError):
+            validate_fan_out_request(100, 'XAU')
+
+    def test_invalid_amount(self):
+        with pytest.raises(ValidationError):
+            validate_fan_out_request(0, 'USD')
+
+class TestValidateBatchSize:
+    def test_within_limit(self):
+        validate_batch_size(1000)
+
+    def test_empty_batch(self):
+        with pytest.raises(ValidationError):
+            validate_batch_size(0)
+
+    @patch.dict(os.environ, {'BATCH_MAX_ITEMS': '10'})
+    def test_configured_limit(self):
+        with pytest.raises(ValidationError) as exc_info:
+            validate_batch_size(11)
+        assert 'Batch exceeds maximum of 10 items.' in str(exc_info.value)
+
+class TestValidateHistoryRequest:
+    def test_point_query(self):
+        validate_history_request('USD', 'BRL', 1735689600, None, None)
+
+    def test_range_query(self):
+        validate_history_request('USD', 'BRL', None, 1735689600, 1735776000)
+
+    def test_requires_at_or_start(self):
+        with pytest.raises(ValidationError) as exc_info:
+            validate_history_request('USD', 'BRL', None, None, None)
+        assert 'Either at or start is required.' in str(exc_info.value)
+
+    def test_at_with_range(self):
+        with pytest.raises(ValidationError):
+            validate_history_request('USD', 'BRL', 1735689600, 1735689600, None)
+
+    def test_start_after_end(self):
+        with pytest.raises(ValidationError):
+            validate_history_request('USD', 'BRL', None, 1735776000, 1735689600)
+
+    def test_same_currencies(self):
+        with pytest.raises(ValidationError):
+            validate_history_request('USD', 'USD', 1735689600, None, None)
@@ -0,0 +1,154 @@
+import time
+import threading
+from collections import deque
+from utils.deadline import DeadlineExceededError
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """Stops calling a failing dependency until it has had time to recover.
+
+    Closed: calls go through and their outcomes fill a rolling window. Once the window
+    holds minimum_calls outcomes and the share of failed or slow calls reaches
+    failure_rate_threshold, the circuit opens. Open: calls fail fast with
+    CircuitOpenError for open_seconds. Half-open: up to half_open_max_calls trial calls
+    go through; if they all succeed the circuit closes, any failure opens it again.
+
+    Calls ended by neutral_exceptions, such as the request running out of time, say
+    nothing about the dependency: they are neither recorded nor count as a trial.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(
+        self,
+        name,
+        failure_rate_threshold=0.5,
+        slow_call_seconds=None,
+        minimum_calls=5,
+        window_size=20,
+        open_seconds=30,
+        half_open_max_calls=1,
+        failure_exceptions=(Exception,),
+        neutral_exceptions=(DeadlineExceededError,),
+        clock=time.monotonic
+    ):
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.minimum_calls = minimum_calls
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self.failure_exceptions = failure_exceptions
+        self.neutral_exceptions = neutral_exceptions
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._outcomes = deque(maxlen=window_size)
+        self._state = self.CLOSED
+        self._opened_at = None
+        self._trials_started = 0
+        self._trials_succeeded = 0
+
+    def _current_state(self):
+        if self._state == self.OPEN and self._clock() - self._opened_at >= self.open_seconds:
+            self._state = self.HALF_OPEN
+            self._trials_started = 0
+            self._trials_succeeded = 0
+        return self._state
+
+    def _open(self):
+        self._state = self.OPEN
+        self._opened_at = self._clock()
+        self._outcomes.clear()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def is_open(self):
+        return self.state == self.OPEN
+
+    def allow_request(self):
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and self._trials_started < self.half_open_max_calls:
+                self._trials_started += 1
+                return True
+            return False
+
+    def release(self):
+        """Give back a half-open trial slot taken by a call whose outcome is not recorded."""
+        with self._lock:
+            if self._current_state() == self.HALF_OPEN and self._trials_started > 0:
+                self._trials_started -= 1
+
+    def record(self, failed, latency_seconds=0.0):
+        """Record one call outcome; calls slower than slow_call_seconds count as failures."""
+        if self.slow_call_seconds is not None and latency_seconds > self.slow_call_seconds:
+            failed = True
+
+        with self._lock:
+            state = self._current_state()
+            if state == self.HALF_OPEN:
+                if failed:
+                    self._open()
+                    return
+                self._trials_succeeded += 1
+                if self._trials_succeeded >= self.half_open_max_calls:
+                    self._state = self.CLOSED
+                    self._outcomes.clear()
+                return
+
+            if state == self.OPEN:
+                return
+
+            self._outcomes.append(failed)
+            if len(self._outcomes) >= self.minimum_calls:
+                failure_rate = sum(self._outcomes) / len(self._outcomes)
+                if failure_rate >= self.failure_rate_threshold:
+                    self._open()
+
+    def call(self, fn, *args, **kwargs):
+        if not self.allow_request():
+            raise CircuitOpenError(f'Circuit {self.name} is open')
+
+        started_at = self._clock()
+        try:
+            result = fn(*args, **kwargs)
+        except self.neutral_exceptions:
+            self.release()
+            raise
+        except self.failure_exceptions:
+            self.record(True, self._clock() - started_at)
+            raise
+        except Exception:
+            self.record(False, self._clock() - started_at)
+            raise
+
+        self.record(False, self._clock() - started_at)
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._opened_at = None
+            self._outcomes.clear()
+            self._trials_started = 0
+            self._trials_succeeded = 0
+
+    def stats(self):
+        with self._lock:
+            outcomes = list(self._outcomes)
+            return {
+                'state': self._current_state(),
+                'window_calls': len(outcomes),
+                'window_failures': sum(outcomes)
+            }
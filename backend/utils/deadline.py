@@ -0,0 +1,44 @@
+import math
+import time
+
+
+class DeadlineExceededError(Exception):
+    pass
+
+
+class Deadline:
+    """Time budget for one request; an unbounded deadline never expires."""
+
+    def __init__(self, remaining_seconds=None, clock=time.monotonic):
+        self._clock = clock
+        self._expires_at = None if remaining_seconds is None else clock() + remaining_seconds
+
+    @classmethod
+    def from_context(cls, context, reserve_seconds=0.0, clock=time.monotonic):
+        """Budget from the Lambda context, minus reserve_seconds kept for building the response."""
+        try:
+            remaining_seconds = float(context.get_remaining_time_in_millis()) / 1000
+        except (AttributeError, TypeError, ValueError):
+            return cls(clock=clock)
+        return cls(max(0.0, remaining_seconds - reserve_seconds), clock=clock)
+
+    @property
+    def is_bounded(self):
+        return self._expires_at is not None
+
+    def remaining(self):
+        if self._expires_at is None:
+            return math.inf
+        return max(0.0, self._expires_at - self._clock())
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def check(self, operation):
+        if self.expired():
+            raise DeadlineExceededError(f'Deadline exceeded before {operation}')
+
+    def bound(self, timeout, operation='call'):
+        """Shrink timeout to the remaining budget; raise when nothing is left."""
+        self.check(operation)
+        return min(timeout, self.remaining())
@@ -33,6 +33,17 @@ def handle_unauthorized_error(e, request_id, request_origin=None):
     return create_response(401, {'error': str(e)}, request_origin)
 
 
+def handle_quota_exceeded_error(e, request_id, request_origin=None):
+    logger.warning('Rate limited request', extra=create_log_extra(
+        request_id,
+        retry_after=e.retry_after
+    ))
+    return create_response(429, {'error': str(e)}, request_origin, headers={
+        'Retry-After': str(e.retry_after),
+        'Access-Control-Expose-Headers': 'Retry-After'
+    })
+
+
 def handle_database_error(e, request_id, context_message):
     error_type = type(e).__name__
     logger.error(f'Database error {context_message}', extra=create_log_extra(
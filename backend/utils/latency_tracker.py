@@ -0,0 +1,32 @@
+import math
+import threading
+from collections import deque
+
+
+class LatencyTracker:
+    """Rolling window of call latencies (seconds) with nearest-rank percentiles."""
+
+    def __init__(self, window_size=100):
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=window_size)
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, percent):
+        """Return the percent-th percentile of the window, or None when it is empty."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        rank = max(1, math.ceil(percent / 100 * len(samples)))
+        return samples[min(rank, len(samples)) - 1]
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._samples)
@@ -8,10 +8,15 @@ def extract_origin(event):
     return event.get('headers', {}).get('Origin') or event.get('headers', {}).get('origin')
 
 
+def extract_source_ip(event):
+    return (event.get('requestContext') or {}).get('identity', {}).get('sourceIp')
+
+
 def extract_request_context(event, context):
     return {
         'request_id': context.aws_request_id if context else None,
-        'origin': extract_origin(event)
+        'origin': extract_origin(event),
+        'source_ip': extract_source_ip(event)
     }
 
 
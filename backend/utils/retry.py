@@ -0,0 +1,41 @@
+import time
+import random
+
+
+def backoff_delay(attempt, base_delay, max_delay, rand=random.uniform):
+    """Full-jitter exponential backoff: uniform in [0, min(max_delay, base_delay * 2**(attempt - 1))]."""
+    return rand(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+
+
+def retry_with_backoff(
+    fn,
+    deadline=None,
+    max_attempts=3,
+    base_delay=0.1,
+    max_delay=2.0,
+    retry_on=(Exception,),
+    min_attempt_seconds=0.0,
+    on_retry=None,
+    sleep=None,
+    rand=random.uniform
+):
+    """Call fn until it succeeds, retrying retry_on errors with jittered exponential backoff.
+
+    A retry is only made when the deadline leaves room for the backoff sleep plus
+    min_attempt_seconds of work; otherwise the last error is raised right away.
+    """
+    sleep = sleep or time.sleep
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            return fn()
+        except retry_on as e:
+            if attempt >= max_attempts:
+                raise
+            delay = backoff_delay(attempt, base_delay, max_delay, rand)
+            if deadline is not None and deadline.remaining() < delay + min_attempt_seconds:
+                raise
+            if on_retry is not None:
+                on_retry(attempt, delay, e)
+            sleep(delay)
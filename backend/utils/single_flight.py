@@ -0,0 +1,53 @@
+import threading
+from utils.deadline import DeadlineExceededError
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls for the same key into one in-flight execution."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn, deadline=None):
+        """Run fn once per key at a time; concurrent callers share its result or error.
+
+        A caller that joins a call already in flight waits at most for its own deadline,
+        then raises DeadlineExceededError; the leader's call carries on regardless.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not is_leader:
+            timeout = deadline.remaining() if deadline is not None and deadline.is_bounded else None
+            if not call.done.wait(timeout):
+                raise DeadlineExceededError(f'Deadline exceeded waiting for in-flight call {key}')
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self, key):
+        with self._lock:
+            return key in self._calls
@@ -0,0 +1,35 @@
+import time
+import threading
+
+
+class TokenBucket:
+    """Holds up to capacity tokens, refilled continuously at refill_per_second."""
+
+    def __init__(self, capacity, refill_per_second, clock=time.monotonic):
+        if capacity <= 0 or refill_per_second <= 0:
+            raise ValueError('capacity and refill_per_second must be positive')
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._tokens = float(capacity)
+        self._updated_at = clock()
+
+    def _refill(self, now):
+        elapsed = max(0.0, now - self._updated_at)
+        self._tokens = min(float(self.capacity), self._tokens + elapsed * self.refill_per_second)
+        self._updated_at = now
+
+    def try_acquire(self, tokens=1):
+        """Take tokens when available and return 0, otherwise the seconds until they will be."""
+        with self._lock:
+            self._refill(self._clock())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.refill_per_second
+
+    def is_full(self):
+        with self._lock:
+            self._refill(self._clock())
+            return self._tokens >= self.capacity
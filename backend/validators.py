@@ -1,3 +1,4 @@
+import os
 import logging
 from constants import VALID_CURRENCIES, MAX_AMOUNT, MIN_AMOUNT
 from exceptions import ValidationError
@@ -6,39 +7,44 @@ from utils.logging_helpers import create_log_extra
 logger = logging.getLogger()
 
 
-def validate_amount(amount, request_id=None):
+def validate_amount(amount, request_id=None, quiet=False):
+    """Return the amount as a float; quiet skips the warning logged for each rejected value."""
     if not amount or not isinstance(amount, (int, float)):
-        logger.warning('Invalid amount type validation failed', extra=create_log_extra(request_id, amount=amount))
+        if not quiet:
+            logger.warning('Invalid amount type validation failed', extra=create_log_extra(request_id, amount=amount))
         raise ValidationError('Invalid amount. Must be a number.')
     
     amount_float = float(amount)
     
     if amount_float < MIN_AMOUNT:
-        logger.warning('Amount below minimum validation failed', extra=create_log_extra(
-            request_id,
-            amount=amount_float,
-            min_amount=MIN_AMOUNT
-        ))
+        if not quiet:
+            logger.warning('Amount below minimum validation failed', extra=create_log_extra(
+                request_id,
+                amount=amount_float,
+                min_amount=MIN_AMOUNT
+            ))
         raise ValidationError(f'Amount must be at least {MIN_AMOUNT}.')
     
     if amount_float > MAX_AMOUNT:
-        logger.warning('Amount above maximum validation failed', extra=create_log_extra(
-            request_id,
-            amount=amount_float,
-            max_amount=MAX_AMOUNT
-        ))
+        if not quiet:
+            logger.warning('Amount above maximum validation failed', extra=create_log_extra(
+                request_id,
+                amount=amount_float,
+                max_amount=MAX_AMOUNT
+            ))
         raise ValidationError(f'Amount exceeds maximum limit of {MAX_AMOUNT:,.0f}.')
     
     return amount_float
 
 
-def validate_currency(code, request_id=None):
+def validate_currency(code, request_id=None, quiet=False):
     if code not in VALID_CURRENCIES:
-        logger.warning('Invalid currency validation failed', extra=create_log_extra(
-            request_id,
-            currency=code,
-            valid_currencies=list(VALID_CURRENCIES)
-        ))
+        if not quiet:
+            logger.warning('Invalid currency validation failed', extra=create_log_extra(
+                request_id,
+                currency=code,
+                valid_currencies=list(VALID_CURRENCIES)
+            ))
         raise ValidationError(f'Invalid currency. Must be one of: {", ".join(sorted(VALID_CURRENCIES))}.')
 
 
@@ -49,18 +55,26 @@ def validate_conversion_request(amount, from_currency, to_currency, request_id=N
         from_currency=from_currency,
         to_currency=to_currency
     ))
+    return validate_conversion(amount, from_currency, to_currency, request_id)
+
+
+def validate_conversion(amount, from_currency, to_currency, request_id=None, quiet=False):
+    """Validate one conversion and return the amount as a float; batch items use it without the per-request log.
     
+    quiet skips the warning for each rejected field, for callers that report rejects in bulk.
+    """
     try:
-        amount_float = validate_amount(amount, request_id)
-        validate_currency(from_currency, request_id)
-        validate_currency(to_currency, request_id)
+        amount_float = validate_amount(amount, request_id, quiet)
+        validate_currency(from_currency, request_id, quiet)
+        validate_currency(to_currency, request_id, quiet)
         
         if from_currency == to_currency:
-            logger.warning('Same currency validation failed', extra=create_log_extra(
-                request_id,
-                from_currency=from_currency,
-                to_currency=to_currency
-            ))
+            if not quiet:
+                logger.warning('Same currency validation failed', extra=create_log_extra(
+                    request_id,
+                    from_currency=from_currency,
+                    to_currency=to_currency
+                ))
             raise ValidationError('From and to currencies must be different.')
         
         return amount_float
@@ -82,3 +96,55 @@ def validate_conversion_request(amount, from_currency, to_currency, request_id=N
         raise ValidationError(f'Validation failed: {str(e)}')
 
 
+def validate_fan_out_request(amount, from_currency, request_id=None):
+    """Validate a conversion into every supported currency and return the amount as a float."""
+    amount_float = validate_amount(amount, request_id)
+    validate_currency(from_currency, request_id)
+    return amount_float
+
+
+def get_batch_max_items():
+    """Most items one POST /convert/batch request may carry."""
+    max_items_str = os.environ.get('BATCH_MAX_ITEMS', '1000')
+    try:
+        return max(1, int(max_items_str))
+    except (ValueError, TypeError):
+        logger.warning(f'Invalid BATCH_MAX_ITEMS value: {max_items_str}, using default 1000')
+        return 1000
+
+
+def validate_batch_size(count, request_id=None):
+    max_items = get_batch_max_items()
+    
+    if count < 1:
+        raise ValidationError('Batch must contain at least one item.')
+    
+    if count > max_items:
+        logger.warning('Batch size validation failed', extra=create_log_extra(
+            request_id,
+            items_count=count,
+            max_items=max_items
+        ))
+        raise ValidationError(f'Batch exceeds maximum of {max_items} items.')
+
+
+def validate_history_request(from_currency, to_currency, at, start, end, request_id=None):
+    validate_currency(from_currency, request_id)
+    validate_currency(to_currency, request_id)
+    
+    if from_currency == to_currency:
+        raise ValidationError('From and to currencies must be different.')
+    
+    if at is not None and (start is not None or end is not None):
+        raise ValidationError('Use either at, or start and end.')
+    
+    if at is None and start is None:
+        raise ValidationError('Either at or start is required.')
+    
+    if start is not None and end is not None and start > end:
+        logger.warning('History range validation failed', extra=create_log_extra(
+            request_id,
+            start=start,
+            end=end
+        ))
+        raise ValidationError('start must not be after end.')
@@ -1,4 +1,4 @@
-import { convertCurrency } from '../api'
+import { convertCurrency, convertToAllCurrencies } from '../api'
 import { API_URL } from '@/constants/api'
 
 describe('api', () => {
@@ -115,5 +115,41 @@ describe('api', () => {
       })
     })
   })
+
+  describe('convertToAllCurrencies', () => {
+    it('should request every conversion in a single call', async () => {
+      const mockResponse = {
+        amount: 100.0,
+        from: 'USD',
+        conversions: [
+          { to: 'BRL', rate: 5.2, converted_amount: 520.0 },
+          { to: 'EUR', rate: 0.92, converted_amount: 92.0 },
+        ],
+        unavailable: [],
+        snapshot_version: 1704067200,
+        stale: false,
+      }
+
+      ;(global.fetch as jest.Mock).mockResolvedValueOnce({
+        ok: true,
+        json: async () => mockResponse,
+      })
+
+      const result = await convertToAllCurrencies(100, 'USD')
+
+      expect(result).toEqual(mockResponse)
+      expect(global.fetch).toHaveBeenCalledTimes(1)
+      expect(global.fetch).toHaveBeenCalledWith(`${API_URL}/convert/all`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+          amount: 100,
+          from: 'USD',
+        }),
+      })
+    })
+  })
 })
 
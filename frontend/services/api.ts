@@ -1,5 +1,5 @@
 import { API_URL } from '@/constants/api';
-import { ConversionResult } from '@/types/conversion';
+import { ConversionResult, FanOutConversionResult } from '@/types/conversion';
 
 function getAuthToken(): string | null {
   if (typeof window === 'undefined') {
@@ -8,11 +8,7 @@ function getAuthToken(): string | null {
   return localStorage.getItem('liquid_auth_token');
 }
 
-export async function convertCurrency(
-  amount: number,
-  from: string,
-  to: string
-): Promise<ConversionResult> {
+async function postConversion<T>(path: string, body: object): Promise<T> {
   const token = getAuthToken();
   
   const headers: HeadersInit = {
@@ -23,14 +19,10 @@ export async function convertCurrency(
     headers['Authorization'] = `Bearer ${token}`;
   }
 
-  const response = await fetch(`${API_URL}/convert`, {
+  const response = await fetch(`${API_URL}${path}`, {
     method: 'POST',
     headers,
-    body: JSON.stringify({
-      amount,
-      from,
-      to,
-    }),
+    body: JSON.stringify(body),
   });
 
   const data = await response.json();
@@ -49,4 +41,24 @@ export async function convertCurrency(
   return data;
 }
 
+export async function convertCurrency(
+  amount: number,
+  from: string,
+  to: string
+): Promise<ConversionResult> {
+  return postConversion<ConversionResult>('/convert', {
+    amount,
+    from,
+    to,
+  });
+}
 
+export async function convertToAllCurrencies(
+  amount: number,
+  from: string
+): Promise<FanOutConversionResult> {
+  return postConversion<FanOutConversionResult>('/convert/all', {
+    amount,
+    from,
+  });
+}
@@ -4,6 +4,21 @@ export interface ConversionResult {
   to: string;
   rate: number;
   converted_amount: number;
+  stale?: boolean;
 }
 
+export interface FanOutConversion {
+  to: string;
+  rate: number;
+  converted_amount: number;
+}
+
+export interface FanOutConversionResult {
+  amount: number;
+  from: string;
+  conversions: FanOutConversion[];
+  unavailable: string[];
+  snapshot_version: number;
+  stale?: boolean;
+}
 